@@ -0,0 +1,62 @@
+"""Changelist render times for the large QuizHistory and UserAnswer admins.
+
+Compares the current ModelAdmin classes with the previous configuration
+(related-object list filters, no select_related, exact counts).
+"""
+import argparse
+
+from benchmarks.harness import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--histories", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib import admin
+    from django.test import Client
+    from django.urls import clear_url_caches, path
+    from quizapp.models import QuizHistory, User, UserAnswer
+    from benchmarks.seed import seed
+
+    seed(histories=args.histories)
+    staff = User.objects.create_superuser(username="bench", email="bench@bench.local", password="bench")
+
+    class LegacyQuizHistoryAdmin(admin.ModelAdmin):
+        list_display = ["user", "quiz", "score", "total_questions", "correct_answers", "started_at", "completed_at"]
+        list_filter = ["quiz", "user"]
+
+    class LegacyUserAnswerAdmin(admin.ModelAdmin):
+        list_display = ["history", "question", "selected_option", "is_correct"]
+        list_filter = ["is_correct", "history"]
+
+    legacy_site = admin.AdminSite(name="legacy")
+    legacy_site.register(QuizHistory, LegacyQuizHistoryAdmin)
+    legacy_site.register(UserAnswer, LegacyUserAnswerAdmin)
+
+    from quizgen import urls
+    urls.urlpatterns.insert(0, path("legacy-admin/", legacy_site.urls))
+    clear_url_caches()
+    settings.DEBUG = False
+
+    client = Client()
+    client.force_login(staff)
+
+    def render(url):
+        def run():
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        return run
+
+    rows = {}
+    for label, prefix in (("legacy", "/legacy-admin"), ("current", "/admin")):
+        rows[f"{label} quizhistory"] = measure(render(f"{prefix}/quizapp/quizhistory/"), repeat=args.repeat)
+        rows[f"{label} useranswer"] = measure(render(f"{prefix}/quizapp/useranswer/"), repeat=args.repeat)
+    report(f"Admin changelist render, {args.histories} histories / {UserAnswer.objects.count()} answers", rows)
+
+
+if __name__ == "__main__":
+    main()
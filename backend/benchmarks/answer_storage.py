@@ -0,0 +1,65 @@
+"""Storage size and read latency of row-per-answer vs packed answer storage.
+
+Seeds the same attempts twice, once as UserAnswer rows and once packed
+into QuizHistory.packed_answers, then compares on-disk bytes (SQLite dbstat)
+and the time to load an attempt's answers through history_answer_values().
+"""
+import argparse
+import random
+
+from benchmarks.harness import measure, report, setup_django
+
+
+def table_bytes(cursor, table):
+    cursor.execute("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = %s OR name LIKE %s",
+                   [table, f"sqlite_autoindex_{table}%"])
+    total = cursor.fetchone()[0]
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s", [table])
+    for (index,) in cursor.fetchall():
+        cursor.execute("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = %s", [index])
+        total += cursor.fetchone()[0]
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--histories", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from quizapp.archive import archive_histories, history_answer_values
+    from quizapp.models import QuizHistory
+    from benchmarks.seed import seed
+
+    if connection.vendor != "sqlite":
+        raise SystemExit("This benchmark reads SQLite's dbstat table")
+
+    seed(histories=args.histories)
+    rng = random.Random(1)
+    sample = rng.sample(list(QuizHistory.objects.values_list('id', flat=True)), 50)
+
+    def read_all():
+        for history in QuizHistory.objects.filter(id__in=sample):
+            history_answer_values(history)
+
+    with connection.cursor() as cursor:
+        cursor.execute("VACUUM")
+        rows_bytes = table_bytes(cursor, "quizapp_useranswer") + table_bytes(cursor, "quizapp_quizhistory")
+    rows_read = measure(read_all, repeat=args.repeat // 10)
+
+    archive_histories(days=-1, batch_size=1000)
+    with connection.cursor() as cursor:
+        cursor.execute("VACUUM")
+        packed_bytes = table_bytes(cursor, "quizapp_useranswer") + table_bytes(cursor, "quizapp_quizhistory")
+    packed_read = measure(read_all, repeat=args.repeat // 10)
+
+    print(f"Storage for {args.histories} attempts (history + answer tables incl. indexes)")
+    print(f"  rows    {rows_bytes / 1024:10.0f} KiB")
+    print(f"  packed  {packed_bytes / 1024:10.0f} KiB  ({packed_bytes / rows_bytes:.1%} of rows)")
+    report("Reading the answers of 50 attempts", {"rows": rows_read, "packed": packed_read})
+
+
+if __name__ == "__main__":
+    main()
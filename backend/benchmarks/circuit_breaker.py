@@ -0,0 +1,72 @@
+"""Walk the provider circuit breaker through an outage against the fake LLM server.
+
+Phases: healthy -> provider erroring (circuit opens, requests are served a
+stored quiz without calling the provider) -> provider recovered (after the
+cooldown one probe closes the circuit) -> provider slow (slow calls also
+open it). Prints per-phase latency and provider calls, and exits non-zero if
+the breaker does not behave as expected.
+"""
+import argparse
+import os
+import time
+
+from benchmarks.harness import setup_django
+from loadtest.fake_llm import FakeLLMServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=8, help="Create requests per phase")
+    args = parser.parse_args()
+
+    fake = FakeLLMServer(latency_ms=20, jitter_ms=0).start()
+    os.environ["AI_BASE_URL"] = fake.url
+    setup_django()
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+    from quizapp.circuit import llm_breaker
+    from quizapp.models import User
+
+    user = User.objects.create_user(email="circuit@example.com", username="circuit", password="x")
+    client = APIClient()
+    client.force_authenticate(user)
+    body = {"category": "Science", "subcategory": "Physics", "questionCount": 5, "duration": 10}
+    failures = []
+
+    def phase(name, count, expect_state):
+        calls_before = fake.calls
+        started = time.perf_counter()
+        outcomes = [client.post("/api/quizzes/create/", body, format="json") for _ in range(count)]
+        elapsed = (time.perf_counter() - started) * 1000 / count
+        fallbacks = sum(1 for response in outcomes if response.status_code == 200 and response.json().get("fallback"))
+        state = client.get("/api/quizzes/create/status/").json()["generator"]["state"]
+        print(f"  {name:<10} provider calls={fake.calls - calls_before:>3}  fallbacks={fallbacks:>3}  "
+              f"avg={elapsed:7.1f} ms  state={state}")
+        if state != expect_state:
+            failures.append(f"{name}: expected {expect_state}, got {state}")
+        return fake.calls - calls_before
+
+    with override_settings(CIRCUIT_MIN_CALLS=3, CIRCUIT_COOLDOWN_SECONDS=1, CIRCUIT_SLOW_CALL_MS=500,
+                           QUIZ_POOL_SIZE=0, GENERATION_USER_LIMIT=10000):
+        phase("healthy", args.requests, "closed")
+
+        fake.failure_rate = 1.0
+        phase("outage", args.requests, "open")
+        if phase("open", args.requests, "open") != 0:
+            failures.append("open circuit still called the provider")
+
+        fake.failure_rate = 0.0
+        time.sleep(1.1)
+        phase("recovered", args.requests, "closed")
+
+        fake.latency_ms = 700
+        phase("slow", args.requests, "open")
+        llm_breaker.close()
+    fake.stop()
+
+    if failures:
+        raise SystemExit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
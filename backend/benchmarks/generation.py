@@ -0,0 +1,109 @@
+"""Tokens and latency per generated question: legacy prompt vs compact vs batched.
+
+Generates the same set of small topic quizzes three ways against the fake LLM
+server and reports, from the recorded GenerationCall rows, input and output
+tokens per question and wall time per question.
+"""
+import argparse
+import os
+
+from benchmarks.harness import setup_django
+from loadtest.fake_llm import FakeLLMServer
+
+# The template get_prompt() used before prompts.py, kept as the baseline. The
+# Topic/Questions lines are only there so the fake server can read the request.
+LEGACY_PROMPT = """
+        You are a Quiz Generator AI. Based on the following input, generate a set of quiz questions ONLY in the exact JSON format described.
+
+        ### Output format (strict):
+        [
+        {{
+            "question": "string",
+            "options": {{
+                "A": "optionA",
+                "B": "optionB",
+                "C": "optionC",
+                "D": "optionD"
+            }},
+            "correct_answer": "A",
+            "difficulty": "Easy"
+        }},
+        ...
+        ]
+
+        ### Requirements:
+        1. Each question must include:
+        - "question": The question text (clear, concise, no ambiguity)
+        - "options": Four answer choices mapped to keys "A", "B", "C", "D"
+        - "correct_answer": The key of the correct answer ("A"/"B"/"C"/"D")
+        - "difficulty": One of "Easy", "Medium", or "Hard"
+        2. Do NOT repeat the same format or question wording.
+        3. DO NOT include any explanations, headings, or extra text — ONLY output the JSON array.
+
+        ### Input:
+        Category: {category}
+        Subcategory: {subcategory}
+        Number of Questions: {num_questions}
+        Topic: {category} / {subcategory}
+        Questions: {num_questions}
+
+        ### Output:
+        Generate exactly {num_questions} distinct questions in the above JSON format.
+    """
+
+TOPICS = [
+    ("Science", "Physics"), ("Science", "Chemistry"), ("Science", "Biology"), ("History", "Ancient"),
+    ("History", "Modern"), ("Technology", "Programming"), ("Technology", "Networks"), ("Geography", "Rivers"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=5, help="Questions per topic")
+    parser.add_argument("--llm-latency-ms", type=float, default=400)
+    parser.add_argument("--llm-token-latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    fake = FakeLLMServer(latency_ms=args.llm_latency_ms, jitter_ms=0, token_latency_ms=args.llm_token_latency_ms)
+    fake.start()
+    os.environ["AI_BASE_URL"] = fake.url
+    setup_django()
+    from django.db.models import Count, Sum
+    from quizapp.models import GenerationCall
+    from quizapp.prompts import TopicRequest
+    from quizapp import utils
+    from quizapp.utils import call_model, generate_quiz, generate_quizzes, parse_single
+
+    # Prompt sizes are compared on the free-text path; see benchmarks.structured_output.
+    utils.AI_STRUCTURED_OUTPUT = False
+    topics = [TopicRequest(category, subcategory, args.questions) for category, subcategory in TOPICS]
+
+    def legacy():
+        for topic in topics:
+            prompt = LEGACY_PROMPT.format(**topic._asdict())
+            call_model(prompt, 1, topic.num_questions, parse_single)
+
+    def compact():
+        for topic in topics:
+            generate_quiz(category=topic.category, subcategory=topic.subcategory, num_questions=topic.num_questions)
+
+    def batched():
+        generate_quizzes(topics)
+
+    print(f"{len(topics)} topics x {args.questions} questions")
+    print(f"  {'mode':<9}{'calls':>7}{'in tok/q':>10}{'out tok/q':>11}{'ms/q':>8}{'est in/q':>10}")
+    for name, run in [("legacy", legacy), ("compact", compact), ("batched", batched)]:
+        GenerationCall.objects.all().delete()
+        run()
+        totals = GenerationCall.objects.aggregate(
+            calls=Count('id'), questions=Sum('questions_returned'), input=Sum('input_tokens'),
+            output=Sum('output_tokens'), latency=Sum('latency_ms'), estimated=Sum('estimated_input_tokens'))
+        questions = totals["questions"] or 1
+        print(f"  {name:<9}{totals['calls']:>7}{totals['input'] / questions:>10.1f}"
+              f"{totals['output'] / questions:>11.1f}{totals['latency'] / questions:>8.0f}"
+              f"{totals['estimated'] / questions:>10.1f}")
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Shared setup for the scripts in this package.
+
+Each benchmark runs against a throwaway test database so it never touches
+db.sqlite3. Run them from the backend directory, e.g.
+``python -m benchmarks.admin_changelist``.
+"""
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "quizgen.settings")
+
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, keepdb=False)
+
+
+def measure(func, repeat=20, warmup=2):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def report(title, rows):
+    print(title)
+    width = max(len(name) for name in rows)
+    for name, result in rows.items():
+        cells = "  ".join(f"{key}={value:9.2f}" for key, value in result.items())
+        print(f"  {name.ljust(width)}  {cells}")
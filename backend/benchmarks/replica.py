@@ -0,0 +1,141 @@
+"""Submission throughput while read-heavy views run, with and without the read replica.
+
+Builds a primary and a replica SQLite file in a temporary directory, seeds
+the primary and copies it over with sync_replica, then runs reader processes
+(statistics, history and quiz list requests) next to writer processes
+submitting quiz results, once with every read on the primary and once with
+the replica enabled. SQLite lets one writer in at a time and makes it wait
+for readers on the same file, so moving the reads off the primary should
+show up in writes per second. Reader and writer processes share the host's
+CPUs, so run it on a machine with more cores than processes; on fewer cores
+both phases are CPU-bound and the numbers come out about the same.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup(directory):
+    os.environ["DATABASE_NAME"] = os.path.join(directory, "primary.sqlite3")
+    os.environ["REPLICA_DATABASE_NAME"] = os.path.join(directory, "replica.sqlite3")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "quizgen.settings")
+    sys.path.insert(0, str(BACKEND_DIR))
+    import django
+    django.setup()
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+
+
+def worker(kind, user, quizzes, seconds, results):
+    from django.db import connections
+    from rest_framework.test import APIClient
+
+    connections.close_all()
+    client = APIClient()
+    client.force_authenticate(user)
+    rng = random.Random(user.pk)
+    done, errors, timings = 0, 0, []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if kind == "write":
+                quiz_id, question_ids = rng.choice(quizzes)
+                answers = {str(question_id): rng.randrange(4) for question_id in question_ids}
+                response = client.post(f"/api/quizzes/{quiz_id}/results/", {"userAnswers": answers}, format="json")
+            else:
+                response = client.get(rng.choice(["/api/statistics/", "/api/history/", "/api/quizzes/"]))
+            ok = response.status_code == 200
+        except Exception:
+            ok = False
+        if ok:
+            done += 1
+            timings.append((time.perf_counter() - started) * 1000)
+        else:
+            errors += 1
+    connections.close_all()
+    results.put((kind, done, errors, timings))
+
+
+def run_phase(seconds, readers, writers, read_users, write_users, quizzes):
+    """Run readers and writers as separate processes (the GIL would serialise threads) for ``seconds``."""
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = ([context.Process(target=worker, args=("read", read_users[i % len(read_users)], quizzes, seconds, results))
+                  for i in range(readers)]
+                 + [context.Process(target=worker, args=("write", write_users[i], quizzes, seconds, results))
+                    for i in range(writers)])
+    for process in processes:
+        process.start()
+    totals = {"read": 0, "write": 0}
+    errors, write_ms = 0, []
+    for _ in processes:
+        kind, done, failed, timings = results.get()
+        totals[kind] += done
+        errors += failed
+        if kind == "write":
+            write_ms.extend(timings)
+    for process in processes:
+        process.join()
+    write_ms.sort()
+    return {
+        "writes/s": totals["write"] / seconds,
+        "reads/s": totals["read"] / seconds,
+        "errors": errors,
+        "write_p50_ms": statistics.median(write_ms) if write_ms else 0,
+        "write_p95_ms": write_ms[int(len(write_ms) * 0.95)] if write_ms else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--histories", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup(directory)
+        from django.core.management import call_command
+        from django.db import connections
+        from django.test import override_settings
+        from quizapp.models import Question
+        from benchmarks.harness import report
+        from benchmarks.seed import seed
+
+        users = seed(users=50, quizzes=20, histories=args.histories)
+        questions = {}
+        for quiz_id, question_id in Question.objects.order_by('id').values_list('quiz_id', 'id'):
+            questions.setdefault(quiz_id, []).append(question_id)
+        quizzes = list(questions.items())
+        call_command("sync_replica", verbosity=0, stdout=open(os.devnull, "w"))
+        connections.close_all()
+
+        # Writers use their own accounts so their stickiness never affects the readers.
+        read_users, write_users = users[:-args.writers], users[-args.writers:]
+        results = {}
+        for name, alias in [("primary only", ""), ("with replica", "replica")]:
+            with override_settings(REPLICA_DATABASE=alias):
+                results[name] = run_phase(args.seconds, args.readers, args.writers, read_users, write_users, quizzes)
+        connections.close_all()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s per phase")
+    report("Throughput", results)
+    before, after = results["primary only"]["writes/s"], results["with replica"]["writes/s"]
+    if before:
+        print(f"Write throughput x{after / before:.2f} with reads on the replica")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import random
+from datetime import timedelta
+
+from django.utils.timezone import now
+
+
+def seed(users=200, quizzes=50, questions_per_quiz=10, histories=20000, seed_value=1):
+    """Bulk insert a fixed, reproducible dataset; returns the created users."""
+    from quizapp.models import Category, Question, Quiz, QuizHistory, SubCategory, User, UserAnswer
+
+    rng = random.Random(seed_value)
+    category = Category.objects.create(name="Benchmark", description="Benchmark data")
+    subcategory = SubCategory.objects.create(name="Load", category=category)
+
+    user_rows = User.objects.bulk_create([
+        User(email=f"user{i}@bench.local", username=f"user{i}", password="!") for i in range(users)
+    ])
+    quiz_rows = Quiz.objects.bulk_create([
+        Quiz(title=f"Benchmark quiz {i}", category=category, subcategory=subcategory) for i in range(quizzes)
+    ])
+    question_rows = Question.objects.bulk_create([
+        Question(quiz=quiz, text=f"Question {quiz.id}-{n}", option_a="a", option_b="b", option_c="c",
+                 option_d="d", correct_answer="ABCD"[n % 4])
+        for quiz in quiz_rows for n in range(questions_per_quiz)
+    ], batch_size=2000)
+    questions_by_quiz = {}
+    for question in question_rows:
+        questions_by_quiz.setdefault(question.quiz_id, []).append(question)
+
+    started = now() - timedelta(days=60)
+    for offset in range(0, histories, 2000):
+        batch = []
+        for i in range(offset, min(offset + 2000, histories)):
+            begin = started + timedelta(minutes=i * 3)
+            batch.append(QuizHistory(
+                user=rng.choice(user_rows), quiz=rng.choice(quiz_rows), score=rng.randint(0, 100),
+                total_questions=questions_per_quiz, correct_answers=rng.randint(0, questions_per_quiz),
+                started_at=begin, completed_at=begin + timedelta(seconds=rng.randint(60, 600)),
+            ))
+        batch = QuizHistory.objects.bulk_create(batch)
+        answers = []
+        for history in batch:
+            for question in questions_by_quiz[history.quiz_id]:
+                selected = rng.choice("ABCD")
+                answers.append(UserAnswer(history=history, question=question, selected_option=selected,
+                                          is_correct=selected == question.correct_answer))
+        UserAnswer.objects.bulk_create(answers, batch_size=5000)
+    return user_rows
@@ -0,0 +1,110 @@
+"""Building and rendering list and detail payloads: instances + JSONRenderer vs values() + orjson.
+
+The "instances" path is how the views used to work: iterate model instances,
+follow relations attribute by attribute and render with DRF's JSONRenderer.
+The "values" path is the quizapp.builders functions rendered with
+FastJSONRenderer. Both must produce identical JSON; the script checks that
+before timing anything.
+"""
+import argparse
+import json
+
+from benchmarks.harness import measure, report, setup_django
+
+
+def legacy_quiz_list(Quiz):
+    return [{
+        "id": quiz.id,
+        "title": quiz.title,
+        "category": quiz.category.name,
+        "subcategory": quiz.subcategory.name if quiz.subcategory else "",
+        "num_questions": quiz.questions.count(),
+        "time_duration": quiz.time_duration,
+    } for quiz in Quiz.objects.select_related('category', 'subcategory')]
+
+
+def legacy_history_list(QuizHistory, user, has_passed):
+    return [{
+        "id": h.id,
+        "quiz_title": h.quiz.title,
+        "percentage": h.score,
+        "passed": has_passed(h.score),
+        "total_questions": h.total_questions,
+        "correct_answers": h.correct_answers,
+        "category": h.quiz.category.name,
+        "subcategory": h.quiz.subcategory.name if h.quiz.subcategory else "",
+        "time_taken": abs(h.completed_at - h.started_at).total_seconds() if h.completed_at and h.started_at else 0,
+        "date_taken": h.completed_at.isoformat() if h.completed_at else "",
+    } for h in QuizHistory.objects.filter(user=user).select_related('quiz')]
+
+
+def legacy_answers(UserAnswer, history):
+    answers = []
+    for ans in UserAnswer.objects.filter(history=history).select_related('question').order_by('id'):
+        question = ans.question
+        answers.append({
+            "question": question.text,
+            "options": [question.option_a, question.option_b, question.option_c, question.option_d],
+            "user_answer": [ans.selected_option, getattr(question, f"option_{ans.selected_option.lower()}", "")
+                            if ans.selected_option else ""],
+            "correct_answer": [question.correct_answer,
+                               getattr(question, f"option_{question.correct_answer.lower()}", "")],
+            "is_correct": ans.is_correct,
+        })
+    return answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quizzes", type=int, default=300)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--histories", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from quizapp import renderers
+    from quizapp.builders import answer_rows, history_rows, quiz_rows
+    from quizapp.grading import has_passed
+    from quizapp.models import Quiz, QuizHistory, UserAnswer
+    from benchmarks.seed import seed
+
+    users = seed(users=20, quizzes=args.quizzes, questions_per_quiz=args.questions, histories=args.histories)
+    user = users[0]
+    history = QuizHistory.objects.filter(user=user).first()
+    slow, fast = JSONRenderer(), renderers.FastJSONRenderer()
+    if renderers.orjson is None:
+        print("orjson is not installed; FastJSONRenderer falls back to JSONRenderer")
+
+    payloads = {
+        f"quiz list ({args.quizzes} quizzes)": (
+            lambda: {"quizzes": legacy_quiz_list(Quiz)},
+            lambda: {"quizzes": quiz_rows(Quiz.objects.all())},
+        ),
+        f"history list ({QuizHistory.objects.filter(user=user).count()} attempts)": (
+            lambda: {"history": legacy_history_list(QuizHistory, user, has_passed)},
+            lambda: {"history": history_rows(QuizHistory.objects.filter(user=user))},
+        ),
+        f"history detail ({args.questions} answers)": (
+            lambda: {"answers": legacy_answers(UserAnswer, history)},
+            lambda: {"answers": answer_rows(history)},
+        ),
+    }
+
+    for title, (legacy, builder) in payloads.items():
+        old_data, new_data = legacy(), builder()
+        if json.loads(slow.render(old_data)) != json.loads(fast.render(new_data)):
+            raise SystemExit(f"{title}: the two paths disagree")
+        report(title, {
+            "build instances": measure(legacy, repeat=args.repeat),
+            "build values": measure(builder, repeat=args.repeat),
+            "render JSONRenderer": measure(lambda: slow.render(new_data), repeat=args.repeat),
+            "render orjson": measure(lambda: fast.render(new_data), repeat=args.repeat),
+            "total before": measure(lambda: slow.render(legacy()), repeat=args.repeat),
+            "total after": measure(lambda: fast.render(builder()), repeat=args.repeat),
+        })
+
+
+if __name__ == "__main__":
+    main()
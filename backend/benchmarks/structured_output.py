@@ -0,0 +1,58 @@
+"""Parse failures and retries of free-text vs schema-constrained generation.
+
+Runs the same number of single-quiz generations against the fake LLM server
+with a share of malformed free-text replies, once on the free-text path, once
+with a response schema, and once against a model that rejects schemas (so the
+client has to fall back). Counts come from the recorded GenerationCall rows.
+"""
+import argparse
+import os
+
+from benchmarks.harness import setup_django
+from loadtest.fake_llm import FakeLLMServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--malformed-rate", type=float, default=0.15)
+    parser.add_argument("--llm-latency-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    fake = FakeLLMServer(latency_ms=args.llm_latency_ms, jitter_ms=0, malformed_rate=args.malformed_rate)
+    fake.start()
+    os.environ["AI_BASE_URL"] = fake.url
+    setup_django()
+    from django.db.models import Avg, Count, Q
+    from quizapp import utils
+    from quizapp.models import GenerationCall
+
+    modes = [
+        ("free text", False, True),
+        ("schema", True, True),
+        ("fallback", True, False),
+    ]
+    print(f"{args.generations} generations, {args.malformed_rate:.0%} of free-text replies malformed")
+    print(f"  {'mode':<11}{'calls':>7}{'parse fails':>13}{'retries':>9}{'lost quizzes':>14}{'in tok/call':>13}")
+    for name, structured, schema_support in modes:
+        GenerationCall.objects.all().delete()
+        utils.AI_STRUCTURED_OUTPUT = structured
+        utils.schema_supported = True
+        fake.schema_support = schema_support
+
+        lost = 0
+        for _ in range(args.generations):
+            if utils.parse_questions(utils.generate_quiz(category="Science", subcategory="Physics",
+                                                         num_questions=5)) is None:
+                lost += 1
+
+        answered = GenerationCall.objects.filter(succeeded=True)
+        totals = answered.aggregate(calls=Count('id'), failures=Count('id', filter=Q(parsed=False)),
+                                    tokens=Avg('input_tokens'))
+        print(f"  {name:<11}{totals['calls']:>7}{totals['failures']:>13}"
+              f"{totals['calls'] - args.generations:>9}{lost:>14}{totals['tokens']:>13.1f}")
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
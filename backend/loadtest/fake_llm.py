@@ -0,0 +1,165 @@
+"""A local stand-in for the Gemini ``generateContent`` REST endpoint.
+
+It answers quiz generation prompts with well formed question arrays after a
+configurable delay and fails a configurable share of calls, using a seeded
+random generator so runs are repeatable. Free-text replies can be made
+malformed at a configurable rate; requests with a response schema always get
+clean JSON, or a 400 when schema support is switched off. Point the app at
+it with ``AI_BASE_URL=http://127.0.0.1:<port>``.
+
+    python -m loadtest.fake_llm --port 8765 --latency-ms 800 --failure-rate 0.05
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COUNT_RE = re.compile(r"Questions:\s*(\d+)")
+TOPIC_RE = re.compile(r"Topic:\s*(.+)")
+BATCH_TOPIC_RE = re.compile(r"^(t\d+): (.+) \((\d+)\)$", re.MULTILINE)
+
+
+def fake_questions(topic, count, rng):
+    return [{
+        "question": f"{topic} question {n + 1}?",
+        "options": {"A": f"{topic} A{n}", "B": f"{topic} B{n}", "C": f"{topic} C{n}", "D": f"{topic} D{n}"},
+        "correct_answer": rng.choice("ABCD"),
+        "difficulty": rng.choice(["Easy", "Medium", "Hard"]),
+    } for n in range(count)]
+
+
+class FakeLLMServer:
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=500, jitter_ms=100, failure_rate=0.0, seed=1,
+                 token_latency_ms=0.0, malformed_rate=0.0, schema_support=True):
+        self.latency_ms = latency_ms
+        self.token_latency_ms = token_latency_ms
+        self.malformed_rate = malformed_rate
+        self.schema_support = schema_support
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.malformed = 0
+        self.httpd = ThreadingHTTPServer((host, port), self.handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, payload = server.respond(self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def decide(self):
+        with self.lock:
+            self.calls += 1
+            delay = max(0, self.rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            fail = self.rng.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+            malformed = self.rng.random() < self.malformed_rate
+            seed = self.rng.random()
+        return delay, fail, malformed, random.Random(seed)
+
+    def respond(self, path, body):
+        if not path.rstrip("/").endswith(":generateContent"):
+            return 404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}}
+
+        structured = "responseSchema" in body.get("generationConfig", {})
+        if structured and not self.schema_support:
+            return 400, {"error": {"code": 400, "status": "INVALID_ARGUMENT",
+                                   "message": "response_schema is not supported for this model."}}
+
+        delay, fail, malformed, rng = self.decide()
+        time.sleep(delay)
+        if fail:
+            return 503, {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}}
+
+        prompt = " ".join(part.get("text", "") for content in body.get("contents", [])
+                          for part in content.get("parts", []))
+        batch = BATCH_TOPIC_RE.findall(prompt)
+        if batch:
+            text = json.dumps({key: fake_questions(topic, int(count), rng) for key, topic, count in batch})
+        else:
+            count = int(COUNT_RE.search(prompt).group(1)) if COUNT_RE.search(prompt) else 10
+            topic = TOPIC_RE.search(prompt).group(1).strip() if TOPIC_RE.search(prompt) else "General"
+            text = json.dumps(fake_questions(topic, count, rng))
+        if malformed and not structured:
+            # Chatty preamble and a reply cut off mid-array.
+            with self.lock:
+                self.malformed += 1
+            text = "Sure! Here are your questions:\n```json\n" + text[:len(text) * 2 // 3]
+        # Decoding time grows with the reply, like a real model.
+        time.sleep(len(text) // 4 * self.token_latency_ms / 1000)
+        return 200, {
+            "candidates": [{
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 4,
+                "candidatesTokenCount": len(text) // 4,
+                "totalTokenCount": (len(prompt) + len(text)) // 4,
+            },
+            "modelVersion": "fake-llm",
+        }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--token-latency-ms", type=float, default=0.0, help="Extra delay per output token")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of free-text replies to corrupt")
+    parser.add_argument("--no-schema", action="store_true", help="Reject requests that send a response schema")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.failure_rate, args.seed,
+                           args.token_latency_ms, args.malformed_rate, not args.no_schema)
+    print(f"Fake LLM listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
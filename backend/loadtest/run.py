@@ -0,0 +1,239 @@
+"""Repeatable load test against a local copy of the app.
+
+Starts the fake LLM server, migrates a scratch SQLite database, loads the
+seed fixture, boots the app and replays a weighted mix of user actions at
+increasing concurrency. Every stage reports throughput, latency percentiles
+and error rate per endpoint. Run from the backend directory:
+
+    python -m loadtest.run --stages 1,4,16,32 --stage-seconds 30 --llm-latency-ms 800
+
+A few seconds at low concurrency is enough to check that every endpoint in
+the mix still answers (``quizapp.tests.LoadTestSmokeTests`` does the same
+once per action against the test server):
+
+    python -m loadtest.run --stages 1 --stage-seconds 5 --llm-latency-ms 0 --llm-failure-rate 0
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from loadtest.fake_llm import FakeLLMServer
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SEED_FIXTURE = Path(__file__).resolve().parent / "fixtures" / "seed.json"
+SEED_USERS = [f"loadtest{i}@example.com" for i in range(20)]
+SEED_PASSWORD = "loadtest-pass"
+SEED_TOPICS = [
+    ("Science", "Physics"), ("Science", "Chemistry"), ("History", "Ancient"),
+    ("History", "Modern"), ("Technology", "Programming"), ("Technology", "Networks"),
+]
+
+MIX = [
+    ("list", 30),
+    ("detail", 25),
+    ("submit", 15),
+    ("history", 10),
+    ("statistics", 10),
+    ("login", 5),
+    ("create", 5),
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def manage(env, *args):
+    subprocess.run([sys.executable, "manage.py", *args], cwd=BACKEND_DIR, env=env, check=True)
+
+
+def wait_for(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f"App did not start at {url}")
+
+
+class VirtualUser:
+    def __init__(self, base_url, rng, record):
+        self.base_url = base_url
+        self.rng = rng
+        self.record = record
+        self.session = requests.Session()
+        self.quiz = None
+        self.quiz_ids = []
+
+    def call(self, name, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=120, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.record(name, (time.perf_counter() - start) * 1000, ok)
+        return response if ok else None
+
+    def login(self):
+        response = self.call("login", "POST", "/api/login/", json={
+            "email": self.rng.choice(SEED_USERS), "password": SEED_PASSWORD})
+        if response is not None:
+            self.session.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    def list(self):
+        response = self.call("list", "GET", "/api/quizzes/")
+        if response is not None:
+            self.quiz_ids = [q["id"] for q in response.json()["quizzes"]]
+
+    def detail(self):
+        if not self.quiz_ids:
+            return self.list()
+        response = self.call("detail", "GET", f"/api/quizzes/{self.rng.choice(self.quiz_ids)}/")
+        if response is not None:
+            self.quiz = response.json()
+
+    def submit(self):
+        if self.quiz is None:
+            return self.detail()
+        answers = {str(q["id"]): str(self.rng.randrange(4)) for q in self.quiz["questions"]}
+        self.call("submit", "POST", f"/api/quizzes/{self.quiz['quiz']['id']}/results/", json={
+            "userAnswers": answers,
+            "startedAt": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(time.time() - 120)),
+        })
+
+    def history(self):
+        self.call("history", "GET", "/api/history/")
+
+    def statistics(self):
+        self.call("statistics", "GET", "/api/statistics/")
+
+    def create(self):
+        category, subcategory = self.rng.choice(SEED_TOPICS)
+        self.call("create", "POST", "/api/quizzes/create/", json={
+            "category": category, "subcategory": subcategory,
+            "questionCount": self.rng.choice([5, 10]), "duration": 10})
+
+    def run(self, deadline):
+        self.login()
+        names, weights = zip(*MIX)
+        while time.monotonic() < deadline:
+            getattr(self, self.rng.choices(names, weights)[0])()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run_stage(base_url, concurrency, seconds, seed):
+    samples = []
+    lock = threading.Lock()
+
+    def record(name, latency, ok):
+        with lock:
+            samples.append((name, latency, ok))
+
+    deadline = time.monotonic() + seconds
+    threads = [
+        threading.Thread(target=VirtualUser(base_url, random.Random(seed * 1000 + i), record).run, args=(deadline,))
+        for i in range(concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    summary = {}
+    for name in [name for name, _ in MIX]:
+        latencies = sorted(latency for n, latency, _ in samples if n == name)
+        errors = sum(1 for n, _, ok in samples if n == name and not ok)
+        if not latencies:
+            continue
+        summary[name] = {
+            "requests": len(latencies),
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "error_rate": errors / len(latencies),
+        }
+    return summary
+
+
+def print_stage(concurrency, summary):
+    total = sum(row["rps"] for row in summary.values())
+    print(f"\nconcurrency={concurrency}  total throughput={total:.1f} req/s")
+    print(f"  {'endpoint':<11}{'reqs':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for name, row in summary.items():
+        print(f"  {name:<11}{row['requests']:>7}{row['rps']:>9.1f}{row['p50_ms']:>9.0f}"
+              f"{row['p95_ms']:>9.0f}{row['p99_ms']:>9.0f}{row['error_rate']:>8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", default="1,2,4,8,16", help="Comma separated concurrency levels")
+    parser.add_argument("--stage-seconds", type=float, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=0, help="App port (default: a free one)")
+    parser.add_argument("--json", help="Also write the per-stage summaries to this file")
+    args = parser.parse_args()
+
+    fake = FakeLLMServer(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms,
+                         failure_rate=args.llm_failure_rate, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix="quizgen-loadtest-")
+    port = args.port or free_port()
+    env = {
+        **os.environ,
+        "DATABASE_NAME": os.path.join(workdir, "loadtest.sqlite3"),
+        "AI_BASE_URL": fake.url,
+        "API_KEY": os.environ.get("API_KEY", "loadtest"),
+        "AI_MODEL": os.environ.get("AI_MODEL", "fake-model"),
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "loadtest-secret"),
+        "DEBUG": "False",
+    }
+
+    manage(env, "migrate", "-v", "0")
+    manage(env, "loaddata", str(SEED_FIXTURE), "-v", "0")
+    server = subprocess.Popen(
+        [sys.executable, "manage.py", "runserver", f"127.0.0.1:{port}", "--noreload"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+
+    results = {}
+    try:
+        wait_for(base_url + "/api/categories/")
+        for concurrency in [int(c) for c in args.stages.split(",")]:
+            results[concurrency] = run_stage(base_url, concurrency, args.stage_seconds, args.seed)
+            print_stage(concurrency, results[concurrency])
+    finally:
+        server.terminate()
+        server.wait()
+        fake.stop()
+
+    print(f"\nfake LLM: {fake.calls} calls, {fake.failures} injected failures")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
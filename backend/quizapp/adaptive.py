@@ -0,0 +1,120 @@
+from django.core.cache import cache
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+
+from .models import Question, QuestionRating, UserRating
+
+INITIAL_RATINGS = {"Easy": 1300.0, "Medium": 1500.0, "Hard": 1700.0}
+USER_K = 32
+QUESTION_K = 16
+# Serve questions slightly below the user's rating so the expected success
+# rate stays around 60%.
+TARGET_OFFSET = -70
+RECENT_LIMIT = 50
+CACHE_TIMEOUT = 60 * 60
+
+
+def initial_rating(difficulty):
+    return INITIAL_RATINGS.get(difficulty, INITIAL_RATINGS["Medium"])
+
+
+def expected_score(user_rating, question_rating):
+    return 1 / (1 + 10 ** ((question_rating - user_rating) / 400))
+
+
+def user_rating_cache_key(user_id):
+    return f"quizapp:adaptive:user:{user_id}"
+
+
+def recent_cache_key(user_id):
+    return f"quizapp:adaptive:recent:{user_id}"
+
+
+def served_cache_key(user_id, question_id):
+    return f"quizapp:adaptive:served:{user_id}:{question_id}"
+
+
+def claim_served(user, question_id):
+    """Consume the pending answer for a question ``next_question`` served to ``user``.
+
+    True at most once per serving, so answers can neither be graded for
+    questions that were never served nor replayed for rating changes.
+    """
+    return cache.delete(served_cache_key(user.pk, question_id))
+
+
+def get_user_rating(user):
+    rating = cache.get(user_rating_cache_key(user.pk))
+    if rating is None:
+        rating = UserRating.objects.get_or_create(user=user)[0].rating
+        cache.set(user_rating_cache_key(user.pk), rating, CACHE_TIMEOUT)
+    return rating
+
+
+def create_question_ratings(questions):
+    QuestionRating.objects.bulk_create([
+        QuestionRating(question=q, category_id=q.quiz.category_id, rating=initial_rating(q.difficulty))
+        for q in questions
+    ], ignore_conflicts=True)
+
+
+def next_question(user, category=None):
+    """Pick the unseen question rated closest above the user's target rating.
+
+    Each lookup is a single range scan over the ``(category, rating)`` index.
+    """
+    target = get_user_rating(user) + TARGET_OFFSET
+    recent = cache.get(recent_cache_key(user.pk), [])
+
+    ratings = QuestionRating.objects.exclude(question_id__in=recent)
+    if category is not None:
+        ratings = ratings.filter(category=category)
+
+    rating = (ratings.filter(rating__gte=target).order_by('rating').first()
+              or ratings.filter(rating__lt=target).order_by('-rating').first())
+    if rating is None:
+        return None
+
+    cache.set(recent_cache_key(user.pk), (recent + [rating.question_id])[-RECENT_LIMIT:], CACHE_TIMEOUT)
+    cache.set(served_cache_key(user.pk, rating.question_id), True, CACHE_TIMEOUT)
+    return Question.objects.select_related('quiz').get(pk=rating.question_id)
+
+
+def record_answers(user, results):
+    """Apply Elo updates for ``[(question_id, is_correct), ...]`` answered by ``user``.
+
+    The new ratings are worked out in Python and written with one UPDATE for
+    all questions, as relative ``CASE`` deltas so concurrent submissions on
+    the same question still add up.
+    """
+    if not results:
+        return get_user_rating(user)
+
+    user_rating = get_user_rating(user)
+    question_ratings = dict(QuestionRating.objects
+                            .filter(question_id__in=[question_id for question_id, _ in results])
+                            .values_list('question_id', 'rating'))
+
+    user_delta = 0.0
+    question_deltas, question_answers = {}, {}
+    for question_id, is_correct in results:
+        question_rating = question_ratings.get(question_id)
+        if question_rating is None:
+            continue
+        surprise = float(is_correct) - expected_score(user_rating + user_delta, question_rating)
+        user_delta += USER_K * surprise
+        question_deltas[question_id] = question_deltas.get(question_id, 0.0) - QUESTION_K * surprise
+        question_answers[question_id] = question_answers.get(question_id, 0) + 1
+
+    if question_deltas:
+        QuestionRating.objects.filter(question_id__in=question_deltas).update(
+            rating=F('rating') + Case(*[When(question_id=question_id, then=Value(delta))
+                                        for question_id, delta in question_deltas.items()],
+                                      default=Value(0.0), output_field=FloatField()),
+            answers=F('answers') + Case(*[When(question_id=question_id, then=Value(count))
+                                          for question_id, count in question_answers.items()],
+                                        default=Value(0), output_field=IntegerField()),
+        )
+
+    UserRating.objects.filter(user=user).update(rating=F('rating') + user_delta, answers=F('answers') + len(results))
+    cache.delete(user_rating_cache_key(user.pk))
+    return user_rating + user_delta
@@ -1,6 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from django.utils.timezone import now
 
 from .models import (
     User,
@@ -10,8 +14,81 @@ from .models import (
     Quiz,
     Question,
     UserAnswer,
+    QuestionStats,
+    ReviewItem,
+    GenerationDemand,
+    GenerationCall,
+    Task,
+    DailyPerformance,
 )
 from .forms import UserCreationForm, UserChangeForm
+from . import search
+
+
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+def estimate_row_count(model):
+    """The planner's row estimate on PostgreSQL; None elsewhere, where only an exact COUNT(*) is reliable."""
+    if connection.vendor != "postgresql":
+        # MAX(pk) is not a count: deleted rows (pruned tasks, archived
+        # answers) leave it far above the real number of rows.
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Use the planner's row estimate instead of COUNT(*) for large unfiltered changelists."""
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if not query.where:
+            estimate = estimate_row_count(self.object_list.model)
+            if estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class IdInputFilter(admin.SimpleListFilter):
+    """List filter rendered as an id input instead of one choice per related row."""
+
+    template = "admin/quizapp/id_input_filter.html"
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(**{self.parameter_name: value})
+        return queryset
+
+
+class UserIdFilter(IdInputFilter):
+    title = "user id"
+    parameter_name = "user_id"
+
+
+class QuizIdFilter(IdInputFilter):
+    title = "quiz id"
+    parameter_name = "quiz_id"
+
+
+class HistoryIdFilter(IdInputFilter):
+    title = "history id"
+    parameter_name = "history_id"
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class UserAdmin(BaseUserAdmin):
@@ -49,19 +126,65 @@ class SubCategoryAdmin(admin.ModelAdmin):
     list_filter = ["category"]
 
 
-class QuizAdmin(admin.ModelAdmin):
+class IndexedSearchMixin:
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term:
+            matches = search.filter_queryset(queryset, self.search_kind, search_term)
+            if matches is not None:
+                return matches, False
+        return super().get_search_results(request, queryset, search_term)
+
+
+class QuizAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    search_kind = search.QUIZ
     list_display = ["title", "category", "subcategory", "created_at"]
     search_fields = ["title", "description"]
     list_filter = ["category", "subcategory"]
 
 
-class QuestionAdmin(admin.ModelAdmin):
-    list_display = ["text", "quiz", "correct_answer"]
+class QuestionAdmin(IndexedSearchMixin, LargeTableAdmin):
+    search_kind = search.QUESTION
+    list_display = ["text", "quiz", "correct_answer", "attempts", "p_value", "error_rate", "discrimination"]
+    list_select_related = ["quiz", "stats"]
     search_fields = ["text"]
-    list_filter = ["quiz"]
+    list_filter = [QuizIdFilter]
+    raw_id_fields = ["quiz"]
+
+    def get_stat(self, obj, name):
+        stats = getattr(obj, "stats", None)
+        return getattr(stats, name) if stats else None
+
+    @admin.display(ordering="stats__attempts")
+    def attempts(self, obj):
+        return self.get_stat(obj, "attempts") or 0
+
+    @admin.display(ordering="stats__p_value", description="p-value")
+    def p_value(self, obj):
+        value = self.get_stat(obj, "p_value")
+        return round(value, 2) if value is not None else "-"
+
+    @admin.display(ordering="stats__error_rate")
+    def error_rate(self, obj):
+        value = self.get_stat(obj, "error_rate")
+        return round(value, 2) if value is not None else "-"
+
+    @admin.display(ordering="stats__discrimination")
+    def discrimination(self, obj):
+        value = self.get_stat(obj, "discrimination")
+        return round(value, 2) if value is not None else "-"
 
 
-class QuizHistoryAdmin(admin.ModelAdmin):
+class QuestionStatsAdmin(LargeTableAdmin):
+    list_display = ["question", "attempts", "correct", "picks_a", "picks_b", "picks_c", "picks_d",
+                    "p_value", "error_rate", "discrimination"]
+    list_select_related = ["question"]
+    raw_id_fields = ["question"]
+    ordering = ["discrimination"]
+
+
+class QuizHistoryAdmin(LargeTableAdmin):
     list_display = [
         "user",
         "quiz",
@@ -71,12 +194,72 @@ class QuizHistoryAdmin(admin.ModelAdmin):
         "started_at",
         "completed_at",
     ]
-    list_filter = ["quiz", "user"]
+    list_select_related = ["user", "quiz"]
+    list_filter = [QuizIdFilter, UserIdFilter]
+    raw_id_fields = ["user", "quiz"]
 
 
-class UserAnswerAdmin(admin.ModelAdmin):
+class UserAnswerAdmin(LargeTableAdmin):
     list_display = ["history", "question", "selected_option", "is_correct"]
-    list_filter = ["is_correct", "history"]
+    list_select_related = ["history", "question"]
+    list_filter = ["is_correct", HistoryIdFilter]
+    raw_id_fields = ["history", "question"]
+
+
+class GenerationDemandAdmin(admin.ModelAdmin):
+    list_display = ["category_name", "subcategory_name", "question_count", "requests", "pool_hits",
+                    "hit_rate", "last_requested_at"]
+    ordering = ["-requests"]
+
+    @admin.display(description="Hit rate")
+    def hit_rate(self, obj):
+        return f"{obj.pool_hits / obj.requests:.0%}" if obj.requests else "-"
+
+
+class GenerationCallAdmin(LargeTableAdmin):
+    list_display = ["created_at", "model", "topics", "questions_requested", "questions_returned",
+                    "estimated_input_tokens", "input_tokens", "output_tokens", "tokens_per_question",
+                    "latency_ms", "latency_per_question", "succeeded"]
+    list_filter = ["succeeded", "model"]
+    ordering = ["-created_at"]
+
+    @admin.display(description="Tokens / question")
+    def tokens_per_question(self, obj):
+        value = obj.tokens_per_question
+        return round(value, 1) if value is not None else "-"
+
+    @admin.display(description="ms / question")
+    def latency_per_question(self, obj):
+        value = obj.latency_per_question
+        return round(value) if value is not None else "-"
+
+
+class TaskAdmin(LargeTableAdmin):
+    list_display = ["name", "status", "priority", "run_at", "attempts", "max_attempts", "locked_by", "finished_at"]
+    list_filter = ["status", "name"]
+    ordering = ["-id"]
+    actions = ["requeue"]
+
+    @admin.action(description="Queue selected tasks again")
+    def requeue(self, request, queryset):
+        queryset.exclude(status=Task.RUNNING).update(
+            status=Task.QUEUED, attempts=0, run_at=now(), locked_by="", locked_at=None)
+
+
+class ReviewItemAdmin(LargeTableAdmin):
+    list_display = ["user", "question", "interval", "ease", "repetitions", "lapses", "due_at"]
+    list_select_related = ["user", "question"]
+    list_filter = [UserIdFilter]
+    raw_id_fields = ["user", "question"]
+    ordering = ["due_at"]
+
+
+class DailyPerformanceAdmin(LargeTableAdmin):
+    list_display = ["user", "category", "day", "attempts", "score_sum", "duration_sum"]
+    list_select_related = ["user", "category"]
+    list_filter = [UserIdFilter, "category"]
+    raw_id_fields = ["user"]
+    ordering = ["-day"]
 
 
 admin.site.register(User, UserAdmin)
@@ -86,6 +269,12 @@ admin.site.register(Quiz, QuizAdmin)
 admin.site.register(Question, QuestionAdmin)
 admin.site.register(QuizHistory, QuizHistoryAdmin)
 admin.site.register(UserAnswer, UserAnswerAdmin)
+admin.site.register(QuestionStats, QuestionStatsAdmin)
+admin.site.register(ReviewItem, ReviewItemAdmin)
+admin.site.register(GenerationDemand, GenerationDemandAdmin)
+admin.site.register(GenerationCall, GenerationCallAdmin)
+admin.site.register(Task, TaskAdmin)
+admin.site.register(DailyPerformance, DailyPerformanceAdmin)
 
 admin.site.unregister(Group)
 
@@ -0,0 +1,140 @@
+import math
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, When
+
+from .archive import unpack_answers
+from .models import Question, QuestionStats, QuizHistory, Task, UserAnswer
+
+PICK_FIELDS = {"A": "picks_a", "B": "picks_b", "C": "picks_c", "D": "picks_d"}
+STATS_FIELDS = [
+    "attempts", "correct", *PICK_FIELDS.values(), "score_sum", "score_sq_sum",
+    "correct_score_sum", "p_value", "error_rate", "discrimination",
+]
+
+
+def pending_submissions():
+    """Submissions queued for, but not yet counted in, QuestionStats."""
+    return Task.objects.filter(name="analytics.record_submission", status__in=[Task.QUEUED, Task.RUNNING]).count()
+
+
+def mark_counted(history_id):
+    """Flag a submission as included in QuestionStats; False if it already was.
+
+    The submission task and ``rebuild_question_stats`` both go through this
+    flag, so a submission still queued during a rebuild is not counted twice.
+    """
+    return bool(QuizHistory.objects.filter(pk=history_id, stats_counted=False).update(stats_counted=True))
+
+
+def refresh_derived(stats):
+    """Recompute p-value, error rate and point-biserial discrimination from the counters."""
+    n, k = stats.attempts, stats.correct
+    stats.p_value = k / n if n else 0
+    stats.error_rate = 1 - stats.p_value if n else 0
+    stats.discrimination = 0
+    if 0 < k < n:
+        mean = stats.score_sum / n
+        variance = stats.score_sq_sum / n - mean * mean
+        if variance > 0:
+            mean_correct = stats.correct_score_sum / k
+            mean_wrong = (stats.score_sum - stats.correct_score_sum) / (n - k)
+            stats.discrimination = ((mean_correct - mean_wrong) / math.sqrt(variance)
+                                    * math.sqrt(stats.p_value * (1 - stats.p_value)))
+    return stats
+
+
+def record_question_stats(answers, score):
+    """Add one submission's ``[(question_id, letter, is_correct), ...]`` to the counters.
+
+    Runs from the task queue after each submission and must be inside a
+    transaction: rows are locked, updated in memory and written back with a
+    single ``bulk_update``.
+    """
+    if not answers:
+        return
+    question_ids = [question_id for question_id, _, _ in answers]
+    QuestionStats.objects.bulk_create([QuestionStats(question_id=q) for q in question_ids], ignore_conflicts=True)
+    rows = QuestionStats.objects.select_for_update().in_bulk(question_ids, field_name='question_id')
+
+    for question_id, letter, is_correct in answers:
+        stats = rows[question_id]
+        stats.attempts += 1
+        stats.correct += int(is_correct)
+        setattr(stats, PICK_FIELDS[letter], getattr(stats, PICK_FIELDS[letter]) + 1)
+        stats.score_sum += score
+        stats.score_sq_sum += score * score
+        stats.correct_score_sum += score if is_correct else 0
+        refresh_derived(stats)
+
+    QuestionStats.objects.bulk_update(rows.values(), STATS_FIELDS)
+
+
+@transaction.atomic
+def rebuild_question_stats(chunk_size=2000):
+    """Recompute every counter from stored answers; runs periodically as ``analytics.rebuild``.
+
+    Reads both live ``UserAnswer`` rows (grouped in the database) and the
+    packed answers of histories stored in compact form. Submissions not yet
+    counted are locked and flagged first, so their queued
+    ``analytics.record_submission`` tasks find them counted and skip; ones
+    that commit after that are left to their own task.
+    """
+    uncounted = (QuizHistory.objects.select_for_update()
+                 .filter(completed_at__isnull=False, stats_counted=False)
+                 .values_list('pk', flat=True))
+    QuizHistory.objects.filter(pk__in=list(uncounted)).update(stats_counted=True)
+
+    rows = {}
+
+    def stats_for(question_id):
+        if question_id not in rows:
+            rows[question_id] = QuestionStats(question_id=question_id)
+        return rows[question_id]
+
+    score = F('history__score')
+    grouped = (UserAnswer.objects
+               .filter(history__stats_counted=True)
+               .values('question_id', 'selected_option')
+               .annotate(
+                   attempts=Count('pk'),
+                   correct=Count('pk', filter=Q(is_correct=True)),
+                   score_sum=Sum(score, output_field=FloatField()),
+                   score_sq_sum=Sum(score * score, output_field=FloatField()),
+                   correct_score_sum=Sum(Case(When(is_correct=True, then=score), default=0.0),
+                                         output_field=FloatField()),
+               )
+               .order_by('question_id'))
+    for row in grouped.iterator(chunk_size=chunk_size):
+        stats = stats_for(row['question_id'])
+        stats.attempts += row['attempts']
+        stats.correct += row['correct']
+        field = PICK_FIELDS.get(row['selected_option'])
+        if field:
+            setattr(stats, field, getattr(stats, field) + row['attempts'])
+        stats.score_sum += row['score_sum'] or 0
+        stats.score_sq_sum += row['score_sq_sum'] or 0
+        stats.correct_score_sum += row['correct_score_sum'] or 0
+
+    packed = (QuizHistory.objects
+                .filter(packed_answers__isnull=False, stats_counted=True)
+                .values_list('score', 'packed_answers')
+                .iterator(chunk_size=chunk_size))
+    for history_score, blob in packed:
+        for question_id, selected, correct in unpack_answers(blob):
+            if selected not in PICK_FIELDS:
+                continue
+            stats = stats_for(question_id)
+            stats.attempts += 1
+            stats.correct += int(selected == correct)
+            setattr(stats, PICK_FIELDS[selected], getattr(stats, PICK_FIELDS[selected]) + 1)
+            stats.score_sum += history_score
+            stats.score_sq_sum += history_score * history_score
+            stats.correct_score_sum += history_score if selected == correct else 0
+
+    QuestionStats.objects.all().delete()
+    question_ids = list(rows)
+    for offset in range(0, len(question_ids), chunk_size):
+        chunk = question_ids[offset:offset + chunk_size]
+        existing = Question.objects.filter(id__in=chunk).values_list('id', flat=True)
+        QuestionStats.objects.bulk_create([refresh_derived(rows[question_id]) for question_id in existing])
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class QuizappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'quizapp'
+
+    def ready(self):
+        from . import jobs, signals  # noqa: F401
@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from .models import Question, QuizHistory, UserAnswer
+
+OPTION_LETTERS = "ABCD"
+FORMAT_VERSION = 1
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def pack_bits(values, width):
+    per_byte = 8 // width
+    out = bytearray((len(values) + per_byte - 1) // per_byte)
+    for i, value in enumerate(values):
+        out[i // per_byte] |= value << (i % per_byte * width)
+    return out
+
+
+def unpack_bits(data, count, width):
+    per_byte = 8 // width
+    mask = (1 << width) - 1
+    return [(data[i // per_byte] >> (i % per_byte * width)) & mask for i in range(count)]
+
+
+def pack_answers(rows):
+    """Encode ``(question_id, selected, correct)`` rows into a compact blob.
+
+    Layout: a version byte, the row count and zigzag varint deltas of the
+    question ids, then 2 bits per selected option, 2 bits per correct
+    option and an answered bitmap. A 10-question attempt takes about 20 bytes.
+    """
+    out = bytearray([FORMAT_VERSION])
+    write_varint(out, len(rows))
+    previous = 0
+    for question_id, _, _ in rows:
+        delta = question_id - previous
+        write_varint(out, delta * 2 if delta >= 0 else -delta * 2 - 1)
+        previous = question_id
+    out += pack_bits([OPTION_LETTERS.find(selected) if selected else 0 for _, selected, _ in rows], 2)
+    out += pack_bits([OPTION_LETTERS.index(correct) for _, _, correct in rows], 2)
+    out += pack_bits([1 if selected else 0 for _, selected, _ in rows], 1)
+    return bytes(out)
+
+
+def unpack_answers(blob):
+    data = bytes(blob)
+    if data[0] != FORMAT_VERSION:
+        raise ValueError(f"Unknown packed answer format {data[0]}")
+    count, pos = read_varint(data, 1)
+    question_ids, previous = [], 0
+    for _ in range(count):
+        value, pos = read_varint(data, pos)
+        previous += value // 2 if value % 2 == 0 else -(value + 1) // 2
+        question_ids.append(previous)
+
+    option_bytes = (count + 3) // 4
+    selected = unpack_bits(data[pos:pos + option_bytes], count, 2)
+    correct = unpack_bits(data[pos + option_bytes:pos + 2 * option_bytes], count, 2)
+    answered = unpack_bits(data[pos + 2 * option_bytes:], count, 1)
+    for question_id, sel, cor, has_answer in zip(question_ids, selected, correct, answered):
+        yield question_id, OPTION_LETTERS[sel] if has_answer else "", OPTION_LETTERS[cor]
+
+
+def history_answer_values(history):
+    """Return the answers of a history whether they live in rows or in the packed blob.
+
+    Reads with ``values_list`` and no model instances, returning
+    ``(text, options, selected, correct, is_correct)`` tuples, where
+    ``options`` lists the four option texts in A-D order.
+    """
+    if history.packed_answers is None:
+        rows = (UserAnswer.objects
+                .filter(history=history)
+                .order_by('id')
+                .values_list('question__text', 'question__option_a', 'question__option_b', 'question__option_c',
+                             'question__option_d', 'selected_option', 'question__correct_answer', 'is_correct'))
+        return [(text, [a, b, c, d], selected, correct, is_correct)
+                for text, a, b, c, d, selected, correct, is_correct in rows]
+
+    unpacked = [row for row in unpack_answers(history.packed_answers) if row[1]]
+    questions = {
+        question_id: (text, [a, b, c, d])
+        for question_id, text, a, b, c, d in (Question.objects
+                                               .filter(id__in=[question_id for question_id, _, _ in unpacked])
+                                               .values_list('id', 'text', 'option_a', 'option_b', 'option_c', 'option_d'))
+    }
+    return [
+        (*questions[question_id], selected, correct, selected == correct)
+        for question_id, selected, correct in unpacked
+        if question_id in questions
+    ]
+
+
+def archive_histories(days, batch_size=500):
+    """Move answers of histories completed more than ``days`` ago into packed blobs.
+
+    Works through id-ordered batches, each in its own transaction, deleting
+    the raw ``UserAnswer`` rows once their blob is stored.
+    """
+    cutoff = now() - timedelta(days=days)
+    pending = QuizHistory.objects.filter(completed_at__lt=cutoff, packed_answers__isnull=True).order_by('id')
+    last_id, archived = 0, 0
+    while True:
+        history_ids = list(pending.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not history_ids:
+            return archived
+        archive_batch(history_ids)
+        archived += len(history_ids)
+        last_id = history_ids[-1]
+
+
+@transaction.atomic
+def archive_batch(history_ids):
+    rows = {history_id: [] for history_id in history_ids}
+    answers = (UserAnswer.objects
+               .filter(history_id__in=history_ids)
+               .order_by('history_id', 'id')
+               .values_list('history_id', 'question_id', 'selected_option', 'question__correct_answer'))
+    for history_id, question_id, selected, correct in answers:
+        rows[history_id].append((question_id, selected, correct))
+
+    histories = [QuizHistory(id=history_id, packed_answers=pack_answers(answer_rows))
+                 for history_id, answer_rows in rows.items()]
+    QuizHistory.objects.bulk_update(histories, ["packed_answers"])
+    UserAnswer.objects.filter(history_id__in=history_ids).delete()
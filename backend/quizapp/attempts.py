@@ -0,0 +1,209 @@
+"""Server-side quiz attempts with autosave.
+
+An attempt is a ``QuizHistory`` whose ``completed_at`` is still empty.
+``start_attempt`` stamps ``started_at`` with the server clock. ``autosave``
+merges answers into a draft kept in the cache, under a per-attempt
+``cache.add`` lock so concurrent saves do not drop each other's answers,
+and writes the draft to the row's ``draft_answers`` at most every
+``ATTEMPT_FLUSH_SECONDS``, so a burst of answer changes costs one UPDATE.
+``finalize_attempt`` grades the draft plus whatever the submit carries and
+closes the attempt; attempts nobody submits are finalized by a periodic
+task once their time is up. Drafts only span worker processes when the
+cache is shared; otherwise the row copy is the fallback and the submit
+should carry the full answer set.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.timezone import now
+
+from .grading import (
+    OPTION_LETTERS, UNANSWERED, apply_grade, get_answer_key, grade_submission, parse_selection, record_results,
+)
+from .models import QuizHistory
+
+DRAFT_TIMEOUT = 24 * 60 * 60
+DRAFT_LOCK_TIMEOUT = 10
+DRAFT_LOCK_POLL_INTERVAL = 0.02
+
+
+class AttemptClosed(Exception):
+    pass
+
+
+def draft_key(history_id):
+    return f"quizapp:attempt:{history_id}"
+
+
+def draft_lock_key(history_id):
+    return f"quizapp:attempt-lock:{history_id}"
+
+
+def open_attempts():
+    return QuizHistory.objects.filter(completed_at__isnull=True)
+
+
+def deadline(started_at, time_duration):
+    return started_at + timedelta(minutes=time_duration)
+
+
+def closes_at(started_at, time_duration):
+    """Last moment answers are accepted: the deadline plus a grace period for slow networks."""
+    return deadline(started_at, time_duration) + timedelta(seconds=settings.ATTEMPT_GRACE_SECONDS)
+
+
+def start_attempt(user, quiz):
+    """Return ``(history, created)``: the user's running attempt at ``quiz``, or a new one."""
+    current = open_attempts().filter(user=user, quiz=quiz).order_by('-started_at').first()
+    if current is not None and now() < closes_at(current.started_at, quiz.time_duration):
+        return current, False
+    question_ids, _ = get_answer_key(quiz.id)
+    history = QuizHistory.objects.create(
+        user=user, quiz=quiz, started_at=now(), total_questions=len(question_ids), draft_answers={})
+    return history, True
+
+
+def load_draft(history_id, user):
+    """Return the cached draft of ``user``'s open attempt, reading the row on a cache miss."""
+    draft = cache.get(draft_key(history_id))
+    if draft is None:
+        row = (open_attempts()
+               .filter(pk=history_id)
+               .values('user_id', 'quiz_id', 'started_at', 'quiz__time_duration', 'draft_answers')
+               .first())
+        if row is None:
+            return None
+        draft = {
+            "user_id": row["user_id"],
+            "quiz_id": row["quiz_id"],
+            "started_at": row["started_at"],
+            "time_duration": row["quiz__time_duration"],
+            "answers": row["draft_answers"] or {},
+            "flushed_at": time.time(),
+        }
+    return draft if draft["user_id"] == user.pk else None
+
+
+def saved_answers(history_id, user):
+    draft = load_draft(history_id, user)
+    return draft["answers"] if draft else {}
+
+
+@contextmanager
+def draft_lock(history_id):
+    """Hold the per-attempt lock so concurrent saves merge into the draft one at a time.
+
+    The lock expires after ``DRAFT_LOCK_TIMEOUT`` in case its holder dies.
+    """
+    key = draft_lock_key(history_id)
+    token = uuid.uuid4().hex
+    while not cache.add(key, token, DRAFT_LOCK_TIMEOUT):
+        time.sleep(DRAFT_LOCK_POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+def autosave(history_id, user, answers):
+    """Merge ``{question_id: option}`` into an open attempt's draft and return all saved answers.
+
+    Returns None when ``user`` has no open attempt ``history_id``; raises
+    AttemptClosed once the attempt no longer takes answers. An option the
+    grader does not understand clears that question's answer.
+    """
+    with draft_lock(history_id):
+        draft = load_draft(history_id, user)
+        if draft is None:
+            return None
+        if now() >= closes_at(draft["started_at"], draft["time_duration"]):
+            raise AttemptClosed("Time is up for this attempt")
+
+        question_ids, _ = get_answer_key(draft["quiz_id"])
+        known = set(map(str, question_ids))
+        for question_id, value in answers.items():
+            question_id = str(question_id)
+            if question_id not in known:
+                continue
+            selected = parse_selection(value)
+            if selected == UNANSWERED:
+                draft["answers"].pop(question_id, None)
+            else:
+                draft["answers"][question_id] = OPTION_LETTERS[selected]
+
+        if time.time() - draft["flushed_at"] >= settings.ATTEMPT_FLUSH_SECONDS:
+            if not open_attempts().filter(pk=history_id).update(draft_answers=draft["answers"]):
+                # Finalized by another request in the meantime.
+                cache.delete(draft_key(history_id))
+                raise AttemptClosed("This attempt was already submitted")
+            draft["flushed_at"] = time.time()
+        cache.set(draft_key(history_id), draft, DRAFT_TIMEOUT)
+        return draft["answers"]
+
+
+@transaction.atomic
+def finalize_attempt(history_id, user=None, answers=None):
+    """Grade and close an attempt; returns ``(history, created)``.
+
+    Returns ``(None, False)`` if there is no such attempt (for ``user``), and
+    the stored history with False if it was already finalized. Answers sent
+    after the attempt closed are ignored, and ``completed_at`` never runs past
+    the closing time.
+    """
+    histories = QuizHistory.objects.select_for_update(of=('self',)).select_related('user', 'quiz')
+    if user is not None:
+        histories = histories.filter(user=user)
+    history = histories.filter(pk=history_id).first()
+    if history is None or history.completed_at is not None:
+        return history, False
+
+    submitted_at = now()
+    closing = closes_at(history.started_at, history.quiz.time_duration)
+    merged = dict(history.draft_answers or {})
+    draft = cache.get(draft_key(history_id))
+    if draft is not None:
+        merged.update(draft["answers"])
+    if answers and submitted_at < closing:
+        merged.update({str(question_id): value for question_id, value in answers.items()})
+
+    graded = grade_submission(history.quiz_id, merged)
+    apply_grade(history, graded)
+    history.completed_at = min(submitted_at, closing)
+    history.draft_answers = None
+    history.save()
+    record_results(history, graded)
+    transaction.on_commit(lambda: cache.delete(draft_key(history_id)))
+    return history, True
+
+
+def finalize_expired():
+    """Submit every open attempt whose time ran out with the answers saved so far."""
+    cutoff = now() - timedelta(seconds=settings.ATTEMPT_GRACE_SECONDS)
+    finalized = 0
+    expired = list(open_attempts()
+                   .filter(started_at__lt=cutoff)
+                   .values_list('id', 'started_at', 'quiz__time_duration'))
+    for history_id, started_at, time_duration in expired:
+        if now() >= closes_at(started_at, time_duration):
+            _, created = finalize_attempt(history_id)
+            finalized += created
+    return finalized
+
+
+def attempt_state(history, answers, created=False):
+    ends_at = deadline(history.started_at, history.quiz.time_duration)
+    return {
+        "attempt_id": history.id,
+        "quiz_id": history.quiz_id,
+        "started_at": history.started_at.isoformat(),
+        "deadline": ends_at.isoformat(),
+        "remaining_seconds": max(0, round((ends_at - now()).total_seconds())),
+        "answers": answers,
+        "created": created,
+    }
@@ -0,0 +1,98 @@
+"""Avatar thumbnails.
+
+Uploads are stored as-is on ``User.avatar``; saving a user whose avatar
+changed queues ``avatars.resize``, which crops the image to a square and
+writes one WebP per size in ``SIZES`` under a name derived from its content
+hash. ``User.avatar_thumbnails`` records which upload the thumbnails belong
+to and where they are. Because a thumbnail's name changes whenever its
+bytes do, ``avatar_view`` can serve them with a year-long immutable cache
+lifetime.
+"""
+import hashlib
+import io
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import User
+
+SIZES = (64, 256)
+DEFAULT_AVATAR = "avatars/default.svg"
+THUMBNAIL_DIR = "avatars/thumbs"
+THUMBNAIL_NAME_RE = re.compile(r"^[0-9a-f]{16}-\d+\.webp$")
+WEBP_QUALITY = 85
+
+
+class InvalidAvatar(ValueError):
+    pass
+
+
+def validate_upload(upload):
+    """Reject files that are too large or that Pillow cannot read, without decoding the pixels."""
+    if upload.size > settings.AVATAR_MAX_UPLOAD_BYTES:
+        raise InvalidAvatar(f"Avatar must be at most {settings.AVATAR_MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    try:
+        with Image.open(upload) as image:
+            image.verify()
+            width, height = image.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise InvalidAvatar("Avatar must be a PNG, JPEG, GIF or WebP image")
+    finally:
+        upload.seek(0)
+    if width * height > settings.AVATAR_MAX_PIXELS:
+        raise InvalidAvatar("Avatar image dimensions are too large")
+
+
+def needs_thumbnails(user):
+    name = user.avatar.name
+    return bool(name) and name != DEFAULT_AVATAR and (user.avatar_thumbnails or {}).get("source") != name
+
+
+def render_thumbnail(image, size):
+    thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    thumbnail.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+    return out.getvalue()
+
+
+def create_thumbnails(name):
+    """Write the thumbnails of the stored image ``name``; returns ``{size: storage name}``."""
+    with default_storage.open(name) as source, Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        files = {}
+        for size in SIZES:
+            data = render_thumbnail(image, size)
+            thumbnail_name = f"{THUMBNAIL_DIR}/{hashlib.sha256(data).hexdigest()[:16]}-{size}.webp"
+            if not default_storage.exists(thumbnail_name):
+                default_storage.save(thumbnail_name, ContentFile(data))
+            files[str(size)] = thumbnail_name
+    return files
+
+
+def resize_avatar(user_id, name):
+    """Make thumbnails for upload ``name`` unless the user has replaced it since."""
+    if not User.objects.filter(pk=user_id, avatar=name).exists():
+        return
+    files = create_thumbnails(name)
+    User.objects.filter(pk=user_id, avatar=name).update(avatar_thumbnails={"source": name, "files": files})
+
+
+def thumbnail_urls(user):
+    """``{size: url}`` of the user's current thumbnails, empty while they are still being made."""
+    thumbnails = user.avatar_thumbnails or {}
+    if thumbnails.get("source") != user.avatar.name:
+        return {}
+    return {size: reverse("avatar", args=[name.rsplit("/", 1)[-1]]) for size, name in thumbnails["files"].items()}
+
+
+def avatar_url(user, size=max(SIZES)):
+    """The thumbnail URL for ``size``, or the original upload until thumbnails exist."""
+    url = thumbnail_urls(user).get(str(size))
+    if url:
+        return url
+    return user.avatar.url if user.avatar else f"/{DEFAULT_AVATAR}"
@@ -0,0 +1,82 @@
+"""Response dicts for read-only listings, built from ``values()`` rows.
+
+Each builder fetches just the columns its payload needs in one query and
+turns the rows into the same dicts the views used to assemble from model
+instances, without instantiating models or following relations one by one.
+"""
+from django.db.models import Count
+
+from .archive import OPTION_LETTERS, history_answer_values
+from .grading import has_passed
+from .models import Question
+
+
+def quiz_rows(quizzes):
+    rows = (quizzes
+            .annotate(num_questions=Count('questions'))
+            .values('id', 'title', 'category__name', 'subcategory__name', 'num_questions', 'time_duration'))
+    return [{
+        "id": row["id"],
+        "title": row["title"],
+        "category": row["category__name"],
+        "subcategory": row["subcategory__name"] or "",
+        "num_questions": row["num_questions"],
+        "time_duration": row["time_duration"],
+    } for row in rows]
+
+
+def question_rows(quiz_id):
+    rows = (Question.objects
+            .filter(quiz_id=quiz_id)
+            .order_by('id')
+            .values_list('id', 'text', 'option_a', 'option_b', 'option_c', 'option_d', 'difficulty'))
+    return [{
+        "id": question_id,
+        "text": text,
+        "options": [a, b, c, d],
+        "difficulty": difficulty,
+    } for question_id, text, a, b, c, d, difficulty in rows]
+
+
+def time_taken(started_at, completed_at):
+    return abs(completed_at - started_at).total_seconds() if completed_at and started_at else 0
+
+
+def history_rows(histories):
+    rows = histories.values('id', 'quiz__title', 'quiz__category__name', 'quiz__subcategory__name', 'score',
+                            'total_questions', 'correct_answers', 'started_at', 'completed_at')
+    return [{
+        "id": row["id"],
+        "quiz_title": row["quiz__title"],
+        "percentage": row["score"],
+        "passed": has_passed(row["score"]),
+        "total_questions": row["total_questions"],
+        "correct_answers": row["correct_answers"],
+        "category": row["quiz__category__name"],
+        "subcategory": row["quiz__subcategory__name"] or "",
+        "time_taken": time_taken(row["started_at"], row["completed_at"]),
+        "date_taken": row["completed_at"].isoformat() if row["completed_at"] else "",
+    } for row in rows]
+
+
+def option_text(options, letter):
+    return options[OPTION_LETTERS.index(letter)] if letter and letter in OPTION_LETTERS else ""
+
+
+def answer_rows(history):
+    return [{
+        "question": text,
+        "options": options,
+        "user_answer": [selected, option_text(options, selected)],
+        "correct_answer": [correct, option_text(options, correct)],
+        "is_correct": is_correct,
+    } for text, options, selected, correct, is_correct in history_answer_values(history)]
+
+
+def result_answer_rows(history):
+    return [{
+        "question": text,
+        "selected_option": option_text(options, selected),
+        "correct_option": option_text(options, correct),
+        "is_correct": is_correct,
+    } for text, options, selected, correct, is_correct in history_answer_values(history)]
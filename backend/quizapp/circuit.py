@@ -0,0 +1,117 @@
+"""Circuit breaker around the LLM provider.
+
+Outcomes are counted in fixed time buckets in the cache; a call that errors
+or takes longer than ``CIRCUIT_SLOW_CALL_MS`` counts as a failure. Once a
+bucket has ``CIRCUIT_MIN_CALLS`` calls and the failure share reaches
+``CIRCUIT_FAILURE_RATE`` the circuit opens and calls fail fast. After
+``CIRCUIT_COOLDOWN_SECONDS`` one caller is let through as a half-open probe:
+its success closes the circuit, its failure opens it again.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Circuit open, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name):
+        self.name = name
+
+    def key(self, *parts):
+        return ":".join(["quizapp:circuit", self.name, *map(str, parts)])
+
+    def bucket(self, now):
+        return int(now // settings.CIRCUIT_WINDOW_SECONDS)
+
+    def retry_after(self, opened_at, now):
+        return max(1, math.ceil(opened_at + settings.CIRCUIT_COOLDOWN_SECONDS - now))
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go through now; returns True for a half-open probe."""
+        now = time.time()
+        opened_at = cache.get(self.key("opened_at"))
+        if opened_at is None:
+            return False
+        if now - opened_at < settings.CIRCUIT_COOLDOWN_SECONDS:
+            raise CircuitOpen(self.retry_after(opened_at, now))
+        # Cooldown over: exactly one caller gets to probe the provider.
+        if cache.add(self.key("probe"), 1, settings.CIRCUIT_COOLDOWN_SECONDS):
+            return True
+        raise CircuitOpen(settings.CIRCUIT_COOLDOWN_SECONDS)
+
+    def record(self, ok, latency_ms, probe=False):
+        failed = not ok or latency_ms > settings.CIRCUIT_SLOW_CALL_MS
+        if probe:
+            cache.delete(self.key("probe"))
+            if failed:
+                self.open()
+            else:
+                self.close()
+            return
+
+        bucket = self.bucket(time.time())
+        calls = self.increment(self.key("calls", bucket))
+        failures = self.increment(self.key("failures", bucket)) if failed else cache.get(self.key("failures", bucket), 0)
+        if failed and calls >= settings.CIRCUIT_MIN_CALLS and failures / calls >= settings.CIRCUIT_FAILURE_RATE:
+            self.open()
+
+    def increment(self, key):
+        try:
+            return cache.incr(key)
+        except ValueError:
+            if cache.add(key, 1, 2 * settings.CIRCUIT_WINDOW_SECONDS):
+                return 1
+            return cache.incr(key)
+
+    def open(self):
+        cache.set(self.key("opened_at"), time.time(), None)
+
+    def close(self):
+        bucket = self.bucket(time.time())
+        cache.delete_many([self.key("opened_at"), self.key("calls", bucket), self.key("failures", bucket)])
+
+    def call(self, func):
+        """Run ``func`` through the breaker, timing it and recording the outcome."""
+        probe = self.before_call()
+        started = time.perf_counter()
+        try:
+            result = func()
+        except Exception:
+            self.record(False, (time.perf_counter() - started) * 1000, probe)
+            raise
+        self.record(True, (time.perf_counter() - started) * 1000, probe)
+        return result
+
+    def status(self):
+        now = time.time()
+        bucket = self.bucket(now)
+        values = cache.get_many([self.key("opened_at"), self.key("probe"),
+                                 self.key("calls", bucket), self.key("failures", bucket)])
+        opened_at = values.get(self.key("opened_at"))
+        calls = values.get(self.key("calls", bucket), 0)
+        failures = values.get(self.key("failures", bucket), 0)
+        if opened_at is None:
+            state = CLOSED
+        elif now - opened_at >= settings.CIRCUIT_COOLDOWN_SECONDS or self.key("probe") in values:
+            state = HALF_OPEN
+        else:
+            state = OPEN
+        return {
+            "state": state,
+            "calls": calls,
+            "failures": failures,
+            "failure_rate": round(failures / calls, 3) if calls else 0.0,
+            "retry_after": self.retry_after(opened_at, now) if state == OPEN else 0,
+        }
+
+
+llm_breaker = CircuitBreaker("llm")
@@ -0,0 +1,143 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from .adaptive import record_answers
+from .archive import OPTION_LETTERS, pack_answers
+from .leaderboard import record_attempt
+from .models import Question, QuizHistory, UserAnswer
+from .review import record_reviews
+from .tasks import enqueue
+from .trends import record_daily
+
+UNANSWERED = 255
+PASS_PERCENTAGE = 50
+ANSWER_KEY_TIMEOUT = 60 * 60
+
+
+def answer_key_cache_key(quiz_id):
+    return f"quizapp:answer-key:{quiz_id}"
+
+
+def get_answer_key(quiz_id):
+    """Return ``(question_ids, correct_indices)`` for a quiz.
+
+    The key is cached as a tuple of ids plus a ``bytes`` object holding one
+    answer index per question, which keeps the cached value small.
+    """
+    key = cache.get(answer_key_cache_key(quiz_id))
+    if key is None:
+        rows = Question.objects.filter(quiz_id=quiz_id).order_by('id').values_list('id', 'correct_answer')
+        key = (
+            tuple(question_id for question_id, _ in rows),
+            bytes(OPTION_LETTERS.index(answer) for _, answer in rows),
+        )
+        cache.set(answer_key_cache_key(quiz_id), key, ANSWER_KEY_TIMEOUT)
+    return key
+
+
+def invalidate_answer_key(quiz_id):
+    cache.delete(answer_key_cache_key(quiz_id))
+
+
+def has_passed(score):
+    """Whether a percentage ``score`` (as stored on QuizHistory) is a pass."""
+    return score >= PASS_PERCENTAGE
+
+
+def parse_selection(value):
+    try:
+        index = int(value)
+    except (TypeError, ValueError):
+        if isinstance(value, str) and len(value) == 1 and value.upper() in OPTION_LETTERS:
+            return OPTION_LETTERS.index(value.upper())
+        return UNANSWERED
+    return index if 0 <= index < len(OPTION_LETTERS) else UNANSWERED
+
+
+class GradedSubmission:
+    def __init__(self, question_ids, selected, correct):
+        self.question_ids = question_ids
+        self.selected = selected
+        self.correct = correct
+        self.results = bytes(s == c for s, c in zip(selected, correct))
+        self.total_questions = len(question_ids)
+        self.correct_answers = sum(self.results)
+        self.score = round(self.correct_answers * 100 / self.total_questions) if self.total_questions else 0
+
+    def answered(self):
+        for question_id, selected, is_correct in zip(self.question_ids, self.selected, self.results):
+            if selected != UNANSWERED:
+                yield question_id, selected, bool(is_correct)
+
+
+def grade_submission(quiz_id, user_answers):
+    """Grade ``{question_id: option_index}`` against the cached answer key in one pass."""
+    question_ids, correct = get_answer_key(quiz_id)
+    answers = {str(k): v for k, v in (user_answers or {}).items()}
+    selected = bytes(parse_selection(answers.get(str(question_id))) for question_id in question_ids)
+    return GradedSubmission(question_ids, selected, correct)
+
+
+def submitted_answers(graded):
+    return [
+        (question_id, OPTION_LETTERS[selected], is_correct)
+        for question_id, selected, is_correct in graded.answered()
+    ]
+
+
+def apply_grade(history, graded):
+    """Copy a graded submission onto ``history``, packing the answers if configured."""
+    history.score = graded.score
+    history.total_questions = graded.total_questions
+    history.correct_answers = graded.correct_answers
+    if settings.ANSWER_STORAGE == "packed":
+        history.packed_answers = pack_answers([
+            (question_id, OPTION_LETTERS[selected] if selected != UNANSWERED else "", OPTION_LETTERS[correct])
+            for question_id, selected, correct in zip(graded.question_ids, graded.selected, graded.correct)
+        ])
+
+
+def record_results(history, graded):
+    """Write answer rows (unless packed) and feed every derived table for a stored attempt."""
+    answers = submitted_answers(graded)
+    if history.packed_answers is None:
+        UserAnswer.objects.bulk_create([
+            UserAnswer(history=history, question_id=question_id, selected_option=letter, is_correct=is_correct)
+            for question_id, letter, is_correct in answers
+        ])
+    enqueue("analytics.record_submission", {"answers": answers, "score": graded.score, "history_id": history.pk})
+    record_attempt(history)
+    record_daily(history)
+    results = [(question_id, is_correct) for question_id, _, is_correct in answers]
+    record_answers(history.user, results)
+    record_reviews(history.user, results, history.completed_at)
+
+
+@transaction.atomic
+def save_submission(user, quiz, graded, started_at, completed_at, idempotency_key=None):
+    """Store a graded attempt and feed every derived table.
+
+    Returns ``(history, created)``. With an ``idempotency_key`` a replayed
+    submission hits the unique index on insert and gets the original history
+    back instead of writing a second copy.
+    """
+    history = QuizHistory(
+        user=user,
+        quiz=quiz,
+        completed_at=completed_at,
+        started_at=started_at,
+        idempotency_key=idempotency_key,
+    )
+    apply_grade(history, graded)
+    if idempotency_key is None:
+        history.save()
+    else:
+        try:
+            with transaction.atomic():
+                history.save()
+        except IntegrityError:
+            return QuizHistory.objects.get(user=user, idempotency_key=idempotency_key), False
+
+    record_results(history, graded)
+    return history, True
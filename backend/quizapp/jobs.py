@@ -0,0 +1,58 @@
+"""Deferred work that runs on the task queue (see ``tasks.py``)."""
+from django.conf import settings
+from django.db import transaction
+
+from . import analytics, archive, attempts, avatars, leaderboard, pool, tasks
+from .models import GenerationDemand
+from .tasks import task
+
+
+@task("pool.refill_topic", priority=10)
+def refill_topic(demand_id):
+    demand = GenerationDemand.objects.filter(pk=demand_id).first()
+    if demand is not None:
+        pool.refill_topic(demand)
+
+
+@task("pool.refill")
+def refill_pool():
+    pool.expire_stale()
+    pool.refill_pool()
+
+
+@task("analytics.record_submission", priority=5, max_attempts=5)
+def record_submission_stats(answers, score, history_id=None):
+    with transaction.atomic():
+        if history_id is not None and not analytics.mark_counted(history_id):
+            return  # Already counted by a rebuild.
+        analytics.record_question_stats([tuple(answer) for answer in answers], score)
+
+
+@task("analytics.rebuild")
+def rebuild_question_stats():
+    analytics.rebuild_question_stats()
+
+
+@task("leaderboard.compact")
+def compact_leaderboards():
+    leaderboard.compact_rolling_boards()
+
+
+@task("archive.answers")
+def archive_answers(days=None):
+    archive.archive_histories(settings.ANSWER_ARCHIVE_DAYS if days is None else days)
+
+
+@task("attempts.finalize_expired")
+def finalize_expired_attempts():
+    attempts.finalize_expired()
+
+
+@task("tasks.prune")
+def prune_tasks():
+    tasks.prune_finished()
+
+
+@task("avatars.resize", priority=3)
+def resize_avatar(user_id, name):
+    avatars.resize_avatar(user_id, name)
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Greatest
+from django.utils.timezone import now
+
+from .models import LeaderboardEntry, QuizHistory
+
+WINDOWS = {"7d": 7, "30d": 30}
+
+
+def board_name(scope, scope_id=None, window=None):
+    name = scope if scope_id is None else f"{scope}:{scope_id}"
+    return f"{name}:{window}" if window else name
+
+
+def boards_for(quiz):
+    boards = [board_name("global"), board_name("category", quiz.category_id), board_name("quiz", quiz.id)]
+    for window in WINDOWS:
+        boards.append(board_name("global", window=window))
+        boards.append(board_name("category", quiz.category_id, window))
+    return boards
+
+
+def ranking_field(board):
+    # Quiz boards rank by best attempt, everything else by accumulated score.
+    return "best_score" if board.startswith("quiz:") else "points"
+
+
+def record_attempt(history):
+    """Add a finished attempt to every board it counts towards (two queries)."""
+    boards = boards_for(history.quiz)
+    LeaderboardEntry.objects.bulk_create(
+        [LeaderboardEntry(board=board, user_id=history.user_id) for board in boards],
+        ignore_conflicts=True,
+    )
+    LeaderboardEntry.objects.filter(board__in=boards, user_id=history.user_id).update(
+        points=F('points') + history.score,
+        best_score=Greatest(F('best_score'), history.score),
+        attempts=F('attempts') + 1,
+    )
+
+
+def top(board, limit=10):
+    field = ranking_field(board)
+    return (LeaderboardEntry.objects
+            .filter(board=board)
+            .select_related('user')
+            .order_by(f"-{field}", 'user_id')[:limit])
+
+
+def rank_of(board, user):
+    """Return ``(rank, entry)`` of ``user`` on ``board``, or ``(None, None)`` if they have no entry.
+
+    The rank is counted from the ``(board, -field)`` index on every call, so
+    it costs O(rank) index entries rather than O(1). Storing ranks would
+    mean rewriting every entry behind a user on each submission instead.
+    """
+    entry = LeaderboardEntry.objects.filter(board=board, user=user).first()
+    if entry is None:
+        return None, None
+    field = ranking_field(board)
+    ahead = LeaderboardEntry.objects.filter(board=board, **{f"{field}__gt": getattr(entry, field)}).count()
+    return ahead + 1, entry
+
+
+def rebuild_board(board, histories):
+    rows = (histories
+            .values('user_id')
+            .annotate(points=Sum('score'), best_score=Max('score'), attempts=Count('pk'))
+            .order_by())
+    LeaderboardEntry.objects.filter(board=board).delete()
+    LeaderboardEntry.objects.bulk_create([LeaderboardEntry(board=board, **row) for row in rows], batch_size=1000)
+
+
+@transaction.atomic
+def compact_rolling_boards():
+    """Rebuild the 7/30 day boards so attempts that left the window drop out."""
+    finished = QuizHistory.objects.filter(completed_at__isnull=False)
+    for window, days in WINDOWS.items():
+        recent = finished.filter(completed_at__gte=now() - timedelta(days=days))
+        rebuild_board(board_name("global", window=window), recent)
+        LeaderboardEntry.objects.filter(board__startswith="category:", board__endswith=f":{window}").delete()
+        for category_id in recent.values_list('quiz__category_id', flat=True).distinct():
+            rebuild_board(board_name("category", category_id, window), recent.filter(quiz__category_id=category_id))
+
+
+@transaction.atomic
+def rebuild_all_boards():
+    finished = QuizHistory.objects.filter(completed_at__isnull=False)
+    LeaderboardEntry.objects.all().delete()
+    rebuild_board(board_name("global"), finished)
+    for category_id in finished.values_list('quiz__category_id', flat=True).distinct():
+        rebuild_board(board_name("category", category_id), finished.filter(quiz__category_id=category_id))
+    for quiz_id in finished.values_list('quiz_id', flat=True).distinct():
+        rebuild_board(board_name("quiz", quiz_id), finished.filter(quiz_id=quiz_id))
+    compact_rolling_boards()
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quizapp.archive import archive_histories
+
+
+class Command(BaseCommand):
+    help = "Pack answers of old attempts into their QuizHistory row and delete the UserAnswer rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.ANSWER_ARCHIVE_DAYS,
+                            help="Archive attempts completed more than N days ago; 0 packs every finished attempt")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        archived = archive_histories(options["days"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived answers of {archived} attempts"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from quizapp.transfer import backfill_content_hashes
+
+
+class Command(BaseCommand):
+    help = "Compute content hashes for quizzes created before they were recorded"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        updated = backfill_content_hashes(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Hashed {updated} quizzes"))
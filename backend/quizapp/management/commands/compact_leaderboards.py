@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from quizapp.leaderboard import compact_rolling_boards, rebuild_all_boards
+
+
+class Command(BaseCommand):
+    help = "Expire old attempts from the rolling leaderboards, or rebuild every board with --full"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild all boards from QuizHistory")
+
+    def handle(self, *args, **options):
+        if options["full"]:
+            rebuild_all_boards()
+        else:
+            compact_rolling_boards()
+        self.stdout.write(self.style.SUCCESS("Leaderboards compacted"))
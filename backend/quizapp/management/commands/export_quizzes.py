@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from quizapp.models import Quiz
+from quizapp.transfer import DEFAULT_CHUNK_SIZE, iter_export_lines, iter_gzip
+
+
+class Command(BaseCommand):
+    help = "Stream quizzes and their questions out as JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", nargs="?", default="-",
+                            help="Output file, '-' for stdout. A .gz suffix enables gzip.")
+        parser.add_argument("--gzip", action="store_true", help="Force gzip compression")
+        parser.add_argument("--category", help="Only export quizzes of this category")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = Quiz.objects.all()
+        if options["category"]:
+            queryset = queryset.filter(category__name=options["category"])
+
+        lines = iter_export_lines(queryset, chunk_size=options["chunk_size"])
+        output = options["output"]
+        compress = options["gzip"] or output.endswith(".gz")
+
+        if output == "-":
+            stream = sys.stdout.buffer
+            self.write(stream, lines, compress)
+        else:
+            with open(output, "wb") as stream:
+                self.write(stream, lines, compress)
+
+    def write(self, stream, lines, compress):
+        if compress:
+            for chunk in iter_gzip(lines):
+                stream.write(chunk)
+        else:
+            for line in lines:
+                stream.write(line.encode("utf-8"))
+        stream.flush()
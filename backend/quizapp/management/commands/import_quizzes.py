@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from quizapp.transfer import DEFAULT_BATCH_SIZE, QuizImporter, open_text
+
+
+class Command(BaseCommand):
+    help = "Import quizzes from a JSON Lines file (optionally gzip compressed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="JSON Lines file, plain or .gz")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        importer = QuizImporter(batch_size=options["batch_size"])
+        with open(options["input"], "rb") as fileobj:
+            stats = importer.run(open_text(fileobj))
+
+        self.stdout.write(self.style.SUCCESS(
+            "Imported {created} quizzes ({questions} questions), "
+            "skipped {skipped} duplicates, {invalid} invalid rows".format(**stats)))
@@ -0,0 +1,17 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from quizapp.trends import rebuild_daily_performance
+
+
+class Command(BaseCommand):
+    help = "Backfill the per-day performance aggregates from quiz history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat,
+                            help="Only rebuild days from this date (YYYY-MM-DD) on")
+
+    def handle(self, *args, **options):
+        count = rebuild_daily_performance(since=options["since"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily performance rows"))
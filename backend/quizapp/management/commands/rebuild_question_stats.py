@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from quizapp.analytics import rebuild_question_stats
+from quizapp.models import QuestionStats
+
+
+class Command(BaseCommand):
+    help = "Recompute per-question analytics counters from stored answers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rebuild_question_stats(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {QuestionStats.objects.count()} questions"))
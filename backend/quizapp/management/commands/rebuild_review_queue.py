@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from quizapp.models import ReviewItem
+from quizapp.review import rebuild_review_items
+
+
+class Command(BaseCommand):
+    help = "Rebuild the spaced-repetition review queue by replaying stored answers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rebuild_review_items(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {ReviewItem.objects.count()} review items"))
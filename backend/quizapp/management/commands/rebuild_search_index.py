@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from quizapp import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for quizzes and questions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        search.rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from quizapp.pool import expire_stale, refill_pool
+
+
+class Command(BaseCommand):
+    help = "Drop stale pooled quizzes and pre-generate quizzes for popular topics"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, help="Maximum generations this run (default QUIZ_POOL_REFILL_PER_RUN)")
+
+    def handle(self, *args, **options):
+        expired = expire_stale()
+        generated = refill_pool(options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} stale and generated {generated} pooled quizzes"))
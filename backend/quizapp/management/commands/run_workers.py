@@ -0,0 +1,46 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from quizapp.tasks import Worker
+
+
+def run_worker(threads, poll_interval, once):
+    worker = Worker(threads=threads, poll_interval=poll_interval)
+    signal.signal(signal.SIGTERM, lambda *args: worker.stop())
+    try:
+        worker.run(once=once)
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+class Command(BaseCommand):
+    help = "Run task queue workers: N processes, each with a thread pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--threads", type=int, default=4, help="Threads per process")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when idle")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue has no due tasks")
+
+    def handle(self, *args, **options):
+        worker_args = (options["threads"], options["poll_interval"], options["once"])
+        if options["processes"] <= 1:
+            run_worker(*worker_args)
+            return
+
+        # Forked children must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=run_worker, args=worker_args) for _ in range(options["processes"])]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def copy_database(source_path, replica_path):
+    """Snapshot the primary with SQLite's online backup and swap it in atomically.
+
+    Connections already open on the replica keep reading the old file until
+    they reconnect, which Django does at the end of every request.
+    """
+    temporary = f"{replica_path}.sync"
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(temporary)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    os.replace(temporary, replica_path)
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database onto the read replica file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0,
+                            help="Keep copying every this many seconds instead of once")
+
+    def handle(self, *args, **options):
+        alias = settings.REPLICA_DATABASE
+        if not alias:
+            raise CommandError("No replica configured; set REPLICA_DATABASE_NAME")
+        primary, replica = settings.DATABASES["default"], settings.DATABASES[alias]
+        if "sqlite3" not in primary["ENGINE"] or "sqlite3" not in replica["ENGINE"]:
+            raise CommandError("sync_replica only copies SQLite files; use the database's own replication")
+
+        while True:
+            started = time.perf_counter()
+            copy_database(str(primary["NAME"]), str(replica["NAME"]))
+            self.stdout.write(self.style.SUCCESS(
+                f"Copied {primary['NAME']} to {replica['NAME']} in {(time.perf_counter() - started) * 1000:.0f} ms"))
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
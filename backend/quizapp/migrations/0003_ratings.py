@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+INITIAL_RATINGS = {"Easy": 1300.0, "Medium": 1500.0, "Hard": 1700.0}
+
+
+def seed_question_ratings(apps, schema_editor):
+    Question = apps.get_model('quizapp', 'Question')
+    QuestionRating = apps.get_model('quizapp', 'QuestionRating')
+    batch = []
+    for question in Question.objects.values('id', 'quiz__category_id', 'difficulty').iterator(chunk_size=2000):
+        batch.append(QuestionRating(
+            question_id=question['id'],
+            category_id=question['quiz__category_id'],
+            rating=INITIAL_RATINGS.get(question['difficulty'], 1500.0),
+        ))
+        if len(batch) >= 2000:
+            QuestionRating.objects.bulk_create(batch)
+            batch = []
+    QuestionRating.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0002_quiz_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField(default=1500)),
+                ('answers', models.PositiveIntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField(default=1500)),
+                ('answers', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_ratings', to='quizapp.category')),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating', to='quizapp.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'rating'], name='quizapp_que_categor_577ea1_idx'), models.Index(fields=['rating'], name='quizapp_que_rating_f374d2_idx')],
+            },
+        ),
+        migrations.RunPython(seed_question_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0003_ratings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('picks_a', models.PositiveIntegerField(default=0)),
+                ('picks_b', models.PositiveIntegerField(default=0)),
+                ('picks_c', models.PositiveIntegerField(default=0)),
+                ('picks_d', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_sq_sum', models.FloatField(default=0)),
+                ('correct_score_sum', models.FloatField(default=0)),
+                ('p_value', models.FloatField(default=0)),
+                ('error_rate', models.FloatField(db_index=True, default=0)),
+                ('discrimination', models.FloatField(db_index=True, default=0)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='quizapp.question')),
+            ],
+            options={
+                'verbose_name_plural': 'question stats',
+            },
+        ),
+    ]
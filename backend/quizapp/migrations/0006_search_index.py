@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE quizapp_search USING fts5("
+            "kind UNINDEXED, object_id UNINDEXED, quiz_id UNINDEXED, title, body, "
+            "tokenize = 'unicode61')")
+        schema_editor.execute(
+            "INSERT INTO quizapp_search (rowid, kind, object_id, quiz_id, title, body) "
+            "SELECT id * 2, 'quiz', id, id, title, description FROM quizapp_quiz")
+        schema_editor.execute(
+            "INSERT INTO quizapp_search (rowid, kind, object_id, quiz_id, title, body) "
+            "SELECT id * 2 + 1, 'question', id, quiz_id, text, "
+            "option_a || ' ' || option_b || ' ' || option_c || ' ' || option_d FROM quizapp_question")
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE TABLE quizapp_search ("
+            "kind varchar(16) NOT NULL, object_id bigint NOT NULL, quiz_id bigint NOT NULL, "
+            "document tsvector NOT NULL, PRIMARY KEY (kind, object_id))")
+        schema_editor.execute("CREATE INDEX quizapp_search_document_idx ON quizapp_search USING GIN (document)")
+        schema_editor.execute(
+            "INSERT INTO quizapp_search (kind, object_id, quiz_id, document) "
+            "SELECT 'quiz', id, id, setweight(to_tsvector('english', title), 'A') "
+            "|| setweight(to_tsvector('english', description), 'B') FROM quizapp_quiz")
+        schema_editor.execute(
+            "INSERT INTO quizapp_search (kind, object_id, quiz_id, document) "
+            "SELECT 'question', id, quiz_id, setweight(to_tsvector('english', text), 'A') "
+            "|| setweight(to_tsvector('english', option_a || ' ' || option_b || ' ' || option_c || ' ' || option_d), 'B') "
+            "FROM quizapp_question")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute("DROP TABLE IF EXISTS quizapp_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0005_leaderboard'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizhistory',
+            name='archived_answers',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:48
+
+from django.db import migrations, models
+
+# Frozen copy of the version 1 encoder from quizapp.archive, so this
+# migration keeps writing the format it was written for.
+OPTION_LETTERS = "ABCD"
+FORMAT_VERSION = 1
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def pack_bits(values, width):
+    per_byte = 8 // width
+    out = bytearray((len(values) + per_byte - 1) // per_byte)
+    for i, value in enumerate(values):
+        out[i // per_byte] |= value << (i % per_byte * width)
+    return out
+
+
+def pack_answers(rows):
+    out = bytearray([FORMAT_VERSION])
+    write_varint(out, len(rows))
+    previous = 0
+    for question_id, _, _ in rows:
+        delta = question_id - previous
+        write_varint(out, delta * 2 if delta >= 0 else -delta * 2 - 1)
+        previous = question_id
+    out += pack_bits([OPTION_LETTERS.find(selected) if selected else 0 for _, selected, _ in rows], 2)
+    out += pack_bits([OPTION_LETTERS.index(correct) for _, _, correct in rows], 2)
+    out += pack_bits([1 if selected else 0 for _, selected, _ in rows], 1)
+    return bytes(out)
+
+
+def pack_archived_answers(apps, schema_editor):
+    QuizHistory = apps.get_model('quizapp', 'QuizHistory')
+    archived = QuizHistory.objects.filter(archived_answers__isnull=False).only('id', 'archived_answers')
+    for history in archived.iterator(chunk_size=500):
+        blob = history.archived_answers
+        rows = [
+            (question_id, "" if selected == "-" else selected, correct)
+            for question_id, selected, correct in zip(blob["question_ids"], blob["selected"], blob["correct"])
+        ]
+        QuizHistory.objects.filter(id=history.id).update(packed_answers=pack_answers(rows))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0007_history_archived_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizhistory',
+            name='packed_answers',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(pack_archived_answers, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='quizhistory',
+            name='archived_answers',
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0010_submission_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationDemand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(help_text="Normalized 'category:subcategory'", max_length=511)),
+                ('question_count', models.PositiveIntegerField()),
+                ('category_name', models.CharField(max_length=255)),
+                ('subcategory_name', models.CharField(max_length=255)),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('pool_hits', models.PositiveIntegerField(default=0)),
+                ('last_requested_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('topic', 'question_count'), name='unique_generation_demand')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PooledQuiz',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('demand', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pooled_quizzes', to='quizapp.generationdemand')),
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pool_entry', to='quizapp.quiz')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['demand', 'created_at'], name='quizapp_poo_demand__8a09ad_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0011_quiz_pool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('model', models.CharField(max_length=100)),
+                ('topics', models.PositiveSmallIntegerField(default=1)),
+                ('questions_requested', models.PositiveIntegerField()),
+                ('questions_returned', models.PositiveIntegerField(default=0)),
+                ('estimated_input_tokens', models.PositiveIntegerField()),
+                ('estimated_output_tokens', models.PositiveIntegerField()),
+                ('input_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('output_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('latency_ms', models.FloatField()),
+                ('succeeded', models.BooleanField(default=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0012_generation_calls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationcall',
+            name='parsed',
+            field=models.BooleanField(default=True, help_text='The reply contained usable questions'),
+        ),
+        migrations.AddField(
+            model_name='generationcall',
+            name='structured',
+            field=models.BooleanField(default=False, help_text='Sent with a response schema'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0014_task_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('duration_sum', models.FloatField(default=0, help_text='Seconds spent on the attempts')),
+                ('score_0_20', models.PositiveIntegerField(default=0)),
+                ('score_21_40', models.PositiveIntegerField(default=0)),
+                ('score_41_60', models.PositiveIntegerField(default=0)),
+                ('score_61_80', models.PositiveIntegerField(default=0)),
+                ('score_81_100', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_performance', to='quizapp.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_performance', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'daily performance',
+                'indexes': [models.Index(fields=['user', 'day'], name='quizapp_dai_user_id_02d8a4_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'category', 'day'), name='unique_daily_performance')],
+            },
+        ),
+    ]
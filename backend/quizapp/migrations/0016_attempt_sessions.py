@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0015_daily_performance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizhistory',
+            name='draft_answers',
+            field=models.JSONField(blank=True, editable=False, help_text='Autosaved answers of an attempt still in progress', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='quizhistory',
+            index=models.Index(condition=models.Q(('completed_at__isnull', True)), fields=['user', 'quiz'], name='open_attempts'),
+        ),
+    ]
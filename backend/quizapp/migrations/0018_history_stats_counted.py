@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0017_avatar_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizhistory',
+            name='stats_counted',
+            field=models.BooleanField(default=False, editable=False, help_text='Whether QuestionStats already include this submission'),
+        ),
+    ]
@@ -16,6 +16,7 @@ class User(AbstractBaseUser, BaseModel, PermissionsMixin):
     username = models.CharField(max_length=255, blank=True, null=True)
     email = models.EmailField(verbose_name="email address", max_length=255, unique=True)
     avatar = models.ImageField(upload_to='avatars/', default='avatars/default.svg')
+    avatar_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     is_admin = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
@@ -54,6 +55,7 @@ class Quiz(BaseModel):
     category = models.ForeignKey(Category, related_name='quizzes', on_delete=models.CASCADE)
     subcategory = models.ForeignKey(SubCategory, related_name='quizzes', on_delete=models.CASCADE, null=True, blank=True)
     time_duration = models.PositiveIntegerField(help_text="Duration in minutes", default=5)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
 
     def __str__(self):
         return str(self.title)
@@ -90,6 +92,25 @@ class QuizHistory(BaseModel):
     correct_answers = models.PositiveIntegerField(default=0)
     started_at = models.DateTimeField()
     completed_at = models.DateTimeField(null=True, blank=True)
+    packed_answers = models.BinaryField(null=True, blank=True, editable=False)
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    draft_answers = models.JSONField(null=True, blank=True, editable=False,
+                                     help_text="Autosaved answers of an attempt still in progress")
+    stats_counted = models.BooleanField(default=False, editable=False,
+                                        help_text="Whether QuestionStats already include this submission")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "idempotency_key"],
+                condition=models.Q(idempotency_key__isnull=False),
+                name="unique_submission_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "quiz"], condition=models.Q(completed_at__isnull=True),
+                         name="open_attempts"),
+        ]
 
 
 class UserAnswer(BaseModel):
@@ -104,5 +125,190 @@ class UserAnswer(BaseModel):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     selected_option = models.CharField(choices=ANSWER_CHOICES, max_length=1)
     is_correct = models.BooleanField(default=False)
-    
-    
+
+
+class UserRating(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='rating')
+    rating = models.FloatField(default=1500)
+    answers = models.PositiveIntegerField(default=0)
+
+
+class QuestionRating(models.Model):
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='rating')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='question_ratings')
+    rating = models.FloatField(default=1500)
+    answers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["category", "rating"]),
+            models.Index(fields=["rating"]),
+        ]
+
+
+class QuestionStats(models.Model):
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='stats')
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    picks_a = models.PositiveIntegerField(default=0)
+    picks_b = models.PositiveIntegerField(default=0)
+    picks_c = models.PositiveIntegerField(default=0)
+    picks_d = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    score_sq_sum = models.FloatField(default=0)
+    correct_score_sum = models.FloatField(default=0)
+    p_value = models.FloatField(default=0)
+    error_rate = models.FloatField(default=0, db_index=True)
+    discrimination = models.FloatField(default=0, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "question stats"
+
+
+class LeaderboardEntry(models.Model):
+    board = models.CharField(max_length=64)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    points = models.FloatField(default=0)
+    best_score = models.FloatField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["board", "user"], name="unique_leaderboard_entry"),
+        ]
+        indexes = [
+            models.Index(fields=["board", "-points"]),
+            models.Index(fields=["board", "-best_score"]),
+        ]
+
+
+class ReviewItem(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_items')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='review_items')
+    ease = models.FloatField(default=2.5)
+    interval = models.PositiveIntegerField(default=0, help_text="Days until the next review")
+    repetitions = models.PositiveIntegerField(default=0)
+    lapses = models.PositiveIntegerField(default=0)
+    due_at = models.DateTimeField()
+    last_reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "question"], name="unique_review_item"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "due_at"]),
+        ]
+
+
+class GenerationDemand(models.Model):
+    topic = models.CharField(max_length=511, help_text="Normalized 'category:subcategory'")
+    question_count = models.PositiveIntegerField()
+    category_name = models.CharField(max_length=255)
+    subcategory_name = models.CharField(max_length=255)
+    requests = models.PositiveIntegerField(default=0)
+    pool_hits = models.PositiveIntegerField(default=0)
+    last_requested_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["topic", "question_count"], name="unique_generation_demand"),
+        ]
+
+    def __str__(self):
+        return f"{self.category_name} / {self.subcategory_name} ({self.question_count})"
+
+
+class PooledQuiz(models.Model):
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, related_name='pool_entry')
+    demand = models.ForeignKey(GenerationDemand, on_delete=models.CASCADE, related_name='pooled_quizzes')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["demand", "created_at"]),
+        ]
+
+
+class GenerationCall(models.Model):
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    model = models.CharField(max_length=100)
+    topics = models.PositiveSmallIntegerField(default=1)
+    questions_requested = models.PositiveIntegerField()
+    questions_returned = models.PositiveIntegerField(default=0)
+    estimated_input_tokens = models.PositiveIntegerField()
+    estimated_output_tokens = models.PositiveIntegerField()
+    input_tokens = models.PositiveIntegerField(null=True, blank=True)
+    output_tokens = models.PositiveIntegerField(null=True, blank=True)
+    latency_ms = models.FloatField()
+    succeeded = models.BooleanField(default=True)
+    structured = models.BooleanField(default=False, help_text="Sent with a response schema")
+    parsed = models.BooleanField(default=True, help_text="The reply contained usable questions")
+
+    @property
+    def tokens_per_question(self):
+        if not self.questions_returned or self.input_tokens is None or self.output_tokens is None:
+            return None
+        return (self.input_tokens + self.output_tokens) / self.questions_returned
+
+    @property
+    def latency_per_question(self):
+        return self.latency_ms / self.questions_returned if self.questions_returned else None
+
+
+class Task(models.Model):
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    name = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    unique_key = models.CharField(max_length=200, null=True, blank=True,
+                                  help_text="At most one queued or running task per key")
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "-priority", "run_at"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["unique_key"],
+                condition=models.Q(status__in=["queued", "running"]),
+                name="unique_pending_task",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class DailyPerformance(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_performance')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_performance')
+    day = models.DateField()
+    attempts = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    duration_sum = models.FloatField(default=0, help_text="Seconds spent on the attempts")
+    score_0_20 = models.PositiveIntegerField(default=0)
+    score_21_40 = models.PositiveIntegerField(default=0)
+    score_41_60 = models.PositiveIntegerField(default=0)
+    score_61_80 = models.PositiveIntegerField(default=0)
+    score_81_100 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "daily performance"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "category", "day"], name="unique_daily_performance"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "day"]),
+        ]
@@ -0,0 +1,161 @@
+"""Warm pool of pre-generated quizzes for popular topics.
+
+Every create request counts towards the demand of its (topic, question
+count). Popular topics keep up to ``QUIZ_POOL_SIZE`` unserved quizzes ready;
+a create request claims one instantly and a queued refill replaces it.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils.timezone import now
+
+from .circuit import CircuitOpen
+from .models import GenerationDemand, PooledQuiz, Quiz
+from .prompts import TopicRequest
+from .tasks import enqueue
+from .utils import build_quiz, generate_quizzes
+
+
+def topic_key(category, subcategory):
+    return f"{(category or '').strip().lower()}:{(subcategory or '').strip().lower()}"
+
+
+def fresh_cutoff():
+    return now() - timedelta(hours=settings.QUIZ_POOL_MAX_AGE_HOURS)
+
+
+def record_demand(category, subcategory, question_count):
+    demand, _ = GenerationDemand.objects.get_or_create(
+        topic=topic_key(category, subcategory),
+        question_count=question_count,
+        defaults={"category_name": category, "subcategory_name": subcategory, "last_requested_at": now()},
+    )
+    demand.last_requested_at = now()
+    GenerationDemand.objects.filter(pk=demand.pk).update(
+        requests=F('requests') + 1, last_requested_at=demand.last_requested_at)
+    demand.requests += 1
+    return demand
+
+
+def is_popular(demand):
+    return (settings.QUIZ_POOL_SIZE > 0
+            and demand.requests >= settings.QUIZ_POOL_MIN_REQUESTS
+            and demand.last_requested_at >= now() - timedelta(days=settings.QUIZ_POOL_DEMAND_DAYS))
+
+
+def claim_quiz(demand, duration):
+    """Take the oldest fresh pooled quiz for ``demand``, or return ``None``.
+
+    Deleting the pool entry is the claim: of two concurrent requests racing
+    for one entry only the one whose delete removed a row gets it.
+    """
+    candidates = (PooledQuiz.objects
+                  .filter(demand=demand, created_at__gte=fresh_cutoff())
+                  .order_by('created_at')
+                  .values_list('pk', 'quiz_id'))
+    for pk, quiz_id in candidates[:5]:
+        deleted, _ = PooledQuiz.objects.filter(pk=pk).delete()
+        if deleted:
+            Quiz.objects.filter(pk=quiz_id).update(time_duration=duration)
+            GenerationDemand.objects.filter(pk=demand.pk).update(pool_hits=F('pool_hits') + 1)
+            return quiz_id
+    return None
+
+
+def missing_count(demand, limit):
+    available = PooledQuiz.objects.filter(demand=demand, created_at__gte=fresh_cutoff()).count()
+    return max(min(settings.QUIZ_POOL_SIZE - available, limit), 0)
+
+
+def fill(demands):
+    """Generate one pooled quiz per entry of ``demands``, batching them into as few calls as fit."""
+    topics = [TopicRequest(d.category_name, d.subcategory_name, d.question_count) for d in demands]
+    try:
+        results = generate_quizzes(topics)
+    except CircuitOpen:
+        return 0
+    generated = 0
+    for demand, entries in zip(demands, results):
+        if not entries:
+            continue
+        quiz = build_quiz(demand.category_name, "API Created", demand.subcategory_name, 10, entries)
+        if quiz is None:
+            continue
+        PooledQuiz.objects.create(quiz=quiz, demand=demand)
+        generated += 1
+    return generated
+
+
+def refill_topic(demand, limit=None):
+    """Generate quizzes until ``demand`` has ``QUIZ_POOL_SIZE`` fresh ones; returns how many were made."""
+    limit = settings.QUIZ_POOL_REFILL_BATCH if limit is None else limit
+    return fill([demand] * missing_count(demand, limit))
+
+
+def schedule_refill(demand):
+    """Queue a refill of ``demand``'s pool if the topic is popular; one pending refill per topic."""
+    if not is_popular(demand):
+        return False
+    return enqueue("pool.refill_topic", {"demand_id": demand.pk},
+                   unique_key=f"pool.refill_topic:{demand.pk}") is not None
+
+
+def stored_quiz_id(category, subcategory):
+    """The newest already-served quiz on a topic, for when nothing new can be generated."""
+    return (Quiz.objects
+            .filter(category__name__iexact=category, subcategory__name__iexact=subcategory,
+                    pool_entry__isnull=True)
+            .order_by('-id')
+            .values_list('id', flat=True)
+            .first())
+
+
+def expire_stale():
+    """Delete pooled quizzes that were never served before going stale."""
+    deleted, _ = Quiz.objects.filter(pool_entry__created_at__lt=fresh_cutoff()).delete()
+    return deleted
+
+
+def refill_pool(limit=None):
+    """Top up every popular topic, most requested first, within ``QUIZ_POOL_REFILL_PER_RUN`` generations.
+
+    All missing quizzes are generated together so small topics share calls.
+    """
+    budget = settings.QUIZ_POOL_REFILL_PER_RUN if limit is None else limit
+    if settings.QUIZ_POOL_SIZE <= 0:
+        return 0
+    wanted = []
+    popular = (GenerationDemand.objects
+               .filter(requests__gte=settings.QUIZ_POOL_MIN_REQUESTS,
+                       last_requested_at__gte=now() - timedelta(days=settings.QUIZ_POOL_DEMAND_DAYS))
+               .order_by('-requests'))
+    for demand in popular:
+        if len(wanted) >= budget:
+            break
+        wanted += [demand] * missing_count(demand, min(settings.QUIZ_POOL_REFILL_BATCH, budget - len(wanted)))
+    return fill(wanted)
+
+
+def pool_metrics():
+    demands = (GenerationDemand.objects
+               .annotate(available=Count('pooled_quizzes', filter=Q(pooled_quizzes__created_at__gte=fresh_cutoff())))
+               .order_by('-requests'))
+    topics = [{
+        "category": demand.category_name,
+        "subcategory": demand.subcategory_name,
+        "question_count": demand.question_count,
+        "requests": demand.requests,
+        "pool_hits": demand.pool_hits,
+        "hit_rate": round(demand.pool_hits / demand.requests, 3) if demand.requests else 0.0,
+        "available": demand.available,
+        "popular": is_popular(demand),
+    } for demand in demands]
+    requests = sum(topic["requests"] for topic in topics)
+    hits = sum(topic["pool_hits"] for topic in topics)
+    return {
+        "requests": requests,
+        "pool_hits": hits,
+        "hit_rate": round(hits / requests, 3) if requests else 0.0,
+        "topics": topics,
+    }
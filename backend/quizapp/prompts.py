@@ -0,0 +1,115 @@
+"""Compact prompts for quiz generation and their token estimates.
+
+A single prompt asks for one question array; a batch prompt asks for several
+topics at once and gets back an object of arrays keyed ``t1``, ``t2``, ...
+which ``split_batch`` maps back onto the requested topics. With
+``structured=True`` the reply format is left to a response schema instead of
+being spelled out in the prompt.
+"""
+import json
+import math
+from collections import namedtuple
+
+QUESTION_FORMAT = ('{"question":str,"options":{"A":str,"B":str,"C":str,"D":str},'
+                   '"correct_answer":"A"|"B"|"C"|"D","difficulty":"Easy"|"Medium"|"Hard"}')
+RULES = "Questions must be distinct, unambiguous and have exactly one correct option. No text outside the JSON."
+
+CHARS_PER_TOKEN = 4
+# Measured average of one compact question object in the reply.
+OUTPUT_TOKENS_PER_QUESTION = 70
+MAX_BATCH_OUTPUT_TOKENS = 6000
+MAX_BATCH_TOPICS = 8
+
+TopicRequest = namedtuple("TopicRequest", "category subcategory num_questions")
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_output_tokens(num_questions):
+    return num_questions * OUTPUT_TOKENS_PER_QUESTION
+
+
+def topic_label(category, subcategory):
+    return f"{category} / {subcategory}" if subcategory else category
+
+
+QUESTION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "question": {"type": "STRING"},
+        "options": {
+            "type": "OBJECT",
+            "properties": {letter: {"type": "STRING"} for letter in "ABCD"},
+            "required": list("ABCD"),
+        },
+        "correct_answer": {"type": "STRING", "enum": list("ABCD")},
+        "difficulty": {"type": "STRING", "enum": ["Easy", "Medium", "Hard"]},
+    },
+    "required": ["question", "options", "correct_answer", "difficulty"],
+}
+
+
+def quiz_schema():
+    return {"type": "ARRAY", "items": QUESTION_SCHEMA}
+
+
+def batch_schema(count):
+    keys = [batch_key(position) for position in range(count)]
+    return {"type": "OBJECT", "properties": {key: quiz_schema() for key in keys}, "required": keys}
+
+
+def quiz_prompt(category, subcategory, num_questions, structured=False):
+    reply = "" if structured else f"Reply with a JSON array of {QUESTION_FORMAT}\n"
+    return (f"Write {num_questions} multiple-choice quiz questions.\n"
+            f"Topic: {topic_label(category, subcategory)}\n"
+            f"Questions: {num_questions}\n"
+            f"{reply}"
+            f"{RULES}")
+
+
+def batch_key(position):
+    return f"t{position + 1}"
+
+
+def batch_prompt(topics, structured=False):
+    lines = "\n".join(
+        f"{batch_key(position)}: {topic_label(topic.category, topic.subcategory)} ({topic.num_questions})"
+        for position, topic in enumerate(topics))
+    reply = "" if structured else f"Reply with a JSON object mapping each topic key to an array of {QUESTION_FORMAT}\n"
+    return (f"Write multiple-choice quiz questions for each topic below; the number in brackets is how many.\n"
+            f"{lines}\n"
+            f"{reply}"
+            f"{RULES}")
+
+
+def plan_batches(topics, max_output_tokens=MAX_BATCH_OUTPUT_TOKENS, max_topics=MAX_BATCH_TOPICS):
+    """Group topic requests into batches whose estimated reply fits ``max_output_tokens``."""
+    batches, current, budget = [], [], 0
+    for topic in topics:
+        cost = estimate_output_tokens(topic.num_questions)
+        if current and (budget + cost > max_output_tokens or len(current) >= max_topics):
+            batches.append(current)
+            current, budget = [], 0
+        current.append(topic)
+        budget += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def split_batch(response_text, count):
+    """Return the question arrays of a batch reply in topic order; missing topics get ``None``."""
+    start, end = response_text.find("{"), response_text.rfind("}") + 1
+    try:
+        data = json.loads(response_text[start:end]) if start != -1 else {}
+    except json.JSONDecodeError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    arrays = []
+    for position in range(count):
+        entries = data.get(batch_key(position))
+        arrays.append(entries if isinstance(entries, list) else None)
+    return arrays
@@ -0,0 +1,114 @@
+"""Admission control for quiz generation.
+
+Requests are limited per user and across all users with a sliding-window
+counter (the current fixed window plus the previous one weighted by how much
+of it still overlaps), and both a user's and the whole site's estimated
+token spend per day is capped. Each counter is incremented first and checked
+against the value the increment returned, and a request that went over is
+taken back out, so concurrent requests cannot all pass a check made before
+any of them counted. Counters only span worker processes when the cache
+backend is shared, and that backend needs an atomic ``incr``: Redis and
+memcached have one, locmem is atomic within a process, the database and
+file caches are not.
+
+This is not a single cache round-trip. Django's cache API has no atomic
+multi-key operation, so an admitted request costs one ``get_many`` for
+the previous windows plus four ``incr`` calls. The first request of a
+window or day also pays an ``add`` and a retry per new key. A rejected
+request adds one ``decr`` per counter it already bumped. On a shared
+backend that is five to twelve round-trips per generation request, small
+next to the LLM call it guards. Cutting it to one would need a
+backend-specific pipeline or Lua script.
+"""
+import math
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+DAY_SECONDS = 24 * 60 * 60
+
+Decision = namedtuple("Decision", "allowed retry_after reason")
+
+
+def window_key(scope, index):
+    return f"quizapp:ratelimit:{scope}:{index}"
+
+
+def spend_key(scope, day):
+    return f"quizapp:ratelimit:spend:{scope}:{day}"
+
+
+def sliding_retry_after(current, previous, limit, elapsed, window):
+    """Seconds until one more request fits under ``limit``."""
+    if current + 1 > limit:
+        return math.ceil(window - elapsed)
+    # Wait for the previous window's weight to fall far enough.
+    overlap = (limit - 1 - current) / previous
+    return max(1, math.ceil(window * (1 - overlap) - elapsed))
+
+
+def check_window(counted, previous, limit, elapsed, window):
+    """Retry-after if ``counted`` (this request included) is over ``limit``, else None."""
+    if counted + previous * (1 - elapsed / window) <= limit:
+        return None
+    return sliding_retry_after(counted - 1, previous, limit, elapsed, window)
+
+
+def increment(key, delta, timeout):
+    """Add ``delta`` to ``key`` and return the new value."""
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, timeout):
+            return delta
+        return cache.incr(key, delta)
+
+
+def admit_generation(user, cost):
+    """Count one generation request costing ``cost`` estimated tokens, or reject it and count nothing."""
+    now = time.time()
+    window = settings.GENERATION_WINDOW_SECONDS
+    index, elapsed = divmod(int(now), window)
+    day = datetime.fromtimestamp(now, timezone.utc).strftime("%Y%m%d")
+    until_midnight = DAY_SECONDS - int(now) % DAY_SECONDS
+    user_scope = f"user:{user.pk}"
+
+    # Past windows no longer grow, so reading them before counting is safe.
+    previous = cache.get_many([window_key(user_scope, index - 1), window_key("global", index - 1)])
+
+    def over_window(scope, limit):
+        return lambda counted: check_window(
+            counted, previous.get(window_key(scope, index - 1), 0), limit, elapsed, window)
+
+    def over_spend(limit):
+        return lambda counted: until_midnight if counted > limit else None
+
+    counters = [
+        (window_key(user_scope, index), 1, 2 * window,
+         over_window(user_scope, settings.GENERATION_USER_LIMIT),
+         "Too many quiz generations, please slow down"),
+        (window_key("global", index), 1, 2 * window,
+         over_window("global", settings.GENERATION_GLOBAL_LIMIT),
+         "Quiz generation is busy, please try again shortly"),
+        (spend_key(user_scope, day), cost, DAY_SECONDS,
+         over_spend(settings.GENERATION_USER_DAILY_TOKENS),
+         "Daily quiz generation allowance used up"),
+        (spend_key("global", day), cost, DAY_SECONDS,
+         over_spend(settings.GENERATION_GLOBAL_DAILY_TOKENS),
+         "Quiz generation is paused for today"),
+    ]
+    counted = []
+    for key, delta, timeout, over, reason in counters:
+        counted.append((key, delta))
+        retry_after = over(increment(key, delta, timeout))
+        if retry_after is not None:
+            for counted_key, counted_delta in counted:
+                try:
+                    cache.decr(counted_key, counted_delta)
+                except ValueError:
+                    pass
+            return Decision(False, retry_after, reason)
+    return Decision(True, 0, "")
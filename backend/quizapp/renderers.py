@@ -0,0 +1,44 @@
+"""JSON rendering fast path.
+
+``FastJSONRenderer`` renders through orjson when it is installed and falls
+back to DRF's ``JSONRenderer`` otherwise, or whenever a client asks for
+indented output. Types orjson does not know (lazy strings, Decimals, ...)
+and datetimes go through DRF's encoder, so both paths produce the same JSON.
+``FastContentNegotiation`` skips parsing the Accept header for the common
+case of a client that takes JSON or anything.
+"""
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ANY_JSON = {"", "*/*", "application/json"}
+
+
+class FastJSONRenderer(JSONRenderer):
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        try:
+            return orjson.dumps(data, default=self.encoder.default,
+                                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class FastContentNegotiation(DefaultContentNegotiation):
+    def select_renderer(self, request, renderers, format_suffix=None):
+        accept = request.META.get('HTTP_ACCEPT', '').strip()
+        explicit_format = format_suffix or request.query_params.get(self.settings.URL_FORMAT_OVERRIDE)
+        if not explicit_format and accept in ANY_JSON and renderers and renderers[0].format == 'json':
+            renderer = renderers[0]
+            return renderer, renderer.media_type
+        return super().select_renderer(request, renderers, format_suffix)
@@ -0,0 +1,77 @@
+"""Read replica routing.
+
+Views that mix in ``ReplicaReadMixin`` run the reads of their safe requests
+against ``settings.REPLICA_DATABASE``; everything else, and every write,
+uses ``default``. A user who just changed something (any successful unsafe
+request, noted by ``PrimaryAfterWriteMiddleware``) reads from the primary
+for ``REPLICA_STICKY_SECONDS`` so they see their own writes while the
+replica catches up. With no replica configured the router stays out of the
+way.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+replica_reads = ContextVar("replica_reads", default=False)
+
+
+def replica_alias():
+    alias = settings.REPLICA_DATABASE
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def sticky_key(user_id):
+    return f"quizapp:primary-reads:{user_id}"
+
+
+def wrote_recently(user):
+    return bool(user and user.is_authenticated and cache.get(sticky_key(user.pk)))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if replica_reads.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the primary, so objects from either relate.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema along with its data from the primary.
+        return db == "default"
+
+
+class ReplicaReadMixin:
+    """Serve this view's safe requests from the replica unless the user wrote recently."""
+
+    def dispatch(self, request, *args, **kwargs):
+        token = replica_reads.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            replica_reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Authentication ran above, so request.user is known here.
+        if request.method in SAFE_METHODS and not wrote_recently(request.user):
+            replica_reads.set(True)
+
+
+class PrimaryAfterWriteMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (replica_alias() and request.method not in SAFE_METHODS and response.status_code < 400
+                and getattr(request, "user", None) is not None and request.user.is_authenticated):
+            cache.set(sticky_key(request.user.pk), True, settings.REPLICA_STICKY_SECONDS)
+        return response
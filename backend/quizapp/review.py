@@ -0,0 +1,130 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from .archive import unpack_answers
+from .models import Question, QuizHistory, ReviewItem, UserAnswer
+
+CORRECT_QUALITY = 4
+WRONG_QUALITY = 1
+MIN_EASE = 1.3
+
+
+def schedule(item, quality, reviewed_at):
+    """Apply one SM-2 step to ``item`` for an answer graded ``quality`` (0-5)."""
+    if quality < 3:
+        item.repetitions = 0
+        item.interval = 1
+        item.lapses += 1
+    else:
+        item.repetitions += 1
+        if item.repetitions == 1:
+            item.interval = 1
+        elif item.repetitions == 2:
+            item.interval = 6
+        else:
+            item.interval = round(item.interval * item.ease)
+    item.ease = max(MIN_EASE, item.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    item.due_at = reviewed_at + timedelta(days=item.interval)
+    item.last_reviewed_at = reviewed_at
+    return item
+
+
+def record_reviews(user, results, reviewed_at=None):
+    """Update review scheduling for ``[(question_id, is_correct), ...]``.
+
+    Wrong answers enter the queue; correct answers only advance questions
+    that are already in it.
+    """
+    if not results:
+        return []
+    reviewed_at = reviewed_at or now()
+    existing = {item.question_id: item for item in ReviewItem.objects.filter(
+        user=user, question_id__in=[question_id for question_id, _ in results])}
+
+    created, updated = [], []
+    for question_id, is_correct in results:
+        item = existing.get(question_id)
+        if item is None:
+            if is_correct:
+                continue
+            item = ReviewItem(user=user, question_id=question_id, due_at=reviewed_at)
+            created.append(item)
+        else:
+            updated.append(item)
+        schedule(item, CORRECT_QUALITY if is_correct else WRONG_QUALITY, reviewed_at)
+
+    ReviewItem.objects.bulk_create(created, ignore_conflicts=True)
+    ReviewItem.objects.bulk_update(updated, ["ease", "interval", "repetitions", "lapses", "due_at", "last_reviewed_at"])
+    return created + updated
+
+
+def due_question_ids(user, question_ids):
+    """The ids among ``question_ids`` that are in ``user``'s review queue and due now."""
+    return set(ReviewItem.objects
+               .filter(user=user, question_id__in=question_ids, due_at__lte=now())
+               .values_list('question_id', flat=True))
+
+
+def due_items(user, limit=20):
+    return (ReviewItem.objects
+            .filter(user=user, due_at__lte=now())
+            .select_related('question')
+            .order_by('due_at')[:limit])
+
+
+@transaction.atomic
+def rebuild_review_items(chunk_size=2000):
+    """Rebuild every review item by replaying stored answers in completion order.
+
+    Covers both live ``UserAnswer`` rows and packed histories; used once to
+    backfill the queue for answers given before it existed.
+    """
+    histories = (QuizHistory.objects
+                 .filter(completed_at__isnull=False)
+                 .order_by('user_id', 'completed_at', 'id')
+                 .values_list('id', 'user_id', 'completed_at', 'packed_answers'))
+    ReviewItem.objects.all().delete()
+
+    items, current_user, batch = {}, None, []
+
+    def flush_user():
+        existing = set(Question.objects.filter(id__in=list(items)).values_list('id', flat=True))
+        ReviewItem.objects.bulk_create(
+            [item for question_id, item in items.items() if question_id in existing], batch_size=chunk_size)
+        items.clear()
+
+    def replay(rows):
+        nonlocal current_user
+        row_answers = {}
+        for history_id, question_id, is_correct in (UserAnswer.objects
+                                                    .filter(history_id__in=[r[0] for r in rows if r[3] is None])
+                                                    .order_by('id')
+                                                    .values_list('history_id', 'question_id', 'is_correct')):
+            row_answers.setdefault(history_id, []).append((question_id, is_correct))
+
+        for history_id, user_id, completed_at, blob in rows:
+            if user_id != current_user:
+                flush_user()
+                current_user = user_id
+            if blob is None:
+                results = row_answers.get(history_id, [])
+            else:
+                results = [(question_id, selected == correct)
+                           for question_id, selected, correct in unpack_answers(blob) if selected]
+            for question_id, is_correct in results:
+                item = items.get(question_id)
+                if item is None:
+                    if is_correct:
+                        continue
+                    item = items[question_id] = ReviewItem(user_id=user_id, question_id=question_id)
+                schedule(item, CORRECT_QUALITY if is_correct else WRONG_QUALITY, completed_at)
+
+    for row in histories.iterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            replay(batch)
+            batch = []
+    replay(batch)
+    flush_user()
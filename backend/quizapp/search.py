@@ -0,0 +1,176 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import PooledQuiz, Quiz, Question
+
+SEARCH_TABLE = "quizapp_search"
+QUIZ, QUESTION = "quiz", "question"
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def quiz_document(quiz):
+    return (QUIZ, quiz.id, quiz.id, quiz.title, quiz.description)
+
+
+def question_document(question):
+    options = " ".join([question.option_a, question.option_b, question.option_c, question.option_d])
+    return (QUESTION, question.id, question.quiz_id, question.text, options)
+
+
+def fts_query(term):
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix."""
+    tokens = TOKEN_RE.findall(term)
+    if not tokens:
+        return None
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def fts_rowid(kind, object_id):
+    # FTS5 only indexes its rowid, so quizzes and questions share it by parity
+    # to keep updates and deletes point lookups.
+    return object_id * 2 + (kind == QUESTION)
+
+
+class SqliteIndex:
+    def upsert(self, cursor, documents):
+        cursor.executemany(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+            [(fts_rowid(kind, object_id),) for kind, object_id, *_ in documents])
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, quiz_id, title, body) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            [(fts_rowid(kind, object_id), kind, object_id, *rest) for kind, object_id, *rest in documents])
+
+    def delete(self, cursor, kind, object_id):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [fts_rowid(kind, object_id)])
+
+    def query(self, term):
+        query = fts_query(term)
+        if query is None:
+            return None
+        return f"{SEARCH_TABLE} MATCH %s", [query], f"bm25({SEARCH_TABLE}, 0, 0, 0, 10.0, 1.0)"
+
+
+class PostgresIndex:
+    DOCUMENT = "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B')"
+
+    def upsert(self, cursor, documents):
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (kind, object_id, quiz_id, document) "
+            f"VALUES (%s, %s, %s, {self.DOCUMENT}) "
+            "ON CONFLICT (kind, object_id) DO UPDATE SET quiz_id = EXCLUDED.quiz_id, document = EXCLUDED.document",
+            documents)
+
+    def delete(self, cursor, kind, object_id):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s AND object_id = %s", [kind, object_id])
+
+    def query(self, term):
+        if not term.strip():
+            return None
+        return ("document @@ websearch_to_tsquery('english', %s)", [term],
+                "-ts_rank(document, websearch_to_tsquery('english', %s))")
+
+
+def get_index():
+    if connection.vendor == "sqlite":
+        return SqliteIndex()
+    if connection.vendor == "postgresql":
+        return PostgresIndex()
+    return None
+
+
+def index_documents(documents):
+    index = get_index()
+    if index is None or not documents:
+        return
+    with connection.cursor() as cursor:
+        index.upsert(cursor, documents)
+
+
+def index_quizzes(quizzes):
+    index_documents([quiz_document(q) for q in quizzes])
+
+
+def index_questions(questions):
+    index_documents([question_document(q) for q in questions])
+
+
+def remove_document(kind, object_id):
+    index = get_index()
+    if index is None:
+        return
+    with connection.cursor() as cursor:
+        index.delete(cursor, kind, object_id)
+
+
+def search(term, kind=None, limit=20, offset=0):
+    """Return ranked ``(kind, object_id, quiz_id)`` hits for ``term``."""
+    index = get_index()
+    if index is None:
+        return fallback_search(term, kind, limit, offset)
+    query = index.query(term)
+    if query is None:
+        return []
+
+    where, params, rank = query
+    if kind:
+        where += " AND kind = %s"
+        params = params + [kind]
+    # Warm-pool quizzes stay hidden until a create request claims them, as in the quiz list.
+    where += f" AND quiz_id NOT IN (SELECT quiz_id FROM {PooledQuiz._meta.db_table})"
+    rank_params = [term] if isinstance(index, PostgresIndex) else []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT kind, object_id, quiz_id FROM {SEARCH_TABLE} WHERE {where} "
+            f"ORDER BY {rank} LIMIT %s OFFSET %s",
+            params + rank_params + [limit, offset])
+        return cursor.fetchall()
+
+
+def fallback_search(term, kind, limit, offset):
+    # Other database backends get an unranked substring scan.
+    hits = []
+    if kind in (None, QUIZ):
+        quizzes = (Quiz.objects
+                   .filter(Q(title__icontains=term) | Q(description__icontains=term), pool_entry__isnull=True)
+                   .order_by('id'))
+        hits += [(QUIZ, pk, pk) for pk in quizzes.values_list('id', flat=True)[:offset + limit]]
+    if kind in (None, QUESTION):
+        questions = Question.objects.filter(text__icontains=term, quiz__pool_entry__isnull=True).order_by('id')
+        hits += [(QUESTION, pk, quiz_id) for pk, quiz_id in questions.values_list('id', 'quiz_id')[:offset + limit]]
+    return hits[offset:offset + limit]
+
+
+def filter_queryset(queryset, kind, term):
+    """Restrict an admin queryset to the primary keys the index matches for ``term``."""
+    index = get_index()
+    query = index.query(term) if index else None
+    if query is None:
+        return None
+    where, params, _ = query
+    return queryset.filter(pk__in=RawSQL(
+        f"SELECT object_id FROM {SEARCH_TABLE} WHERE {where} AND kind = %s", params + [kind]))
+
+
+def rebuild(chunk_size=1000):
+    if get_index() is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    batch = []
+    for quiz in Quiz.objects.only('id', 'title', 'description').iterator(chunk_size=chunk_size):
+        batch.append(quiz_document(quiz))
+        if len(batch) >= chunk_size:
+            index_documents(batch)
+            batch = []
+    for question in Question.objects.iterator(chunk_size=chunk_size):
+        batch.append(question_document(question))
+        if len(batch) >= chunk_size:
+            index_documents(batch)
+            batch = []
+    index_documents(batch)
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .adaptive import create_question_ratings
+from .avatars import needs_thumbnails
+from .grading import invalidate_answer_key
+from .models import Question, Quiz, User
+from .tasks import enqueue
+from . import search
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    invalidate_answer_key(instance.quiz_id)
+
+
+@receiver(post_save, sender=Question)
+def question_created(sender, instance, created, **kwargs):
+    if created:
+        create_question_ratings([instance])
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_saved(sender, instance, **kwargs):
+    search.index_quizzes([instance])
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, **kwargs):
+    search.index_questions([instance])
+
+
+@receiver(post_delete, sender=Quiz)
+def quiz_deleted(sender, instance, **kwargs):
+    search.remove_document(search.QUIZ, instance.id)
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, **kwargs):
+    search.remove_document(search.QUESTION, instance.id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    if needs_thumbnails(instance):
+        name = instance.avatar.name
+        enqueue("avatars.resize", {"user_id": instance.pk, "name": name}, unique_key=f"avatar:{instance.pk}:{name}")
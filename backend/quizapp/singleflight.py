@@ -0,0 +1,98 @@
+"""Coalesce identical concurrent quiz generations into one provider call.
+
+Threads of one process wait on an ``Event`` owned by the first caller.
+Across processes the first caller takes a ``cache.add`` lock and the others
+poll for the result it publishes, so with a shared cache backend (database,
+Redis, memcached) a whole deployment makes one call per key.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 120
+RESULT_TIMEOUT = 30
+POLL_INTERVAL = 0.1
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def generation_key(category, subcategory, num_questions, duration):
+    return ":".join([
+        (category or "").strip().lower(),
+        (subcategory or "").strip().lower(),
+        str(num_questions),
+        str(duration),
+    ])
+
+
+def lock_cache_key(key):
+    return f"quizapp:flight:lock:{key}"
+
+
+def result_cache_key(key):
+    return f"quizapp:flight:result:{key}"
+
+
+def single_flight(key, func):
+    """Run ``func`` once for all concurrent callers with ``key``.
+
+    Returns ``(result, shared)`` where ``shared`` tells whether the result
+    came from another caller's call.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result, True
+
+    try:
+        flight.result, shared = _cross_process_flight(key, func)
+        return flight.result, shared
+    except Exception as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def _cross_process_flight(key, func):
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        if cache.add(lock_cache_key(key), 1, LOCK_TIMEOUT):
+            try:
+                result = func()
+                if result is not None:
+                    cache.set(result_cache_key(key), result, RESULT_TIMEOUT)
+                return result, False
+            finally:
+                cache.delete(lock_cache_key(key))
+
+        # Another process is generating: wait for its result, or take over
+        # if it gave up without publishing one.
+        while cache.get(lock_cache_key(key)) is not None:
+            result = cache.get(result_cache_key(key))
+            if result is not None:
+                return result, True
+            if time.monotonic() > deadline:
+                return func(), False
+            time.sleep(POLL_INTERVAL)
+        result = cache.get(result_cache_key(key))
+        if result is not None:
+            return result, True
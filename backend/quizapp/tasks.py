@@ -0,0 +1,198 @@
+"""A small database-backed task queue.
+
+Functions registered with ``@task("name")`` are queued with ``enqueue`` from
+views, signals or other tasks; the insert joins the caller's transaction, so
+a task only becomes visible if the work that queued it commits. Workers
+started by ``manage.py run_workers`` claim due tasks by priority, using
+``SELECT ... FOR UPDATE SKIP LOCKED`` where the database supports it and a
+conditional UPDATE everywhere else, and retry failures with backoff.
+"""
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils.timezone import now
+
+from .models import Task
+
+RETRY_BASE_SECONDS = 30
+STALE_AFTER = timedelta(minutes=30)
+
+registry = {}
+
+
+def task(name, priority=0, max_attempts=3):
+    """Register ``func`` under ``name`` with default queueing options.
+
+    ``func.enqueue(**kwargs)`` and ``enqueue(name, kwargs)`` both queue a call.
+    """
+    def decorator(func):
+        registry[name] = func
+        func.task_name = name
+        func.task_options = {"priority": priority, "max_attempts": max_attempts}
+        func.enqueue = lambda run_at=None, unique_key=None, **kwargs: enqueue(
+            name, kwargs, run_at=run_at, unique_key=unique_key)
+        return func
+    return decorator
+
+
+def enqueue(name, kwargs=None, priority=None, run_at=None, unique_key=None, max_attempts=None):
+    """Queue ``name(**kwargs)``. Returns the Task, or None if ``unique_key`` is already pending.
+
+    ``priority`` and ``max_attempts`` default to what the task was registered with.
+    """
+    options = getattr(registry.get(name), "task_options", {})
+    pending = Task(
+        name=name,
+        kwargs=kwargs or {},
+        priority=options.get("priority", 0) if priority is None else priority,
+        max_attempts=options.get("max_attempts", 3) if max_attempts is None else max_attempts,
+        run_at=run_at or now(),
+        unique_key=unique_key,
+    )
+    if unique_key is None:
+        pending.save()
+        return pending
+    try:
+        with transaction.atomic():
+            pending.save()
+    except IntegrityError:
+        return None
+    return pending
+
+
+def due_tasks():
+    return (Task.objects
+            .filter(status=Task.QUEUED, run_at__lte=now())
+            .order_by('-priority', 'run_at'))
+
+
+def claim(worker_id, limit):
+    """Mark up to ``limit`` due tasks as running for ``worker_id`` and return them."""
+    claimed_at = now()
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due_tasks().select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Task.objects.filter(id__in=ids).update(
+                status=Task.RUNNING, locked_by=worker_id, locked_at=claimed_at, attempts=F('attempts') + 1)
+    else:
+        # No row locks: take candidates and keep the ones our conditional
+        # UPDATE actually flipped; a competing worker's UPDATE matches nothing.
+        ids = []
+        for task_id in due_tasks().values_list('id', flat=True)[:limit * 2]:
+            if len(ids) >= limit:
+                break
+            if Task.objects.filter(id=task_id, status=Task.QUEUED).update(
+                    status=Task.RUNNING, locked_by=worker_id, locked_at=claimed_at, attempts=F('attempts') + 1):
+                ids.append(task_id)
+    return list(Task.objects.filter(id__in=ids).order_by('-priority', 'run_at'))
+
+
+def execute(pending):
+    func = registry.get(pending.name)
+    try:
+        if func is None:
+            raise LookupError(f"No task registered as {pending.name!r}")
+        func(**pending.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if pending.attempts < pending.max_attempts:
+            Task.objects.filter(pk=pending.pk).update(
+                status=Task.QUEUED, last_error=error, locked_by="", locked_at=None,
+                run_at=now() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (pending.attempts - 1)))
+        else:
+            Task.objects.filter(pk=pending.pk).update(status=Task.FAILED, last_error=error, finished_at=now())
+        return False
+    Task.objects.filter(pk=pending.pk).update(status=Task.DONE, finished_at=now())
+    return True
+
+
+def requeue_stale():
+    """Put tasks whose worker died mid-run back in the queue, or fail them once out of attempts.
+
+    ``claim`` already counted the attempt that died, so a task that keeps
+    killing its worker stops after ``max_attempts`` runs like any other.
+    """
+    stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=now() - STALE_AFTER)
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, last_error="Worker stopped responding during the last attempt",
+        locked_by="", locked_at=None, finished_at=now())
+    return stale.filter(attempts__lt=F('max_attempts')).update(status=Task.QUEUED, locked_by="", locked_at=None)
+
+
+def prune_finished():
+    """Delete done and failed tasks older than their retention period; returns how many were deleted."""
+    deleted, _ = Task.objects.filter(
+        Q(status=Task.DONE, finished_at__lt=now() - timedelta(days=settings.TASK_DONE_RETENTION_DAYS))
+        | Q(status=Task.FAILED, finished_at__lt=now() - timedelta(days=settings.TASK_FAILED_RETENTION_DAYS))
+    ).delete()
+    return deleted
+
+
+def schedule_periodic():
+    """Queue every TASK_SCHEDULE entry that is not already pending."""
+    for name, interval in settings.TASK_SCHEDULE.items():
+        enqueue(name, run_at=now() + timedelta(seconds=interval), unique_key=f"periodic:{name}")
+
+
+def run_pending(worker_id=None):
+    """Run every due task in this thread; returns how many ran. Handy in tests and scripts."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    count = 0
+    while batch := claim(worker_id, 10):
+        for pending in batch:
+            execute(pending)
+            count += 1
+    return count
+
+
+class Worker:
+    def __init__(self, threads=4, poll_interval=1.0, name=None):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.worker_id = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+        self.busy = 0
+        self.busy_lock = threading.Lock()
+
+    def run_one(self, pending):
+        close_old_connections()
+        try:
+            execute(pending)
+        finally:
+            with self.busy_lock:
+                self.busy -= 1
+            connection.close()
+
+    def run(self, once=False):
+        housekeeping_at = 0
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="quizapp-task") as pool:
+            while not self.stopping.is_set():
+                if time.monotonic() >= housekeeping_at:
+                    requeue_stale()
+                    if not once:
+                        schedule_periodic()
+                    housekeeping_at = time.monotonic() + 60
+
+                with self.busy_lock:
+                    free = self.threads - self.busy
+                batch = claim(self.worker_id, free) if free > 0 else []
+                with self.busy_lock:
+                    self.busy += len(batch)
+                for pending in batch:
+                    pool.submit(self.run_one, pending)
+
+                if not batch:
+                    if once and self.busy == 0:
+                        break
+                    self.stopping.wait(self.poll_interval)
+
+    def stop(self):
+        self.stopping.set()
@@ -1,3 +1,1147 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import LiveServerTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils.timezone import localdate, now
+from google import genai
+from google.genai import types
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from loadtest.fake_llm import FakeLLMServer
+from loadtest.run import MIX, SEED_FIXTURE, VirtualUser
+from PIL import Image
+
+from . import (
+    adaptive, analytics, archive, attempts, avatars, leaderboard, prompts, renderers, replica, search, tasks,
+    transfer, trends, utils, views,
+)
+from .admin import EstimatedCountPaginator
+from .circuit import CLOSED, HALF_OPEN, OPEN, CircuitOpen, llm_breaker
+from .models import DailyPerformance, GenerationCall, LeaderboardEntry, PooledQuiz, QuestionRating, QuestionStats, Quiz, QuizHistory, ReviewItem, Task, User, UserAnswer
+from .pool import record_demand
+from .ratelimit import admit_generation
+from .singleflight import generation_key, single_flight
+from .utils import PROVIDER_ERRORS, clean_question, create_quiz
+
+
+def question(i=0, **overrides):
+    return {
+        "question": f"Question {i}?",
+        "options": {"A": "one", "B": "two", "C": "three", "D": "four"},
+        "correct_answer": "A",
+        "difficulty": "Easy",
+        **overrides,
+    }
+
+
+def quiz_json(count):
+    return json.dumps([question(i) for i in range(count)])
+
+
+class QuestionValidationTests(TestCase):
+    invalid = [
+        question(correct_answer="AB"),
+        question(correct_answer=""),
+        question(correct_answer=1),
+        question(correct_answer=["A"]),
+        question(options={"A": "one", "B": "two", "C": "three"}),
+        question(options={"A": "one", "B": "", "C": "three", "D": "four"}),
+        question(options={"A": "one", "B": 2, "C": "three", "D": "four"}),
+        question(options={"A": "x" * 300, "B": "two", "C": "three", "D": "four"}),
+        question(question=["What?"]),
+        question(question=""),
+    ]
+
+    def test_clean_question_rejects_malformed_entries(self):
+        self.assertIsNotNone(clean_question(question()))
+        for entry in self.invalid:
+            with self.subTest(entry=entry):
+                self.assertIsNone(clean_question(entry))
+
+    @mock.patch("builtins.print")
+    def test_create_quiz_skips_invalid_entries(self, _):
+        quiz = create_quiz("Science", "d", "Physics", 10, json.dumps([question(1), *self.invalid]))
+        self.assertEqual(quiz.questions.count(), 1)
+        self.assertIsNone(create_quiz("Science", "d", "Physics", 10, json.dumps(self.invalid)))
+
+    def test_import_counts_invalid_rows(self):
+        admin = User.objects.create_user(email="admin@example.com", username="admin", password="x")
+        admin.is_admin = True
+        admin.save()
+        api = APIClient()
+        api.force_authenticate(admin)
+        lines = [
+            {"category": "Science", "subcategory": "Physics", "questions": [question(1)]},
+            {"category": "Science", "questions": self.invalid},
+            {"category": ["Science"], "questions": [question(2)]},
+            {"category": "Science", "title": {"t": 1}, "questions": [question(3)]},
+            {"category": "Science", "time_duration": "soon", "questions": [question(4)]},
+        ]
+        data = ("\n".join(json.dumps(line) for line in lines) + "\nnot json\n").encode() + b"\xff\n"
+        response = api.post("/api/quizzes/import/",
+                             {"file": SimpleUploadedFile("quizzes.jsonl", data)}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(response.json()["invalid"], 6)
+
+    def test_backfill_content_hashes(self):
+        quiz = create_quiz("Science", "d", "Physics", 10, quiz_json(3))
+        expected = quiz.content_hash
+        Quiz.objects.filter(pk=quiz.pk).update(content_hash="")
+
+        call_command("backfill_content_hashes", stdout=io.StringIO())
+        quiz.refresh_from_db()
+        self.assertEqual(quiz.content_hash, expected)
+
+
+class SingleFlightTests(TransactionTestCase):
+    callers = 10
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def fake_generate_quiz(self, **kwargs):
+        with self.calls_lock:
+            self.calls += 1
+        # Stay in flight long enough for every other caller to arrive.
+        time.sleep(0.2)
+        return quiz_json(kwargs["num_questions"])
+
+    def test_concurrent_identical_generations_share_one_call(self):
+        key = generation_key("Science", "Physics", 5, 10)
+        barrier = threading.Barrier(self.callers)
+        results = []
+
+        def generate():
+            text = views.generate_quiz(category="Science", subcategory="Physics", num_questions=5)
+            return create_quiz("Science", "API Created", "Physics", 10, text).id
+
+        def caller():
+            barrier.wait()
+            try:
+                results.append(single_flight(key, generate))
+            finally:
+                connection.close()
+
+        with mock.patch.object(views, "generate_quiz", side_effect=self.fake_generate_quiz):
+            threads = [threading.Thread(target=caller) for _ in range(self.callers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(results), self.callers)
+        self.assertEqual(len({quiz_id for quiz_id, _ in results}), 1)
+        self.assertEqual(sum(not shared for _, shared in results), 1)
+        self.assertEqual(Quiz.objects.count(), 1)
+
+    def test_errors_reach_every_waiting_caller(self):
+        key = generation_key("Science", "Physics", 5, 10)
+        barrier = threading.Barrier(self.callers)
+        errors = []
+
+        def generate():
+            self.fake_generate_quiz(num_questions=5)
+            raise RuntimeError("provider down")
+
+        def caller():
+            barrier.wait()
+            try:
+                single_flight(key, generate)
+            except RuntimeError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=caller) for _ in range(self.callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(errors), self.callers)
+
+
+@override_settings(CIRCUIT_MIN_CALLS=2, CIRCUIT_FAILURE_RATE=0.5, CIRCUIT_COOLDOWN_SECONDS=1)
+class CircuitBreakerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = FakeLLMServer(latency_ms=0, jitter_ms=0).start()
+        cls.client_patch = mock.patch.object(utils, "client", genai.Client(
+            api_key="test", http_options=types.HttpOptions(base_url=cls.fake.url)))
+        cls.client_patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client_patch.stop()
+        cls.fake.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.fake.failure_rate = 0.0
+
+    def generate(self):
+        return utils.generate_quiz(category="Science", subcategory="Physics", num_questions=3)
+
+    def trip(self):
+        self.fake.failure_rate = 1.0
+        for _ in range(2):
+            with self.assertRaises(PROVIDER_ERRORS):
+                self.generate()
+
+    def test_failures_open_the_circuit_and_calls_fail_fast(self):
+        self.trip()
+        self.assertEqual(llm_breaker.status()["state"], OPEN)
+
+        calls = self.fake.calls
+        with self.assertRaises(CircuitOpen) as raised:
+            self.generate()
+        self.assertEqual(self.fake.calls, calls)
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+
+    def test_successful_probe_closes_the_circuit(self):
+        self.trip()
+        time.sleep(1.1)
+        self.assertEqual(llm_breaker.status()["state"], HALF_OPEN)
+
+        self.fake.failure_rate = 0.0
+        self.assertIsNotNone(utils.parse_questions(self.generate()))
+        self.assertEqual(llm_breaker.status()["state"], CLOSED)
+
+    def test_failed_probe_opens_the_circuit_again(self):
+        self.trip()
+        time.sleep(1.1)
+        with self.assertRaises(PROVIDER_ERRORS):
+            self.generate()
+        self.assertEqual(llm_breaker.status()["state"], OPEN)
+
+    def test_create_quiz_returns_503_while_open(self):
+        user = User.objects.create_user(email="breaker@example.com", username="breaker", password="x")
+        api = APIClient()
+        api.force_authenticate(user)
+        llm_breaker.open()
+        calls = self.fake.calls
+
+        response = api.post("/api/quizzes/create/", {
+            "category": "Science", "subcategory": "Physics", "questionCount": 3, "duration": 10,
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], str(response.json()["retry_after"]))
+        self.assertEqual(self.fake.calls, calls)
+
+    def test_create_quiz_falls_back_to_a_stored_quiz_while_open(self):
+        user = User.objects.create_user(email="breaker@example.com", username="breaker", password="x")
+        api = APIClient()
+        api.force_authenticate(user)
+        stored = create_quiz("Science", "d", "Physics", 10, quiz_json(3))
+        llm_breaker.open()
+
+        response = api.post("/api/quizzes/create/", {
+            "category": "Science", "subcategory": "Physics", "questionCount": 3, "duration": 10,
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["quiz_id"], stored.id)
+        self.assertTrue(response.json()["fallback"])
+
+
+class TaskQueueTests(TestCase):
+    def stale_task(self, attempts, max_attempts=3):
+        return Task.objects.create(name="tests.noop", run_at=now(), status=Task.RUNNING, attempts=attempts,
+                                   max_attempts=max_attempts, locked_by="gone", locked_at=now() - timedelta(hours=1))
+
+    def test_requeue_stale_respects_max_attempts(self):
+        retry, exhausted = self.stale_task(attempts=1), self.stale_task(attempts=3)
+        self.assertEqual(tasks.requeue_stale(), 1)
+
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retry.status, retry.locked_by), (Task.QUEUED, ""))
+        self.assertEqual(exhausted.status, Task.FAILED)
+        self.assertIsNotNone(exhausted.finished_at)
+
+    @override_settings(TASK_DONE_RETENTION_DAYS=7, TASK_FAILED_RETENTION_DAYS=30)
+    def test_prune_finished_keeps_recent_and_pending_tasks(self):
+        def finished(status, days):
+            return Task.objects.create(name="tests.noop", run_at=now(), status=status,
+                                       finished_at=now() - timedelta(days=days))
+
+        finished(Task.DONE, 8)
+        finished(Task.FAILED, 31)
+        recent_done, recent_failed = finished(Task.DONE, 1), finished(Task.FAILED, 8)
+        queued = Task.objects.create(name="tests.noop", run_at=now() - timedelta(days=60))
+
+        self.assertEqual(tasks.prune_finished(), 2)
+        self.assertEqual(set(Task.objects.values_list("id", flat=True)),
+                         {recent_done.id, recent_failed.id, queued.id})
+
+
+@override_settings(GENERATION_WINDOW_SECONDS=3600, GENERATION_USER_LIMIT=3, GENERATION_GLOBAL_LIMIT=1000,
+                   GENERATION_USER_DAILY_TOKENS=1000, GENERATION_GLOBAL_DAILY_TOKENS=100000)
+class AdmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SimpleNamespace(pk=1)
+
+    def test_concurrent_requests_cannot_overshoot_the_limit(self):
+        barrier = threading.Barrier(10)
+        decisions = []
+
+        def request():
+            barrier.wait()
+            decisions.append(admit_generation(self.user, 10))
+
+        threads = [threading.Thread(target=request) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(decision.allowed for decision in decisions), 3)
+
+    def test_rejected_requests_are_not_counted(self):
+        self.assertFalse(admit_generation(self.user, 5000).allowed)
+        for _ in range(3):
+            self.assertTrue(admit_generation(self.user, 10).allowed)
+        rejected = admit_generation(self.user, 10)
+        self.assertFalse(rejected.allowed)
+        self.assertGreater(rejected.retry_after, 0)
+        self.assertTrue(admit_generation(SimpleNamespace(pk=2), 10).allowed)
+
+
+class QueryParameterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="params@example.com", username="params", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_leaderboard_rejects_a_non_numeric_quiz(self):
+        response = self.api.get("/api/leaderboard/", {"scope": "quiz", "quiz": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_leaderboard_clamps_the_limit(self):
+        for limit in ("-3", "0", "1000"):
+            with self.subTest(limit=limit):
+                response = self.api.get("/api/leaderboard/", {"limit": limit})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.api.get("/api/leaderboard/", {"limit": "many"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_review_clamps_the_limit(self):
+        for limit in ("-1", "0", "1000"):
+            with self.subTest(limit=limit):
+                response = self.api.get("/api/review/", {"limit": limit})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_question_analytics_clamps_paging(self):
+        self.user.is_admin = True
+        self.user.save()
+        for params in ({"offset": "-5"}, {"limit": "-1"}, {"limit": "0", "offset": "3"}):
+            with self.subTest(params=params):
+                response = self.api.get("/api/analytics/questions/", params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json()["pending_submissions"], 0)
+
+    def test_create_quiz_requires_a_positive_duration(self):
+        topic = {"category": "Science", "subcategory": "Physics", "questionCount": 5}
+        for extra in ({}, {"duration": None}, {"duration": ""}, {"duration": "soon"}, {"duration": 0},
+                      {"duration": -5}):
+            with self.subTest(**extra):
+                response = self.api.post("/api/quizzes/create/", {**topic, **extra}, format="json")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AdminPaginatorTests(TestCase):
+    def test_large_changelists_render(self):
+        admin_user = User.objects.create_superuser(username="admin", email="admin@example.com", password="x")
+        self.client.force_login(admin_user)
+        for url in ("/admin/", "/admin/quizapp/quizhistory/", "/admin/quizapp/useranswer/",
+                    "/admin/quizapp/question/"):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_count_is_exact_without_a_planner_estimate(self):
+        created = [Task.objects.create(name="tests.noop", run_at=now()) for _ in range(5)]
+        Task.objects.filter(pk__in=[task.pk for task in created[:4]]).delete()
+        with mock.patch("quizapp.admin.ESTIMATED_COUNT_THRESHOLD", 0):
+            self.assertEqual(EstimatedCountPaginator(Task.objects.all().order_by("id"), 10).count, 1)
+
+
+class PassThresholdTests(TestCase):
+    def test_history_uses_the_percentage_score(self):
+        user = User.objects.create_user(email="pass@example.com", username="pass", password="x")
+        api = APIClient()
+        api.force_authenticate(user)
+        quiz = create_quiz("Science", "d", "Physics", 10, quiz_json(10))
+        for score, passed in ((40, False), (50, True)):
+            history = quiz.quiz_histories.create(user=user, score=score, total_questions=10,
+                                                 correct_answers=score // 10, started_at=now(), completed_at=now())
+            with self.subTest(score=score):
+                detail = api.get(f"/api/history/{history.id}/").json()["history"]
+                result = api.get(f"/api/quizzes/{history.id}/results/").json()["result"]
+                self.assertEqual(detail["passed"], passed)
+                self.assertEqual(result["passed"], passed)
+
+
+class AdaptiveRatingTests(TestCase):
+    def test_record_answers_updates_all_questions_in_one_statement(self):
+        user = User.objects.create_user(email="elo@example.com", username="elo", password="x")
+        quiz = create_quiz("Science", "d", "Physics", 10, quiz_json(4))
+        question_ids = list(quiz.questions.order_by('id').values_list('id', flat=True))
+        results = [(question_ids[0], True), (question_ids[1], False), (question_ids[2], True)]
+        before = dict(QuestionRating.objects.values_list('question_id', 'rating'))
+
+        # The per-answer Elo sequence the batched update has to reproduce.
+        user_rating, expected = adaptive.get_user_rating(user), dict(before)
+        for question_id, is_correct in results:
+            surprise = float(is_correct) - adaptive.expected_score(user_rating, before[question_id])
+            user_rating += adaptive.USER_K * surprise
+            expected[question_id] -= adaptive.QUESTION_K * surprise
+
+        with CaptureQueriesContext(connection) as queries:
+            new_rating = adaptive.record_answers(user, results)
+        updates = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "quizapp_questionrating"')]
+        self.assertEqual(len(updates), 1)
+        self.assertAlmostEqual(new_rating, user_rating)
+        for question_id, rating, answers in QuestionRating.objects.values_list('question_id', 'rating', 'answers'):
+            self.assertAlmostEqual(rating, expected[question_id])
+            self.assertEqual(answers, 0 if question_id == question_ids[3] else 1)
+
+
+class SearchTests(TestCase):
+    def test_unclaimed_pool_quizzes_are_hidden(self):
+        user = User.objects.create_user(email="search@example.com", username="search", password="x")
+        api = APIClient()
+        api.force_authenticate(user)
+        served = create_quiz("Science", "d", "Physics", 10, quiz_json(2))
+        pooled = create_quiz("Science", "d", "Physics", 10, quiz_json(2))
+        PooledQuiz.objects.create(quiz=pooled, demand=record_demand("Science", "Physics", 2))
+
+        for params in ({"q": "Science"}, {"q": "Question", "type": "question"}):
+            with self.subTest(params=params):
+                results = api.get("/api/search/", params).json()["results"]
+                self.assertTrue(results)
+                self.assertEqual({result["quiz_id"] for result in results}, {served.id})
+        with mock.patch.object(search, "get_index", return_value=None):
+            hits = search.search("Question")
+        self.assertEqual({quiz_id for _, _, quiz_id in hits}, {served.id})
+
+
+@override_settings(ATTEMPT_FLUSH_SECONDS=3600)
+class AutosaveTests(TransactionTestCase):
+    def test_concurrent_saves_keep_every_answer(self):
+        cache.clear()
+        user = User.objects.create_user(email="autosave@example.com", username="autosave", password="x")
+        quiz = create_quiz("Science", "d", "Physics", 10, quiz_json(8))
+        history, _ = attempts.start_attempt(user, quiz)
+        question_ids = list(quiz.questions.order_by('id').values_list('id', flat=True))
+        attempts.autosave(history.id, user, {})
+        get_answer_key = attempts.get_answer_key
+
+        def slow_answer_key(quiz_id):
+            # Widen the window between reading the draft and writing it back.
+            time.sleep(0.05)
+            return get_answer_key(quiz_id)
+
+        barrier = threading.Barrier(len(question_ids))
+
+        def save(question_id):
+            barrier.wait()
+            try:
+                attempts.autosave(history.id, user, {question_id: "B"})
+            finally:
+                connection.close()
+
+        with mock.patch.object(attempts, "get_answer_key", side_effect=slow_answer_key):
+            threads = [threading.Thread(target=save, args=(question_id,)) for question_id in question_ids]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(attempts.saved_answers(history.id, user), {str(q): "B" for q in question_ids})
+
+
+class AdaptiveAnswerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="adaptive@example.com", username="adaptive", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.quiz = create_quiz("Science", "d", "Physics", 10, quiz_json(3))
+
+    def test_only_served_questions_are_graded_once(self):
+        served = self.api.get("/api/adaptive/next/").json()["question"]["id"]
+        other = self.quiz.questions.exclude(id=served).first().id
+
+        response = self.api.post("/api/adaptive/answer/", {"questionId": other, "selected": 0}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertNotIn("correct", response.json())
+
+        response = self.api.post("/api/adaptive/answer/", {"questionId": served, "selected": 0}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()["is_correct"])
+
+        response = self.api.post("/api/adaptive/answer/", {"questionId": served, "selected": 0}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_non_numeric_question_id_is_rejected(self):
+        response = self.api.post("/api/adaptive/answer/", {"questionId": "abc", "selected": 0}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReviewAnswerTests(TestCase):
+    def test_only_due_items_of_the_user_are_graded(self):
+        user = User.objects.create_user(email="review@example.com", username="review", password="x")
+        api = APIClient()
+        api.force_authenticate(user)
+        due, later, unknown = create_quiz("Science", "d", "Physics", 10, quiz_json(3)).questions.order_by('id')
+        ReviewItem.objects.create(user=user, question=due, due_at=now() - timedelta(hours=1))
+        ReviewItem.objects.create(user=user, question=later, due_at=now() + timedelta(days=3))
+
+        response = api.post("/api/review/", {"answers": {due.id: 1, later.id: 0, unknown.id: 0}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result["question_id"] for result in response.json()["results"]], [due.id])
+        self.assertEqual(sorted(response.json()["skipped"]), sorted([later.id, unknown.id]))
+        self.assertFalse(ReviewItem.objects.filter(question=unknown).exists())
+
+
+class QuizResultTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="result@example.com", username="result", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.quiz = create_quiz("Science", "d", "Physics", 10, quiz_json(4))
+        self.answers = {str(q): "A" for q in self.quiz.questions.values_list('id', flat=True)[:3]}
+
+    def submit(self, quiz=None, **body):
+        quiz = quiz or self.quiz
+        return self.api.post(f"/api/quizzes/{quiz.id}/results/", {"userAnswers": self.answers, **body}, format="json")
+
+    def test_user_answers_must_be_an_object(self):
+        for answers in (["A", "B"], "A", 3):
+            with self.subTest(answers=answers):
+                response = self.submit(userAnswers=answers)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_results_are_private_to_their_owner(self):
+        result_id = self.submit().json()["result_id"]
+        self.assertEqual(self.api.get(f"/api/quizzes/{result_id}/results/").status_code, status.HTTP_200_OK)
+
+        other = User.objects.create_user(email="other@example.com", username="other", password="x")
+        self.api.force_authenticate(other)
+        self.assertEqual(self.api.get(f"/api/quizzes/{result_id}/results/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_replayed_submission_returns_the_same_score(self):
+        first = self.submit(idempotencyKey="attempt-1").json()
+        replay = self.submit(idempotencyKey="attempt-1").json()
+        self.assertEqual(first["score"], 75)
+        self.assertEqual(type(first["score"]), type(replay["score"]))
+        self.assertEqual(first["score"], replay["score"])
+
+    def test_idempotency_key_replays_the_original_submission(self):
+        first = self.submit(idempotencyKey="attempt-2")
+        self.answers = {}
+        replay = self.submit(idempotencyKey="attempt-2")
+        self.assertEqual(replay.status_code, status.HTTP_200_OK)
+        self.assertEqual(replay.json()["result_id"], first.json()["result_id"])
+        self.assertEqual(replay.json()["message"], "Quiz already submitted")
+        self.assertEqual(self.user.quiz_histories.count(), 1)
+
+        header = self.api.post(f"/api/quizzes/{self.quiz.id}/results/", {"userAnswers": {}}, format="json",
+                               HTTP_IDEMPOTENCY_KEY="attempt-2")
+        self.assertEqual(header.json()["result_id"], first.json()["result_id"])
+
+    def test_idempotency_key_reused_for_another_quiz_conflicts(self):
+        self.submit(idempotencyKey="attempt-3")
+        other = create_quiz("History", "d", "Rome", 10, quiz_json(2))
+        response = self.submit(quiz=other, idempotencyKey="attempt-3")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(other.quiz_histories.exists())
+
+    def test_idempotency_key_must_be_a_short_string(self):
+        for key in (12345, ["a"], "k" * 65):
+            with self.subTest(key=key):
+                self.assertEqual(self.submit(idempotencyKey=key).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_malformed_started_at_is_rejected(self):
+        for started_at in ("yesterday", 12345, ["2024-01-01"]):
+            with self.subTest(started_at=started_at):
+                self.assertEqual(self.submit(startedAt=started_at).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.user.quiz_histories.exists())
+
+    def test_server_clock_decides_completion_time(self):
+        before = now()
+        result_id = self.submit(startedAt=(before + timedelta(hours=1)).isoformat(),
+                                completedAt="2000-01-01T00:00:00").json()["result_id"]
+        history = self.user.quiz_histories.get(id=result_id)
+        self.assertGreaterEqual(history.completed_at, before)
+        self.assertLessEqual(history.started_at, history.completed_at)
+
+
+class QuestionStatsRebuildTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="stats@example.com", username="stats", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.quiz = create_quiz("Science", "d", "Physics", 10, quiz_json(3))
+        self.question_ids = list(self.quiz.questions.values_list('id', flat=True))
+        self.api.post(f"/api/quizzes/{self.quiz.id}/results/",
+                      {"userAnswers": {str(q): "A" for q in self.question_ids}}, format="json")
+
+    def attempts(self):
+        return sorted(QuestionStats.objects.values_list('attempts', flat=True))
+
+    def test_rebuild_does_not_double_count_queued_submissions(self):
+        self.assertEqual(analytics.pending_submissions(), 1)
+        analytics.rebuild_question_stats()
+        self.assertEqual(self.attempts(), [1, 1, 1])
+
+        tasks.run_pending("test")
+        self.assertEqual(analytics.pending_submissions(), 0)
+        self.assertEqual(self.attempts(), [1, 1, 1])
+
+    def test_rebuild_after_the_task_ran_matches_it(self):
+        tasks.run_pending("test")
+        counted = list(QuestionStats.objects.order_by('question_id').values('attempts', 'correct', 'picks_a'))
+        analytics.rebuild_question_stats()
+        self.assertEqual(list(QuestionStats.objects.order_by('question_id').values('attempts', 'correct', 'picks_a')),
+                         counted)
+
+
+class PackedAnswerTests(TestCase):
+    def test_round_trip(self):
+        rows = [(7, "A", "A"), (3, "D", "B"), (3000000, "C", "C"), (12, "B", "D"), (13, "A", "A")]
+        self.assertEqual(list(archive.unpack_answers(archive.pack_answers(rows))), rows)
+
+    def test_empty_attempt(self):
+        blob = archive.pack_answers([])
+        self.assertEqual(blob, bytes([archive.FORMAT_VERSION, 0]))
+        self.assertEqual(list(archive.unpack_answers(blob)), [])
+
+    def test_unanswered_questions_keep_their_place(self):
+        rows = [(1, "", "B"), (2, "A", "A"), (3, "", "D")]
+        self.assertEqual(list(archive.unpack_answers(archive.pack_answers(rows))), rows)
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            list(archive.unpack_answers(bytes([archive.FORMAT_VERSION + 1, 0])))
+
+
+class ArchiveHistoriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="archive@example.com", username="archive", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.quiz = create_quiz("Science", "d", "Physics", 10, quiz_json(4))
+        self.question_ids = list(self.quiz.questions.order_by('id').values_list('id', flat=True))
+
+    def submit(self, answers):
+        response = self.api.post(f"/api/quizzes/{self.quiz.id}/results/", {"userAnswers": answers}, format="json")
+        return QuizHistory.objects.get(id=response.json()["result_id"])
+
+    def test_packs_old_histories_only(self):
+        old = [self.submit({str(self.question_ids[0]): "A", str(self.question_ids[2]): "C"}) for _ in range(3)]
+        recent = self.submit({str(self.question_ids[1]): "B"})
+        QuizHistory.objects.filter(id__in=[h.id for h in old]).update(completed_at=now() - timedelta(days=100))
+
+        self.assertEqual(archive.archive_histories(90, batch_size=2), 3)
+
+        self.assertFalse(UserAnswer.objects.filter(history__in=old).exists())
+        self.assertTrue(UserAnswer.objects.filter(history=recent).exists())
+        recent.refresh_from_db()
+        self.assertIsNone(recent.packed_answers)
+        for history in old:
+            history.refresh_from_db()
+            self.assertEqual(list(archive.unpack_answers(history.packed_answers)),
+                             [(self.question_ids[0], "A", "A"), (self.question_ids[2], "C", "A")])
+
+    def test_running_again_finds_nothing_to_do(self):
+        history = self.submit({str(self.question_ids[0]): "A"})
+        QuizHistory.objects.filter(id=history.id).update(completed_at=now() - timedelta(days=100))
+        self.assertEqual(archive.archive_histories(90), 1)
+        self.assertEqual(archive.archive_histories(90), 0)
+
+    def test_answers_read_back_the_same_after_archival(self):
+        history = self.submit({str(self.question_ids[0]): "A", str(self.question_ids[1]): "C",
+                               str(self.question_ids[3]): "A"})
+        before = archive.history_answer_values(history)
+        result = self.api.get(f"/api/quizzes/{history.id}/results/").json()["result"]["answers"]
+
+        archive.archive_histories(0)
+        history.refresh_from_db()
+        self.assertIsNotNone(history.packed_answers)
+        self.assertEqual(archive.history_answer_values(history), before)
+        self.assertEqual([row[2:] for row in before], [("A", "A", True), ("C", "A", False), ("A", "A", True)])
+        self.assertEqual(self.api.get(f"/api/quizzes/{history.id}/results/").json()["result"]["answers"], result)
+
+    @override_settings(ANSWER_ARCHIVE_DAYS=30)
+    def test_scheduled_task_uses_the_configured_age(self):
+        old, recent = self.submit({str(self.question_ids[0]): "A"}), self.submit({str(self.question_ids[0]): "B"})
+        QuizHistory.objects.filter(id=old.id).update(completed_at=now() - timedelta(days=31))
+        QuizHistory.objects.filter(id=recent.id).update(completed_at=now() - timedelta(days=29))
+
+        tasks.enqueue("archive.answers")
+        tasks.run_pending("test")
+        self.assertEqual(set(QuizHistory.objects.filter(packed_answers__isnull=False).values_list('id', flat=True)),
+                         {old.id})
+
+
+class HistoryExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="export@example.com", username="export", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.quiz = create_quiz("Science", "d", "Physics", 10, quiz_json(3))
+        self.question_ids = list(self.quiz.questions.order_by('id').values_list('id', flat=True))
+        self.history_ids = [self.submit({str(q): letter for q in self.question_ids[:count]})
+                            for count, letter in ((3, "A"), (1, "B"), (0, "A"), (2, "C"))]
+
+    def submit(self, answers):
+        response = self.api.post(f"/api/quizzes/{self.quiz.id}/results/", {"userAnswers": answers}, format="json")
+        return response.json()["result_id"]
+
+    def export(self, export_type="ndjson", **params):
+        response = self.api.get("/api/history/export/", {"type": export_type, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode()
+
+    def records(self, **params):
+        return [json.loads(line) for line in self.export(**params).splitlines()]
+
+    def test_csv_and_ndjson_carry_the_same_data(self):
+        records = self.records()
+        rows = list(csv.reader(io.StringIO(self.export("csv"))))
+        self.assertEqual(rows[0], transfer.HISTORY_CSV_HEADER)
+
+        expected = []
+        for record in records:
+            head = [str(record[key]) for key in ("id", "quiz_id", "quiz_title", "category", "subcategory", "score",
+                                                 "correct_answers", "total_questions", "started_at",
+                                                 "completed_at")]
+            if not record["answers"]:
+                expected.append(head + [""] * 5)
+            for answer in record["answers"]:
+                expected.append(head + [str(answer[key]) for key in ("question_id", "question", "selected_option",
+                                                                     "correct_option", "is_correct")])
+        self.assertEqual(rows[1:], expected)
+        self.assertEqual([record["id"] for record in records], self.history_ids)
+        self.assertEqual([len(record["answers"]) for record in records], [3, 1, 0, 2])
+
+    def test_cursor_resumes_after_the_last_exported_history(self):
+        first, *rest = self.records()
+        self.assertEqual(self.records(cursor=first["id"]), rest)
+        self.assertEqual(self.records(cursor=self.history_ids[-1]), [])
+
+    def test_other_users_and_open_attempts_are_left_out(self):
+        other = User.objects.create_user(email="other@example.com", username="other", password="x")
+        self.api.force_authenticate(other)
+        self.submit({str(self.question_ids[0]): "A"})
+        attempts.start_attempt(self.user, self.quiz)
+        self.api.force_authenticate(self.user)
+        self.assertEqual([record["id"] for record in self.records()], self.history_ids)
+
+    def test_packed_histories_export_like_rows(self):
+        before = self.records()
+        archive.archive_histories(0)
+        self.assertFalse(UserAnswer.objects.exists())
+        self.assertEqual(self.records(), before)
+
+    def test_packed_answers_are_read_in_one_query_per_chunk(self):
+        archive.archive_histories(0)
+        with CaptureQueriesContext(connection) as few:
+            list(transfer.iter_user_history(self.user))
+        for _ in range(6):
+            self.submit({str(self.question_ids[1]): "D"})
+        archive.archive_histories(0)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(len(list(transfer.iter_user_history(self.user))), 10)
+        self.assertEqual(len(many), len(few))
+
+
+class PromptBatchingTests(TestCase):
+    def topics(self, *sizes):
+        return [prompts.TopicRequest(f"Topic {i}", "", size) for i, size in enumerate(sizes)]
+
+    def test_batches_stay_within_the_output_budget(self):
+        topics = self.topics(40, 40, 40, 40, 40)
+        batches = prompts.plan_batches(topics, max_output_tokens=6000)
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual([topic for batch in batches for topic in batch], topics)
+        for batch in batches:
+            self.assertLessEqual(sum(prompts.estimate_output_tokens(t.num_questions) for t in batch), 6000)
+
+    def test_batches_hold_at_most_max_batch_topics(self):
+        batches = prompts.plan_batches(self.topics(*[1] * (prompts.MAX_BATCH_TOPICS + 2)))
+        self.assertEqual([len(batch) for batch in batches], [prompts.MAX_BATCH_TOPICS, 2])
+
+    def test_an_oversized_topic_gets_a_batch_of_its_own(self):
+        batches = prompts.plan_batches(self.topics(5, 200, 5), max_output_tokens=1000)
+        self.assertEqual([[t.num_questions for t in batch] for batch in batches], [[5], [200], [5]])
+        self.assertEqual(prompts.plan_batches([]), [])
+
+    def test_split_batch_maps_keys_back_to_topics(self):
+        reply = 'Sure: {"t2": [{"question": "b"}], "t1": [{"question": "a"}]} done'
+        self.assertEqual(prompts.split_batch(reply, 2), [[{"question": "a"}], [{"question": "b"}]])
+
+    def test_split_batch_marks_missing_and_malformed_topics(self):
+        reply = json.dumps({"t1": [], "t2": {"question": "b"}, "t3": "none", "t5": [1]})
+        self.assertEqual(prompts.split_batch(reply, 4), [[], None, None, None])
+        for reply in ("", "no json here", "{broken", "[[1], [2]]", "{} extra }"):
+            with self.subTest(reply=reply):
+                self.assertEqual(prompts.split_batch(reply, 2), [None, None])
+
+
+class StructuredOutputTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.fake = FakeLLMServer(latency_ms=0, jitter_ms=0).start()
+        self.addCleanup(self.fake.stop)
+        for name, value in (("client", genai.Client(api_key="test",
+                                                    http_options=types.HttpOptions(base_url=self.fake.url))),
+                            ("AI_STRUCTURED_OUTPUT", True), ("schema_supported", True)):
+            patcher = mock.patch.object(utils, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def generate(self):
+        return utils.parse_questions(utils.generate_quiz(category="Science", subcategory="Physics", num_questions=3))
+
+    def calls(self):
+        return list(GenerationCall.objects.order_by('id').values_list('structured', 'succeeded', 'parsed'))
+
+    def test_schema_is_used_when_supported(self):
+        self.assertEqual(len(self.generate()), 3)
+        self.assertEqual(self.calls(), [(True, True, True)])
+        self.assertTrue(utils.schema_supported)
+
+    def test_rejected_schema_falls_back_to_the_text_prompt(self):
+        self.fake.schema_support = False
+        self.assertEqual(len(self.generate()), 3)
+        self.assertEqual(self.calls(), [(True, False, False), (False, True, True)])
+        self.assertFalse(utils.schema_supported)
+
+        # Later calls go straight to the text prompt.
+        self.assertEqual(len(self.generate()), 3)
+        self.assertEqual(self.calls()[2:], [(False, True, True)])
+
+    def test_other_client_errors_are_not_retried_without_schema(self):
+        with mock.patch.object(self.fake, "respond", return_value=(
+                400, {"error": {"code": 400, "status": "INVALID_ARGUMENT", "message": "API key not valid."}})):
+            with self.assertRaises(PROVIDER_ERRORS):
+                self.generate()
+        self.assertEqual(self.calls(), [(True, False, False)])
+        self.assertTrue(utils.schema_supported)
+
+
+class RendererTests(TestCase):
+    data = {
+        "decimal": Decimal("12.50"),
+        "aware": datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc),
+        "naive": datetime(2024, 5, 6, 7, 8, 9),
+        "day": date(2024, 5, 6),
+        "duration": timedelta(seconds=90),
+        "uuid": uuid.UUID(int=7),
+        "nested": [{1: "int key", "text": "é ✓", "none": None, "float": 0.1}],
+    }
+
+    @skipUnless(renderers.orjson, "orjson is not installed")
+    def test_orjson_output_matches_json_renderer(self):
+        self.assertEqual(renderers.FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indented_output_uses_json_renderer(self):
+        rendered = renderers.FastJSONRenderer().render({"a": [1]}, "application/json; indent=2")
+        self.assertEqual(rendered, b'{\n  "a": [\n    1\n  ]\n}')
+
+
+class DailyPerformanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="trends@example.com", username="trends", password="x")
+        self.science = create_quiz("Science", "d", "Physics", 10, quiz_json(2))
+        self.history = create_quiz("History", "d", "Rome", 10, quiz_json(2))
+        # 20:00 UTC is already the next day in the project's time zone.
+        self.base = datetime(2024, 3, 10, 20, 0, tzinfo=timezone.utc)
+
+    def attempt(self, quiz, score, day=0, minutes=5):
+        completed_at = self.base + timedelta(days=day)
+        history = QuizHistory.objects.create(user=self.user, quiz=quiz, score=score, completed_at=completed_at,
+                                             started_at=completed_at - timedelta(minutes=minutes))
+        trends.record_daily(history)
+        return history
+
+    def seed(self):
+        for quiz, score, day, minutes in ((self.science, 0, 0, 3), (self.science, 20, 0, 4),
+                                          (self.history, 20.5, 0, 5), (self.science, 100, 1, 6),
+                                          (self.history, 60, 3, 7), (self.history, 61, 3, 8)):
+            self.attempt(quiz, score, day, minutes)
+
+    def live_trends(self):
+        days = {}
+        for history in QuizHistory.objects.filter(user=self.user).order_by('completed_at'):
+            days.setdefault(localdate(history.completed_at), []).append(history)
+        return [{
+            "date": day.isoformat(),
+            "average_score": round(sum(h.score for h in histories) / len(histories), 2),
+            "quiz_count": len(histories),
+            "total_time": sum((h.completed_at - h.started_at).total_seconds() for h in histories),
+            "score_distribution": [
+                {"range": label, "count": sum(1 for h in histories if trends.bucket_column(h.score) == column)}
+                for label, column, _ in trends.SCORE_BUCKETS
+            ],
+        } for day, histories in days.items()]
+
+    def stored(self):
+        return list(DailyPerformance.objects.order_by('day', 'category_id').values(
+            'category_id', 'day', *trends.COUNTERS))
+
+    def test_rollup_matches_a_live_aggregate(self):
+        self.seed()
+        start, end = localdate(self.base), localdate(self.base + timedelta(days=3))
+        self.assertEqual(trends.performance_trends(self.user, start, end), self.live_trends())
+
+        incremental = self.stored()
+        trends.rebuild_daily_performance()
+        self.assertEqual(self.stored(), incremental)
+
+    def test_days_without_attempts_are_left_out(self):
+        self.seed()
+        start = localdate(self.base)
+        dates = [row["date"] for row in trends.performance_trends(self.user, start, start + timedelta(days=3))]
+        self.assertEqual(dates, [(start + timedelta(days=d)).isoformat() for d in (0, 1, 3)])
+        empty = start + timedelta(days=2)
+        self.assertEqual(trends.performance_trends(self.user, empty, empty), [])
+
+    def test_rerunning_the_rebuild_for_a_day_is_idempotent(self):
+        self.seed()
+        day = localdate(self.base + timedelta(days=3))
+        trends.rebuild_daily_performance(since=day)
+        trends.rebuild_daily_performance(since=day)
+        self.attempt(self.history, 90, day=3)
+        incremental = self.stored()
+
+        trends.rebuild_daily_performance(since=day)
+        self.assertEqual(self.stored(), incremental)
+        self.assertEqual(DailyPerformance.objects.filter(day=day).count(), 1)
+        self.assertEqual(DailyPerformance.objects.get(day=day).attempts, 3)
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = User.objects.create_user(email="avatar@example.com", username="avatar", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def image(self, size=(300, 200), mode="RGBA", name="me.png"):
+        out = io.BytesIO()
+        Image.new(mode, size, (200, 30, 30, 255) if mode == "RGBA" else (200, 30, 30)).save(out, "PNG")
+        return SimpleUploadedFile(name, out.getvalue(), content_type="image/png")
+
+    def upload(self, avatar):
+        return self.api.put("/api/profile/", {"avatar": avatar}, format="multipart")
+
+    def profile(self):
+        self.user.refresh_from_db()
+        return self.api.get("/api/profile/").json()["user"]
+
+    def test_upload_queues_thumbnails_that_are_served_immutably(self):
+        self.assertEqual(self.upload(self.image()).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.profile()["avatar_thumbnails"], {})
+        self.assertTrue(Task.objects.filter(name="avatars.resize", status=Task.QUEUED).exists())
+
+        tasks.run_pending("test")
+        urls = self.profile()["avatar_thumbnails"]
+        self.assertEqual(set(urls), {str(size) for size in avatars.SIZES})
+
+        for size, url in urls.items():
+            response = self.api.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["Content-Type"], "image/webp")
+            self.assertIn("immutable", response["Cache-Control"])
+            with Image.open(io.BytesIO(b"".join(response.streaming_content))) as thumbnail:
+                self.assertEqual((thumbnail.format, thumbnail.size), ("WEBP", (int(size), int(size))))
+            response.close()
+        self.assertEqual(self.profile()["avatar_url"], urls[str(max(avatars.SIZES))])
+
+    def test_replaced_upload_does_not_get_stale_thumbnails(self):
+        self.upload(self.image(name="first.png"))
+        first = User.objects.get(pk=self.user.pk).avatar.name
+        self.upload(self.image(size=(50, 80), mode="RGB", name="second.png"))
+        avatars.resize_avatar(self.user.pk, first)
+        self.assertNotIn("source", User.objects.get(pk=self.user.pk).avatar_thumbnails or {})
+
+        tasks.run_pending("test")
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.avatar_thumbnails["source"], user.avatar.name)
+
+    def test_invalid_uploads_are_rejected(self):
+        uploads = [SimpleUploadedFile("me.png", b"not an image", content_type="image/png"),
+                   SimpleUploadedFile("me.png", self.image().read()[:40], content_type="image/png")]
+        for upload in uploads:
+            with self.subTest(upload=upload):
+                self.assertEqual(self.upload(upload).status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(AVATAR_MAX_UPLOAD_BYTES=100):
+            self.assertEqual(self.upload(self.image()).status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(AVATAR_MAX_PIXELS=300 * 200 - 1):
+            self.assertEqual(self.upload(self.image()).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.filter(name="avatars.resize").exists())
+
+    def test_only_thumbnail_names_are_served(self):
+        for name in ("0123456789abcdef-64.webp", "..%2Fsettings.py", "me.png", "0123456789ABCDEF-64.webp"):
+            with self.subTest(name=name):
+                self.assertEqual(self.api.get(f"/api/avatars/{name}").status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="replica@example.com", username="replica", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.quiz = create_quiz("Science", "d", "Physics", 10, quiz_json(2))
+
+        # There is no second test database: record where each read would go
+        # and still run it on default.
+        self.routed = []
+        route = replica.ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            self.routed.append(route(router, model, **hints))
+
+        for patcher in (mock.patch.object(replica, "replica_alias", return_value="replica"),
+                        mock.patch.object(replica.ReplicaRouter, "db_for_read", autospec=True, side_effect=record)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def reads(self, method, url, **kwargs):
+        self.routed.clear()
+        response = getattr(self.api, method)(url, format="json", **kwargs)
+        self.assertLess(response.status_code, 400)
+        return response, set(self.routed)
+
+    def test_safe_requests_of_replica_views_read_from_the_replica(self):
+        for url in ("/api/quizzes/", f"/api/quizzes/{self.quiz.id}/", "/api/history/", "/api/statistics/",
+                    "/api/categories/"):
+            with self.subTest(url=url):
+                self.assertEqual(self.reads("get", url)[1], {"replica"})
+        self.assertFalse(replica.replica_reads.get())
+
+    def test_other_views_read_from_the_primary(self):
+        self.assertEqual(self.reads("get", "/api/review/")[1], {None})
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        _, routed = self.reads("post", f"/api/quizzes/{self.quiz.id}/results/", data={"userAnswers": {}})
+        self.assertEqual(routed, {None})
+
+        response, routed = self.reads("get", "/api/history/")
+        self.assertEqual(routed, {None})
+        self.assertEqual(len(response.json()["history"]), 1)
+
+        cache.delete(replica.sticky_key(self.user.pk))
+        self.assertEqual(self.reads("get", "/api/history/")[1], {"replica"})
+
+    def test_failed_writes_and_other_users_do_not_stick(self):
+        response = self.api.post(f"/api/quizzes/{self.quiz.id}/results/", {"userAnswers": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.reads("get", "/api/history/")[1], {"replica"})
+
+        other = User.objects.create_user(email="writer@example.com", username="writer", password="x")
+        self.api.force_authenticate(other)
+        self.reads("post", f"/api/quizzes/{self.quiz.id}/results/", data={"userAnswers": {}})
+        self.api.force_authenticate(self.user)
+        self.assertEqual(self.reads("get", "/api/history/")[1], {"replica"})
+
+    def test_writes_do_not_stick_without_a_replica(self):
+        with mock.patch.object(replica, "replica_alias", return_value=None):
+            self.reads("post", f"/api/quizzes/{self.quiz.id}/results/", data={"userAnswers": {}})
+        self.assertIsNone(cache.get(replica.sticky_key(self.user.pk)))
+
+
+class LeaderboardRankTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(email=f"rank{i}@example.com", username=f"rank{i}", password="x")
+                      for i in range(5)]
+
+    def entries(self, board, scores):
+        """Give the first users ``(points, best_score)`` entries on ``board``."""
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(board=board, user=user, points=points, best_score=best_score)
+            for user, (points, best_score) in zip(self.users, scores)
+        ])
+
+    def test_ties_share_a_rank(self):
+        self.entries("global", [(50, 0), (80, 0), (80, 0), (120, 0)])
+        self.assertEqual([leaderboard.rank_of("global", user)[0] for user in self.users[:4]], [4, 2, 2, 1])
+        self.assertEqual(leaderboard.rank_of("global", self.users[4]), (None, None))
+
+    def test_quiz_boards_rank_by_best_score(self):
+        self.entries("quiz:1", [(300, 60), (90, 90), (100, 100)])
+        self.assertEqual([leaderboard.rank_of("quiz:1", user)[0] for user in self.users[:3]], [3, 2, 1])
+        self.assertEqual([entry.user for entry in leaderboard.top("quiz:1")], self.users[2::-1])
+
+    def test_rank_is_two_queries(self):
+        self.entries("global", [(10, 0), (20, 0), (30, 0), (40, 0), (50, 0)])
+        with self.assertNumQueries(2):
+            self.assertEqual(leaderboard.rank_of("global", self.users[0])[0], 5)
+
+
+class LoadTestSmokeTests(LiveServerTestCase):
+    fixtures = [str(SEED_FIXTURE)]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = FakeLLMServer(latency_ms=0, jitter_ms=0).start()
+        cls.client_patch = mock.patch.object(utils, "client", genai.Client(
+            api_key="test", http_options=types.HttpOptions(base_url=cls.fake.url)))
+        cls.client_patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client_patch.stop()
+        cls.fake.stop()
+        super().tearDownClass()
+
+    def test_every_action_in_the_mix_succeeds(self):
+        cache.clear()
+        samples = []
+        actions = ["login", "list", "detail", "submit", "history", "statistics", "create"]
+        self.assertEqual(set(actions), {name for name, _ in MIX})
+
+        user = VirtualUser(self.live_server_url, random.Random(1), lambda name, _, ok: samples.append((name, ok)))
+        for name in actions:
+            getattr(user, name)()
+        self.assertEqual(samples, [(name, True) for name in actions])
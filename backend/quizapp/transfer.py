@@ -0,0 +1,324 @@
+import csv
+import gzip
+import io
+import json
+import zlib
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Quiz, Question, Category, SubCategory, QuizHistory, UserAnswer
+from .adaptive import create_question_ratings
+from .archive import unpack_answers
+from .search import index_questions, index_quizzes
+from .utils import clean_question, question_entry, quiz_content_hash
+
+GZIP_MAGIC = b"\x1f\x8b"
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_BATCH_SIZE = 500
+NAME_MAX_LENGTH = Category._meta.get_field("name").max_length
+TITLE_MAX_LENGTH = Quiz._meta.get_field("title").max_length
+
+
+def quiz_record(quiz):
+    return {
+        "title": quiz.title,
+        "description": quiz.description,
+        "category": quiz.category.name,
+        "category_description": quiz.category.description,
+        "subcategory": quiz.subcategory.name if quiz.subcategory_id else "",
+        "time_duration": quiz.time_duration,
+        "questions": [question_entry(q) for q in quiz.questions.all()],
+    }
+
+
+def iter_export_lines(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one JSON line per quiz, questions included, in constant memory."""
+    if queryset is None:
+        queryset = Quiz.objects.all()
+    queryset = (queryset
+                .select_related('category', 'subcategory')
+                .prefetch_related('questions')
+                .order_by('id'))
+    for quiz in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(quiz_record(quiz), ensure_ascii=False) + "\n"
+
+
+def backfill_content_hashes(chunk_size=DEFAULT_CHUNK_SIZE):
+    """Hash quizzes saved before ``content_hash`` existed so imports can skip their duplicates."""
+    queryset = (Quiz.objects
+                .filter(content_hash="")
+                .select_related('category', 'subcategory')
+                .prefetch_related('questions')
+                .order_by('id'))
+    updated, batch = 0, []
+    for quiz in queryset.iterator(chunk_size=chunk_size):
+        quiz.content_hash = quiz_content_hash(quiz.title, quiz.category.name,
+                                              quiz.subcategory.name if quiz.subcategory_id else "",
+                                              [question_entry(q) for q in quiz.questions.all()])
+        batch.append(quiz)
+        if len(batch) >= chunk_size:
+            updated += Quiz.objects.bulk_update(batch, ["content_hash"])
+            batch = []
+    if batch:
+        updated += Quiz.objects.bulk_update(batch, ["content_hash"])
+    return updated
+
+
+def iter_gzip(lines):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for line in lines:
+        chunk = compressor.compress(line.encode("utf-8"))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def open_text(fileobj):
+    """Wrap a seekable binary stream for line reading, un-gzipping it if needed."""
+    magic = fileobj.read(2)
+    fileobj.seek(0)
+    if magic == GZIP_MAGIC:
+        fileobj = gzip.GzipFile(fileobj=fileobj)
+    return io.TextIOWrapper(fileobj, encoding="utf-8", errors="replace")
+
+
+def parse_record(line):
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(record, dict):
+        return None
+
+    texts = [record.get(name) or "" for name in
+             ("category", "subcategory", "title", "description", "category_description")]
+    if not all(isinstance(text, str) for text in texts):
+        return None
+    category, subcategory, title, description, category_description = texts
+    category, subcategory = category.strip(), subcategory.strip()
+    title = title or f"{category} Quiz"
+    entries = record.get("questions")
+    if not category or not isinstance(entries, list):
+        return None
+    if len(category) > NAME_MAX_LENGTH or len(subcategory) > NAME_MAX_LENGTH or len(title) > TITLE_MAX_LENGTH:
+        return None
+
+    questions = [q for q in (clean_question(e) for e in entries) if q is not None]
+    if not questions:
+        return None
+
+    try:
+        time_duration = int(record.get("time_duration") or 5)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if time_duration < 1:
+        return None
+
+    return {
+        "title": title,
+        "description": description,
+        "category": category,
+        "category_description": category_description,
+        "subcategory": subcategory,
+        "time_duration": time_duration,
+        "questions": questions,
+        "content_hash": quiz_content_hash(title, category, subcategory, entries),
+    }
+
+
+class QuizImporter:
+    """Batched JSON Lines importer.
+
+    Quizzes and questions are written with ``bulk_create`` once per batch and
+    rows whose content hash already exists are skipped.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.categories = {}
+        self.subcategories = {}
+        self.stats = {"created": 0, "skipped": 0, "invalid": 0, "questions": 0}
+
+    def run(self, lines):
+        batch = []
+        for line in lines:
+            if not line.strip():
+                continue
+            record = parse_record(line)
+            if record is None:
+                self.stats["invalid"] += 1
+                continue
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+        return self.stats
+
+    def get_category(self, name, description):
+        if name not in self.categories:
+            self.categories[name], _ = Category.objects.get_or_create(
+                name=name, defaults={"description": description or "Imported"})
+        return self.categories[name]
+
+    def get_subcategory(self, category, name):
+        if not name:
+            return None
+        key = (category.id, name)
+        if key not in self.subcategories:
+            self.subcategories[key], _ = SubCategory.objects.get_or_create(name=name, category=category)
+        return self.subcategories[key]
+
+    @transaction.atomic
+    def flush(self, batch):
+        hashes = {r["content_hash"] for r in batch}
+        seen = set(Quiz.objects.filter(content_hash__in=hashes).values_list("content_hash", flat=True))
+
+        records, quizzes = [], []
+        for record in batch:
+            if record["content_hash"] in seen:
+                self.stats["skipped"] += 1
+                continue
+            seen.add(record["content_hash"])
+            category = self.get_category(record["category"], record["category_description"])
+            records.append(record)
+            quizzes.append(Quiz(
+                title=record["title"],
+                description=record["description"],
+                category=category,
+                subcategory=self.get_subcategory(category, record["subcategory"]),
+                time_duration=record["time_duration"],
+                content_hash=record["content_hash"],
+            ))
+
+        quizzes = Quiz.objects.bulk_create(quizzes, batch_size=self.batch_size)
+        questions = [
+            Question(quiz=quiz, **fields)
+            for quiz, record in zip(quizzes, records)
+            for fields in record["questions"]
+        ]
+        Question.objects.bulk_create(questions, batch_size=self.batch_size)
+        create_question_ratings(questions)
+        index_quizzes(quizzes)
+        index_questions(questions)
+
+        self.stats["created"] += len(quizzes)
+        self.stats["questions"] += len(questions)
+
+
+HISTORY_FIELDS = [
+    "id", "quiz_id", "quiz__title", "quiz__category__name", "quiz__subcategory__name",
+    "score", "correct_answers", "total_questions", "started_at", "completed_at", "packed_answers",
+]
+ANSWER_FIELDS = [
+    "history_id", "question_id", "question__text", "selected_option",
+    "question__correct_answer", "is_correct",
+]
+HISTORY_CSV_HEADER = [
+    "history_id", "quiz_id", "quiz_title", "category", "subcategory", "score",
+    "correct_answers", "total_questions", "started_at", "completed_at",
+    "question_id", "question", "selected_option", "correct_option", "is_correct",
+]
+
+
+def iter_user_history(user, cursor=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield ``(history, answers)`` for every attempt of ``user`` after ``cursor``.
+
+    Histories and answers are read as two id-ordered chunked streams and
+    merge-joined here, so memory does not grow with the size of the history.
+    Question texts for packed histories are looked up once per chunk.
+    """
+    histories = (QuizHistory.objects
+                 .filter(user=user, id__gt=cursor, completed_at__isnull=False)
+                 .order_by('id')
+                 .values(*HISTORY_FIELDS)
+                 .iterator(chunk_size=chunk_size))
+    answers = (UserAnswer.objects
+               .filter(history__user=user, history_id__gt=cursor)
+               .order_by('history_id', 'id')
+               .values(*ANSWER_FIELDS)
+               .iterator(chunk_size=chunk_size))
+
+    pending = next(answers, None)
+    while chunk := list(islice(histories, chunk_size)):
+        unpacked = {
+            history["id"]: [row for row in unpack_answers(history["packed_answers"]) if row[1]]
+            for history in chunk if history["packed_answers"] is not None
+        }
+        question_ids = {question_id for rows in unpacked.values() for question_id, _, _ in rows}
+        texts = dict(Question.objects.filter(id__in=question_ids).values_list('id', 'text')) if question_ids else {}
+
+        for history in chunk:
+            if history["id"] in unpacked:
+                yield history, packed_rows(history, unpacked[history["id"]], texts)
+                continue
+            rows = []
+            while pending is not None and pending["history_id"] < history["id"]:
+                pending = next(answers, None)
+            while pending is not None and pending["history_id"] == history["id"]:
+                rows.append(pending)
+                pending = next(answers, None)
+            yield history, rows
+
+
+def packed_rows(history, unpacked, texts):
+    return [{
+        "history_id": history["id"],
+        "question_id": question_id,
+        "question__text": texts.get(question_id, ""),
+        "selected_option": selected,
+        "question__correct_answer": correct,
+        "is_correct": selected == correct,
+    } for question_id, selected, correct in unpacked]
+
+
+def history_record(history, answers):
+    return {
+        "id": history["id"],
+        "quiz_id": history["quiz_id"],
+        "quiz_title": history["quiz__title"],
+        "category": history["quiz__category__name"] or "",
+        "subcategory": history["quiz__subcategory__name"] or "",
+        "score": history["score"],
+        "correct_answers": history["correct_answers"],
+        "total_questions": history["total_questions"],
+        "started_at": history["started_at"].isoformat() if history["started_at"] else "",
+        "completed_at": history["completed_at"].isoformat() if history["completed_at"] else "",
+        "answers": [{
+            "question_id": a["question_id"],
+            "question": a["question__text"],
+            "selected_option": a["selected_option"],
+            "correct_option": a["question__correct_answer"],
+            "is_correct": a["is_correct"],
+        } for a in answers],
+    }
+
+
+def iter_history_ndjson(user, cursor=0):
+    for history, answers in iter_user_history(user, cursor):
+        yield json.dumps(history_record(history, answers), ensure_ascii=False) + "\n"
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def iter_history_csv(user, cursor=0):
+    writer = csv.writer(Echo())
+    yield writer.writerow(HISTORY_CSV_HEADER)
+    for history, answers in iter_user_history(user, cursor):
+        record = history_record(history, answers)
+        head = [
+            record["id"], record["quiz_id"], record["quiz_title"], record["category"],
+            record["subcategory"], record["score"], record["correct_answers"],
+            record["total_questions"], record["started_at"], record["completed_at"],
+        ]
+        if not record["answers"]:
+            yield writer.writerow(head + [""] * 5)
+        for a in record["answers"]:
+            yield writer.writerow(head + [
+                a["question_id"], a["question"], a["selected_option"], a["correct_option"], a["is_correct"],
+            ])
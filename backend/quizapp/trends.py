@@ -0,0 +1,123 @@
+"""Performance trends rolled up from per-day aggregates.
+
+Every finished attempt is added to its user's ``DailyPerformance`` row for
+the quiz category and the (local) day it was completed, so a trend over any
+range reads at most one row per category and day instead of every attempt.
+``rebuild_daily_performance`` recomputes the rows from ``QuizHistory``.
+"""
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, FloatField, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils.timezone import localdate
+
+from .models import DailyPerformance, QuizHistory
+
+# Score histogram: (label, column, highest score in the bucket).
+SCORE_BUCKETS = [
+    ("0-20", "score_0_20", 20),
+    ("21-40", "score_21_40", 40),
+    ("41-60", "score_41_60", 60),
+    ("61-80", "score_61_80", 80),
+    ("81-100", "score_81_100", 100),
+]
+GRANULARITIES = {"day": None, "week": TruncWeek, "month": TruncMonth}
+COUNTERS = ["attempts", "score_sum", "duration_sum", *(column for _, column, _ in SCORE_BUCKETS)]
+
+
+def bucket_column(score):
+    for _, column, upper in SCORE_BUCKETS:
+        if score <= upper:
+            return column
+    return SCORE_BUCKETS[-1][1]
+
+
+def bucket_filter(position):
+    """The ``bucket_column`` rule as a filter: above the previous bound, up to this one."""
+    in_bucket = Q()
+    if position > 0:
+        in_bucket &= Q(score__gt=SCORE_BUCKETS[position - 1][2])
+    if position < len(SCORE_BUCKETS) - 1:
+        in_bucket &= Q(score__lte=SCORE_BUCKETS[position][2])
+    return in_bucket
+
+
+def duration_seconds(started_at, completed_at):
+    if not started_at or not completed_at:
+        return 0
+    return max(0, (completed_at - started_at).total_seconds())
+
+
+def record_daily(history):
+    """Add a finished attempt to its day's aggregate (two queries)."""
+    if history.completed_at is None:
+        return
+    day = localdate(history.completed_at)
+    category_id = history.quiz.category_id
+    DailyPerformance.objects.bulk_create(
+        [DailyPerformance(user_id=history.user_id, category_id=category_id, day=day)],
+        ignore_conflicts=True,
+    )
+    column = bucket_column(history.score or 0)
+    DailyPerformance.objects.filter(user_id=history.user_id, category_id=category_id, day=day).update(**{
+        "attempts": F('attempts') + 1,
+        "score_sum": F('score_sum') + (history.score or 0),
+        "duration_sum": F('duration_sum') + duration_seconds(history.started_at, history.completed_at),
+        column: F(column) + 1,
+    })
+
+
+@transaction.atomic
+def rebuild_daily_performance(since=None):
+    """Recompute the aggregates from QuizHistory, for every day or from ``since`` on."""
+    histories = QuizHistory.objects.filter(completed_at__isnull=False).annotate(day=TruncDate('completed_at'))
+    stored = DailyPerformance.objects.all()
+    if since is not None:
+        histories = histories.filter(day__gte=since)
+        stored = stored.filter(day__gte=since)
+
+    duration = ExpressionWrapper(F('completed_at') - F('started_at'), output_field=DurationField())
+    rows = (histories
+            .values('user_id', 'quiz__category_id', 'day')
+            .annotate(attempts=Count('pk'),
+                      score_sum=Sum('score', output_field=FloatField()),
+                      duration=Sum(duration, filter=Q(started_at__isnull=False, completed_at__gte=F('started_at'))),
+                      **{column: Count('pk', filter=bucket_filter(position))
+                         for position, (_, column, _) in enumerate(SCORE_BUCKETS)})
+            .order_by())
+
+    stored.delete()
+    created = DailyPerformance.objects.bulk_create([
+        DailyPerformance(
+            user_id=row['user_id'], category_id=row['quiz__category_id'], day=row['day'],
+            attempts=row['attempts'], score_sum=row['score_sum'] or 0,
+            duration_sum=row['duration'].total_seconds() if row['duration'] else 0,
+            **{column: row[column] for _, column, _ in SCORE_BUCKETS},
+        ) for row in rows.iterator()
+    ], batch_size=1000)
+    return len(created)
+
+
+def performance_trends(user, start, end, granularity="day", category=None):
+    """Roll a user's daily aggregates between ``start`` and ``end`` (inclusive) up to periods.
+
+    Periods without attempts are left out, and a week or month that sticks
+    out of the range only counts its days inside it. ``category`` narrows to
+    one category name.
+    """
+    rows = DailyPerformance.objects.filter(user=user, day__gte=start, day__lte=end)
+    if category:
+        rows = rows.filter(category__name=category)
+    trunc = GRANULARITIES[granularity]
+    period = F('day') if trunc is None else trunc('day')
+    rows = (rows
+            .annotate(period=period)
+            .values('period')
+            .annotate(**{counter: Sum(counter) for counter in COUNTERS})
+            .order_by('period'))
+    return [{
+        "date": row["period"].isoformat(),
+        "average_score": round(row["score_sum"] / row["attempts"], 2) if row["attempts"] else 0,
+        "quiz_count": row["attempts"],
+        "total_time": row["duration_sum"],
+        "score_distribution": [{"range": label, "count": row[column]} for label, column, _ in SCORE_BUCKETS],
+    } for row in rows]
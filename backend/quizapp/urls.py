@@ -6,11 +6,27 @@ urlpatterns = [
   path('api/quizzes/', views.QuizListView.as_view()),
   path('api/quizzes/<int:quiz_id>/', views.QuizDetailView.as_view()),
   path('api/quizzes/create/', views.CreateQuizView.as_view()),
+  path('api/quizzes/create/status/', views.GenerationStatusView.as_view()),
+  path('api/quizzes/export/', views.QuizExportView.as_view()),
+  path('api/quizzes/import/', views.QuizImportView.as_view()),
+  path('api/quizzes/pool/', views.QuizPoolView.as_view()),
   path('api/quizzes/<int:history_id>/results/', views.QuizResultView.as_view()),
+  path('api/quizzes/<int:quiz_id>/attempts/', views.AttemptStartView.as_view()),
+  path('api/attempts/<int:attempt_id>/', views.AttemptView.as_view()),
+  path('api/attempts/<int:attempt_id>/submit/', views.AttemptSubmitView.as_view()),
+  path('api/adaptive/next/', views.AdaptiveQuestionView.as_view()),
+  path('api/adaptive/answer/', views.AdaptiveAnswerView.as_view()),
+  path('api/review/', views.ReviewView.as_view()),
+  path('api/analytics/questions/', views.QuestionAnalyticsView.as_view()),
+  path('api/leaderboard/', views.LeaderboardView.as_view()),
   path('api/history/', views.HistoryListView.as_view()),
+  path('api/history/export/', views.HistoryExportView.as_view()),
   path('api/history/<int:history_id>/', views.HistoryDetailView.as_view()),
   path('api/profile/', views.ProfileView.as_view()),
+  path('api/avatars/<str:name>', views.avatar_view, name='avatar'),
   path('api/statistics/', views.StatisticsView.as_view()),
+  path('api/statistics/trends/', views.TrendsView.as_view()),
+  path('api/search/', views.SearchView.as_view()),
   path('api/categories/', views.CategoryListView.as_view()),
   path('api/chatbot/', views.ChatbotAPIView.as_view()),
   path('api/login/', views.login_view),
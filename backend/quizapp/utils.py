@@ -1,8 +1,19 @@
 from django.contrib.auth import get_user_model
+import hashlib
 import json
-from .models import Quiz, Question, Category, SubCategory
+import time
+import httpx
+from .models import Quiz, Question, Category, SubCategory, GenerationCall
+from .archive import OPTION_LETTERS
+from .circuit import llm_breaker
+from .prompts import (
+    batch_prompt, batch_schema, estimate_output_tokens, estimate_tokens, plan_batches, quiz_prompt, quiz_schema,
+    split_batch,
+)
 from decouple import config
 from google import genai
+from google.genai import errors as genai_errors
+from google.genai import types
 
 def get_admin_user():
     try:
@@ -12,20 +23,105 @@ def get_admin_user():
         return None
 
 
-def create_quiz(category_name, category_description, subcategory_name, time_duration, response_text):
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+OPTION_MAX_LENGTH = Question._meta.get_field("option_a").max_length
+
+
+def clean_question(entry):
+    """Validate one generated question entry and map it onto Question fields.
+
+    Returns None when the entry does not follow the generation schema.
+    """
+    if not isinstance(entry, dict):
+        return None
+
+    question_text = entry.get("question")
+    options = entry.get("options")
+    correct_answer = entry.get("correct_answer")
+    difficulty = entry.get("difficulty", "Medium")
+
+    if not isinstance(question_text, str) or not question_text.strip() or not isinstance(options, dict):
+        return None
+    if not isinstance(correct_answer, str) or len(correct_answer) != 1 or correct_answer not in OPTION_LETTERS:
+        return None
+    values = [options.get(letter) for letter in OPTION_LETTERS]
+    if not all(isinstance(value, str) and value.strip() and len(value) <= OPTION_MAX_LENGTH for value in values):
+        return None
+    if difficulty not in DIFFICULTIES:
+        difficulty = "Medium"
+
+    option_a, option_b, option_c, option_d = values
+    return {
+        "text": question_text,
+        "option_a": option_a,
+        "option_b": option_b,
+        "option_c": option_c,
+        "option_d": option_d,
+        "correct_answer": correct_answer,
+        "difficulty": difficulty,
+    }
+
+
+def question_entry(question):
+    return {
+        "question": question.text,
+        "options": {
+            "A": question.option_a,
+            "B": question.option_b,
+            "C": question.option_c,
+            "D": question.option_d,
+        },
+        "correct_answer": question.correct_answer,
+        "difficulty": question.difficulty,
+    }
+
+
+def quiz_content_hash(title, category_name, subcategory_name, entries):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([title, category_name, subcategory_name or ""]).encode())
+    for entry in entries:
+        fields = clean_question(entry)
+        if fields is not None:
+            digest.update(json.dumps(fields, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def parse_questions(response_text):
+    """Pull the question array out of a free-text model reply; None if there is none."""
     start_index = response_text.find('[')
     end_index = response_text.rfind(']') + 1
     response_text = response_text[start_index:end_index].strip()
 
     if not response_text:
         print("ERROR: response_text is empty.")
-        return
+        return None
 
     try:
         data = json.loads(response_text)
     except json.JSONDecodeError as e:
         print(f"ERROR: JSON decoding failed: {e}")
+        return None
+    return data if isinstance(data, list) else None
+
+
+def create_quiz(category_name, category_description, subcategory_name, time_duration, response_text):
+    data = parse_questions(response_text)
+    if data is None:
         return
+    return build_quiz(category_name, category_description, subcategory_name, time_duration, data)
+
+
+def build_quiz(category_name, category_description, subcategory_name, time_duration, data):
+    """Save a quiz from generated entries, skipping invalid ones; None if none of them is usable."""
+    questions = []
+    for entry in data:
+        fields = clean_question(entry)
+        if fields is None:
+            print(f"Skipping invalid question: {entry}")
+            continue
+        questions.append(fields)
+    if not questions:
+        return None
 
     category, _ = Category.objects.get_or_create(name=category_name, defaults={"description": category_description})
     subcategory, _ = SubCategory.objects.get_or_create(name=subcategory_name, category=category)
@@ -36,90 +132,132 @@ def create_quiz(category_name, category_description, subcategory_name, time_dura
         category=category,
         subcategory=subcategory,
         time_duration=time_duration,
+        content_hash=quiz_content_hash(f"{category} Quiz", category.name, subcategory.name, data),
     )
+    for fields in questions:
+        Question.objects.create(quiz=quiz, **fields)
 
-    for entry in data:
-        question_text = entry.get("question")
-        options = entry.get("options")
-        correct_answer = entry.get("correct_answer")
-        difficulty = entry.get("difficulty", "Medium")
+    return quiz
 
-        if not question_text or not options or not correct_answer:
-            continue
 
-        option_a = options.get("A", "")
-        option_b = options.get("B", "")
-        option_c = options.get("C", "")
-        option_d = options.get("D", "")
+def get_prompt(structured=False, **kwargs):
+    return quiz_prompt(kwargs.get('category', 'Science'), kwargs.get('subcategory', 'Physics - Motion'),
+                       kwargs.get('num_questions', 10), structured)
 
-        if correct_answer not in options.keys():
-            print(f"Skipping question due to unmatched correct answer: {question_text}")
-            continue
+API_KEY = config("API_KEY")
+AI_MODEL = config("AI_MODEL")
+AI_BASE_URL = config("AI_BASE_URL", default="")
+# Ask the provider for schema-constrained JSON; falls back to the free-text
+# path by itself if the model rejects response schemas.
+AI_STRUCTURED_OUTPUT = config("AI_STRUCTURED_OUTPUT", default=True, cast=bool)
+MAX_GENERATION_ATTEMPTS = 2
+# Give up on a hung provider call well before the web worker would.
+AI_TIMEOUT_MS = config("AI_TIMEOUT_MS", default=60000, cast=int)
+client = genai.Client(
+    api_key=API_KEY,
+    http_options=types.HttpOptions(base_url=AI_BASE_URL or None, timeout=AI_TIMEOUT_MS),
+)
+schema_supported = True
+# Errors that mean the provider call itself failed (as opposed to a bad reply).
+PROVIDER_ERRORS = (genai_errors.APIError, httpx.HTTPError)
+
+
+def parse_single(text):
+    entries = parse_questions(text)
+    return None if entries is None else [entries]
+
+
+def parse_batch(count):
+    def parse(text):
+        arrays = split_batch(text, count)
+        return arrays if any(entries is not None for entries in arrays) else None
+    return parse
 
-        Question.objects.create(
-            quiz=quiz,
-            text=question_text,
-            option_a=option_a,
-            option_b=option_b,
-            option_c=option_c,
-            option_d=option_d,
-            correct_answer=correct_answer,
-            difficulty=difficulty
-        )
-        
-    return quiz
 
+def call_model(prompt, topics, num_questions, parse, schema=None):
+    """Send ``prompt`` and record a GenerationCall with estimated and reported token usage.
 
-def get_prompt(**kwargs):
-    prompt = f"""
-        You are a Quiz Generator AI. Based on the following input, generate a set of quiz questions ONLY in the exact JSON format described.
-
-        ### Output format (strict):
-        [
-        {{
-            "question": "string",
-            "options": {{
-                "A": "optionA",
-                "B": "optionB",
-                "C": "optionC",
-                "D": "optionD"
-            }},
-            "correct_answer": "A",
-            "difficulty": "Easy"
-        }},
-        ...
-        ]
-
-        ### Requirements:
-        1. Each question must include:
-        - "question": The question text (clear, concise, no ambiguity)
-        - "options": Four answer choices mapped to keys "A", "B", "C", "D"
-        - "correct_answer": The key of the correct answer ("A"/"B"/"C"/"D")
-        - "difficulty": One of "Easy", "Medium", or "Hard"
-        2. Do NOT repeat the same format or question wording.
-        3. DO NOT include any explanations, headings, or extra text — ONLY output the JSON array.
-
-        ### Input:
-        Category: {kwargs.get('category', 'Science')}
-        Subcategory: {kwargs.get('subcategory', 'Physics - Motion')}
-        Number of Questions: {kwargs.get('num_questions', 10)}
-
-        ### Output:
-        Generate exactly {kwargs.get('num_questions', 10)} distinct questions in the above JSON format.
+    ``parse`` turns the reply into a list of question arrays (or None) so the
+    call can record whether it was usable and how many questions came back.
     """
+    call = GenerationCall(
+        model=AI_MODEL,
+        topics=topics,
+        questions_requested=num_questions,
+        estimated_input_tokens=estimate_tokens(prompt),
+        estimated_output_tokens=estimate_output_tokens(num_questions),
+        structured=schema is not None,
+    )
+    generation_config = types.GenerateContentConfig(
+        response_mime_type="application/json", response_schema=schema) if schema is not None else None
+    started = time.perf_counter()
+    try:
+        response = client.models.generate_content(model=AI_MODEL, contents=prompt, config=generation_config)
+    except Exception:
+        call.succeeded = call.parsed = False
+        raise
+    else:
+        text = response.text or ""
+        usage = response.usage_metadata
+        call.input_tokens = usage.prompt_token_count if usage else None
+        call.output_tokens = usage.candidates_token_count if usage else None
+        arrays = parse(text)
+        call.parsed = arrays is not None
+        call.questions_returned = sum(len(entries or []) for entries in arrays or [])
+        return text
+    finally:
+        call.latency_ms = (time.perf_counter() - started) * 1000
+        call.save()
 
-    return prompt
 
-API_KEY = config("API_KEY")
-AI_MODEL = config("AI_MODEL")
-client = genai.Client(api_key=API_KEY)
+def schema_rejected(exc):
+    message = str(exc).lower()
+    return exc.code == 400 and any(hint in message for hint in ("schema", "json mode", "mime"))
+
+
+def generate(build_prompt, schema, topics, num_questions, parse):
+    """Call the model, structured when possible, retrying unusable replies up to MAX_GENERATION_ATTEMPTS.
+
+    Calls go through the provider circuit breaker, so this raises CircuitOpen
+    instead of waiting on a provider that is down.
+    """
+    global schema_supported
+    attempts = 0
+    while True:
+        structured = AI_STRUCTURED_OUTPUT and schema_supported
+        try:
+            text = llm_breaker.call(lambda: call_model(build_prompt(structured), topics, num_questions, parse,
+                                                       schema if structured else None))
+        except genai_errors.ClientError as exc:
+            if not structured or not schema_rejected(exc):
+                raise
+            schema_supported = False
+            continue
+        attempts += 1
+        if attempts >= MAX_GENERATION_ATTEMPTS or parse(text) is not None:
+            return text
+
 
 def generate_quiz(**kwargs):
-    prompt = get_prompt(**kwargs)
-    response = client.models.generate_content(
-        model=AI_MODEL, contents=prompt
-    )
-    return response.text
+    return generate(lambda structured: get_prompt(structured, **kwargs), quiz_schema(), 1,
+                    kwargs.get('num_questions', 10), parse_single)
 
 
+def generate_quizzes(topics):
+    """Generate several ``TopicRequest`` quizzes, batching small ones into shared calls.
 
+    Returns one question list per topic, in order; ``None`` where the reply
+    had nothing usable for that topic.
+    """
+    results = []
+    for batch in plan_batches(topics):
+        if len(batch) == 1:
+            topic = batch[0]
+            text = generate_quiz(category=topic.category, subcategory=topic.subcategory,
+                                 num_questions=topic.num_questions)
+            results.append(parse_questions(text))
+            continue
+        text = generate(lambda structured: batch_prompt(batch, structured), batch_schema(len(batch)), len(batch),
+                        sum(t.num_questions for t in batch), parse_batch(len(batch)))
+        results.extend(split_batch(text, len(batch)))
+    return results
@@ -4,61 +4,62 @@ from rest_framework.response import Response
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import AllowAny
-from django.contrib.auth import authenticate, login as django_login, logout as django_logout
-from django.utils.timezone import make_aware, is_naive,  now
+from django.contrib.auth import authenticate, logout as django_logout
+from django.utils.timezone import make_aware, is_naive, localdate, now
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.core.files.storage import default_storage
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag, require_safe
 from django.contrib.auth import get_user_model
 from datetime import datetime, date
-from calendar import monthrange
-from django.db.models import Avg, Count, Sum
-from django.db.models.functions import TruncDate
-import json
-from .models import User, Quiz, Question, QuizHistory, UserAnswer, Category, SubCategory
-from .utils import generate_quiz, create_quiz as save_quiz
-
 from django.db.models import Avg, Count
+from .models import User, Quiz, Question, QuizHistory, Category, SubCategory, QuestionStats
+from .utils import PROVIDER_ERRORS, generate_quiz, create_quiz as save_quiz
+from .circuit import CircuitOpen, llm_breaker
+from .grading import OPTION_LETTERS, grade_submission, has_passed, parse_selection, save_submission
+from .avatars import THUMBNAIL_DIR, THUMBNAIL_NAME_RE, InvalidAvatar, avatar_url, thumbnail_urls, validate_upload
+from .attempts import AttemptClosed, attempt_state, autosave, finalize_attempt, saved_answers, start_attempt
+from .adaptive import claim_served, next_question, record_answers
+from .analytics import pending_submissions
+from .leaderboard import WINDOWS, board_name, rank_of, top
+from .review import due_items, due_question_ids, record_reviews
+from .singleflight import generation_key, single_flight
+from .pool import claim_quiz, pool_metrics, record_demand, schedule_refill, stored_quiz_id
+from .prompts import estimate_output_tokens, estimate_tokens, quiz_prompt
+from .ratelimit import admit_generation
+from .replica import ReplicaReadMixin
+from .trends import GRANULARITIES, performance_trends
+from . import search
+from .builders import answer_rows, history_rows, question_rows, quiz_rows, result_answer_rows
+from .transfer import (
+    QuizImporter, iter_export_lines, iter_gzip, open_text, iter_history_csv, iter_history_ndjson,
+)
 from datetime import timedelta
 
 User = get_user_model()
 
-
-def to_quiz_data(quiz):
-    return {
-        "id": quiz.id,
-        "title": quiz.title,
-        "category": quiz.category.name,
-        "subcategory": quiz.subcategory.name if getattr(quiz, "subcategory", None) else "",
-        "num_questions": quiz.questions.count(),
-        "time_duration": quiz.time_duration,
-    }
+TREND_DAYS = 30
+AVATAR_CACHE_SECONDS = 365 * 24 * 60 * 60
 
 
-class QuizListView(APIView):
+class QuizListView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        quizzes = Quiz.objects.select_related('category', 'subcategory').all()
-        data = [to_quiz_data(q) for q in quizzes]
-        return Response({"quizzes": data})
+        quizzes = Quiz.objects.filter(pool_entry__isnull=True)
+        return Response({"quizzes": quiz_rows(quizzes)})
 
 
-class QuizDetailView(APIView):
+class QuizDetailView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, quiz_id):
-        quiz = get_object_or_404(Quiz, id=quiz_id)
-        questions = []
-        answer_map = {"A": 0, "B": 1, "C": 2, "D": 3}
-        for q in quiz.questions.all():
-            correct_index = answer_map.get(q.correct_answer)
-            questions.append({
-                "id": q.id,
-                "text": q.text,
-                "options": [q.option_a, q.option_b, q.option_c, q.option_d],
-                "correct": correct_index,
-                "difficulty": q.difficulty,
-            })
-        return Response({"quiz": to_quiz_data(quiz), "questions": questions})
+        quizzes = quiz_rows(Quiz.objects.filter(id=quiz_id))
+        if not quizzes:
+            return Response({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"quiz": quizzes[0], "questions": question_rows(quiz_id)})
 
 
 class CreateQuizView(APIView):
@@ -68,16 +69,65 @@ class CreateQuizView(APIView):
         data = request.data
         category = data.get('category')
         subcategory = data.get('subcategory')
-        question_count = int(data.get('questionCount'))
-        duration = data.get('duration')
-
-        quiz_questions = generate_quiz(
-            category=category, subcategory=subcategory, num_questions=question_count)
-
-        quiz = save_quiz(category_name=category, category_description="API Created",
-                         subcategory_name=subcategory, time_duration=duration, response_text=quiz_questions)
-
-        return Response({"message": "Quiz created successfully", "quiz_id": quiz.id})
+        try:
+            question_count = int(data.get('questionCount'))
+        except (TypeError, ValueError):
+            return Response({"error": "questionCount must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= question_count <= settings.GENERATION_MAX_QUESTIONS:
+            return Response({"error": f"questionCount must be between 1 and {settings.GENERATION_MAX_QUESTIONS}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            duration = int(data.get('duration'))
+        except (TypeError, ValueError):
+            return Response({"error": "duration must be a number of minutes"}, status=status.HTTP_400_BAD_REQUEST)
+        if duration < 1:
+            return Response({"error": "duration must be at least 1 minute"}, status=status.HTTP_400_BAD_REQUEST)
+
+        cost = (estimate_tokens(quiz_prompt(category, subcategory, question_count))
+                + estimate_output_tokens(question_count))
+        decision = admit_generation(request.user, cost)
+        if not decision.allowed:
+            return Response({"error": decision.reason, "retry_after": decision.retry_after},
+                            status=status.HTTP_429_TOO_MANY_REQUESTS,
+                            headers={"Retry-After": str(decision.retry_after)})
+
+        demand = record_demand(category, subcategory, question_count)
+        quiz_id = claim_quiz(demand, duration)
+        if quiz_id is not None:
+            schedule_refill(demand)
+            return Response({"message": "Quiz created successfully", "quiz_id": quiz_id, "shared": False})
+
+        def generate():
+            quiz_questions = generate_quiz(
+                category=category, subcategory=subcategory, num_questions=question_count)
+
+            quiz = save_quiz(category_name=category, category_description="API Created",
+                             subcategory_name=subcategory, time_duration=duration, response_text=quiz_questions)
+            return quiz.id if quiz else None
+
+        try:
+            quiz_id, shared = single_flight(generation_key(category, subcategory, question_count, duration), generate)
+        except CircuitOpen as exc:
+            return self.degraded(category, subcategory, exc.retry_after)
+        except PROVIDER_ERRORS:
+            return self.degraded(category, subcategory, settings.CIRCUIT_COOLDOWN_SECONDS)
+        if quiz_id is None:
+            return Response({"error": "The generated quiz could not be read, please try again"},
+                            status=status.HTTP_502_BAD_GATEWAY)
+        schedule_refill(demand)
+
+        return Response({"message": "Quiz created successfully", "quiz_id": quiz_id, "shared": shared})
+
+    def degraded(self, category, subcategory, retry_after):
+        """Serve an existing quiz on the same topic while the generator is unavailable."""
+        quiz_id = stored_quiz_id(category, subcategory)
+        if quiz_id is None:
+            return Response({"error": "The quiz generator is unavailable, please try again later",
+                             "retry_after": retry_after},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={"Retry-After": str(retry_after)})
+        return Response({"message": "The quiz generator is unavailable, here is an existing quiz on this topic",
+                         "quiz_id": quiz_id, "shared": True, "fallback": True})
 
     def get(self, request):
         categories = Category.objects.all()
@@ -92,6 +142,37 @@ class CreateQuizView(APIView):
         return Response({"categories": category_list, "subcategories": subcategories})
 
 
+class QuizExportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        quizzes = Quiz.objects.all()
+        category = request.query_params.get('category')
+        if category:
+            quizzes = quizzes.filter(category__name=category)
+
+        lines = iter_export_lines(quizzes)
+        if request.query_params.get('compress') == 'gzip':
+            response = StreamingHttpResponse(iter_gzip(lines), content_type="application/gzip")
+            response["Content-Disposition"] = 'attachment; filename="quizzes.jsonl.gz"'
+        else:
+            response = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+            response["Content-Disposition"] = 'attachment; filename="quizzes.jsonl"'
+        return response
+
+
+class QuizImportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST)
+
+        stats = QuizImporter().run(open_text(upload.file))
+        return Response({"message": "Import finished", **stats})
+
+
 class QuizResultView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -99,62 +180,60 @@ class QuizResultView(APIView):
         quiz_id = history_id
         quiz = get_object_or_404(Quiz, id=quiz_id)
         data = request.data
-        completed_at = datetime.fromisoformat(
-            data.get("completedAt", datetime.now().isoformat()))
-        started_at = datetime.fromisoformat(
-            data.get("startedAt", datetime.now().isoformat()))
-
-        if is_naive(started_at):
-            started_at = make_aware(started_at)
-        if is_naive(completed_at):
-            completed_at = make_aware(completed_at)
-
-        history = QuizHistory.objects.create(
-            user=request.user,
-            quiz=quiz,
-            score=data.get("score", 0),
-            total_questions=data.get("totalQuestions", 0),
-            correct_answers=data.get("correctAnswers", 0),
-            completed_at=completed_at,
-            started_at=started_at
-        )
+        # The server clock decides when a quiz was completed; the client's
+        # startedAt is only used for time taken and may not lie in the future.
+        completed_at = now()
+        started_at = data.get("startedAt")
+        if started_at is None:
+            started_at = completed_at
+        else:
+            try:
+                started_at = datetime.fromisoformat(started_at)
+            except (TypeError, ValueError):
+                return Response({"error": "startedAt must be an ISO 8601 timestamp"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if is_naive(started_at):
+                started_at = make_aware(started_at)
+            started_at = min(started_at, completed_at)
+
+        idempotency_key = request.headers.get("Idempotency-Key") or data.get("idempotencyKey") or None
+        if idempotency_key is not None and not isinstance(idempotency_key, str):
+            return Response({"error": "Idempotency key must be a string"}, status=status.HTTP_400_BAD_REQUEST)
+        if idempotency_key is not None and len(idempotency_key) > 64:
+            return Response({"error": "Idempotency key is too long"}, status=status.HTTP_400_BAD_REQUEST)
 
         user_answers = data.get("userAnswers", {})
-        OPTIONS_MAP = {"0": "A", "1": "B", "2": "C", "3": "D"}
+        if not isinstance(user_answers, dict):
+            return Response({"error": "userAnswers must be an object"}, status=status.HTTP_400_BAD_REQUEST)
 
-        for q_id, selected in user_answers.items():
-            question = Question.objects.get(id=q_id)
-            UserAnswer.objects.create(
-                history=history,
-                question=question,
-                selected_option=OPTIONS_MAP.get(selected, ""),
-                is_correct=(OPTIONS_MAP.get(selected, "")
-                            == question.correct_answer)
-            )
+        graded = grade_submission(quiz.id, user_answers)
+        history, created = save_submission(request.user, quiz, graded, started_at, completed_at, idempotency_key)
+        if history.quiz_id != quiz.id:
+            return Response({"error": "Idempotency key was already used for another quiz"},
+                            status=status.HTTP_409_CONFLICT)
 
-        return Response({"message": "Quiz submitted successfully", "result_id": history.id})
+        return Response({
+            "message": "Quiz submitted successfully" if created else "Quiz already submitted",
+            "result_id": history.id,
+            # The column is a float; a fresh submission holds the grader's int.
+            "score": float(history.score),
+            "correct_answers": history.correct_answers,
+            "total_questions": history.total_questions,
+        })
 
     def get(self, request, history_id):
-        history = QuizHistory.objects.get(id=history_id)
-        quiz = get_object_or_404(Quiz, id=history.quiz_id)
+        history = QuizHistory.objects.filter(id=history_id, user=request.user, completed_at__isnull=False).first()
         if not history:
             return Response({"error": "No history"}, status=status.HTTP_404_NOT_FOUND)
+        quiz = get_object_or_404(Quiz, id=history.quiz_id)
 
         category_name = quiz.category.name if quiz.category else ''
         subcategory_name = quiz.subcategory.name if quiz.subcategory else ''
 
-        answers = [
-            {
-                "question": ua.question.text,
-                "selected_option": getattr(ua.question, f"option_{ua.selected_option.lower()}", ""),
-                "correct_option": getattr(ua.question, f"option_{ua.question.correct_answer.lower()}", ""),
-                "is_correct": ua.is_correct
-            }
-            for ua in UserAnswer.objects.filter(history=history)
-        ]
+        answers = result_answer_rows(history)
 
         percentage = history.score
-        passed = percentage >= 50
+        passed = has_passed(percentage)
 
         time_taken = abs(history.completed_at - history.started_at).total_seconds(
         ) if history.completed_at and history.started_at else 0
@@ -177,26 +256,274 @@ class QuizResultView(APIView):
         return Response({"result": result})
 
 
-class HistoryListView(APIView):
+class AttemptStartView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, quiz_id):
+        quiz = get_object_or_404(Quiz, id=quiz_id)
+        history, created = start_attempt(request.user, quiz)
+        return Response({"attempt": attempt_state(history, saved_answers(history.id, request.user), created)},
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+class AttemptView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, attempt_id):
+        history = get_object_or_404(QuizHistory.objects.select_related('quiz'), id=attempt_id, user=request.user,
+                                    completed_at__isnull=True)
+        return Response({"attempt": attempt_state(history, saved_answers(history.id, request.user))})
+
+    def patch(self, request, attempt_id):
+        answers = request.data.get("answers")
+        if not isinstance(answers, dict):
+            return Response({"error": "answers must be an object of question id to option"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            saved = autosave(attempt_id, request.user, answers)
+        except AttemptClosed as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        if saved is None:
+            return Response({"error": "No open attempt"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"saved": len(saved)})
+
+
+class AttemptSubmitView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, attempt_id):
+        answers = request.data.get("userAnswers")
+        if answers is not None and not isinstance(answers, dict):
+            return Response({"error": "userAnswers must be an object of question id to option"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        history, created = finalize_attempt(attempt_id, request.user, answers)
+        if history is None:
+            return Response({"error": "No such attempt"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "message": "Quiz submitted successfully" if created else "Quiz already submitted",
+            "result_id": history.id,
+            # The column is a float; a fresh submission holds the grader's int.
+            "score": float(history.score),
+            "correct_answers": history.correct_answers,
+            "total_questions": history.total_questions,
+        })
+
+
+class AdaptiveQuestionView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        category = None
+        category_name = request.query_params.get('category')
+        if category_name:
+            category = get_object_or_404(Category, name=category_name)
+
+        question = next_question(request.user, category)
+        if question is None:
+            return Response({"error": "No questions available"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({"question": {
+            "id": question.id,
+            "text": question.text,
+            "options": [question.option_a, question.option_b, question.option_c, question.option_d],
+            "difficulty": question.difficulty,
+        }})
+
+
+class AdaptiveAnswerView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        try:
+            question_id = int(request.data.get("questionId"))
+        except (TypeError, ValueError):
+            return Response({"error": "questionId must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        if not claim_served(request.user, question_id):
+            return Response({"error": "This question is not waiting for your answer"},
+                            status=status.HTTP_409_CONFLICT)
+        question = get_object_or_404(Question, id=question_id)
+        correct = OPTION_LETTERS.index(question.correct_answer)
+        is_correct = parse_selection(request.data.get("selected")) == correct
+
+        ability = record_answers(request.user, [(question.id, is_correct)])
+        return Response({"is_correct": is_correct, "correct": correct, "ability": round(ability, 1)})
+
+
+class ReviewView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        histories = QuizHistory.objects.filter(
-            user=request.user).select_related('quiz')
-        data = [
-            {
-                "id": h.id,
-                "quiz_title": h.quiz.title,
-                "percentage": h.score,
-                "total_questions": h.total_questions,
-                "correct_answers": h.correct_answers,
-                "category": h.quiz.category.name,
-                "subcategory": h.quiz.subcategory.name if getattr(h.quiz, "subcategory", None) else "",
-                "time_taken": abs(h.completed_at - h.started_at).total_seconds() if h.completed_at and h.created_at else 0,
-                "date_taken": h.completed_at.isoformat() if h.completed_at else "",
-            } for h in histories
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+        except ValueError:
+            return Response({"error": "Invalid limit"}, status=status.HTTP_400_BAD_REQUEST)
+
+        reviews = [{
+            "id": item.question.id,
+            "text": item.question.text,
+            "options": [item.question.option_a, item.question.option_b,
+                        item.question.option_c, item.question.option_d],
+            "difficulty": item.question.difficulty,
+            "due_at": item.due_at,
+            "interval": item.interval,
+            "repetitions": item.repetitions,
+        } for item in due_items(request.user, limit)]
+        return Response({"reviews": reviews})
+
+    def post(self, request):
+        answers = request.data.get("answers")
+        if not isinstance(answers, dict) or not answers:
+            return Response({"error": "answers must be a non-empty object"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            selections = {int(question_id): parse_selection(value) for question_id, value in answers.items()}
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid answers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Only questions already due in the user's own queue are graded, so
+        # this cannot be used to look up answers or to add new items.
+        due = due_question_ids(request.user, selections)
+        correct = dict(Question.objects.filter(id__in=due).values_list('id', 'correct_answer'))
+        results = [
+            (question_id, selected == OPTION_LETTERS.index(correct[question_id]))
+            for question_id, selected in selections.items() if question_id in correct
         ]
-        return Response({"history": data})
+        items = {item.question_id: item for item in record_reviews(request.user, results)}
+
+        graded = [{
+            "question_id": question_id,
+            "is_correct": is_correct,
+            "correct": OPTION_LETTERS.index(correct[question_id]),
+            "due_at": items[question_id].due_at if question_id in items else None,
+            "interval": items[question_id].interval if question_id in items else None,
+        } for question_id, is_correct in results]
+        skipped = [question_id for question_id in selections if question_id not in correct]
+        return Response({"results": graded, "skipped": skipped})
+
+
+class GenerationStatusView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"generator": llm_breaker.status()})
+
+
+class QuizPoolView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({"pool": pool_metrics()})
+
+
+class QuestionAnalyticsView(APIView):
+    """Per-question stats. Submissions reach them through the ``analytics.record_submission``
+    task, so they lag until a worker has run it; ``pending_submissions`` says how many are waiting."""
+    permission_classes = [permissions.IsAdminUser]
+    SORT_FIELDS = {"discrimination": "discrimination", "error_rate": "-error_rate", "attempts": "-attempts"}
+
+    def get(self, request):
+        sort = request.query_params.get('sort', 'discrimination')
+        if sort not in self.SORT_FIELDS:
+            return Response({"error": "Unsupported sort"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 500)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+            min_attempts = int(request.query_params.get('min_attempts', 1))
+        except ValueError:
+            return Response({"error": "Invalid paging parameters"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (QuestionStats.objects
+                .filter(attempts__gte=min_attempts)
+                .select_related('question', 'question__quiz')
+                .order_by(self.SORT_FIELDS[sort], 'id')[offset:offset + limit])
+        data = [{
+            "question_id": s.question_id,
+            "question": s.question.text,
+            "quiz_id": s.question.quiz_id,
+            "quiz_title": s.question.quiz.title,
+            "correct_answer": s.question.correct_answer,
+            "attempts": s.attempts,
+            "p_value": round(s.p_value, 4),
+            "error_rate": round(s.error_rate, 4),
+            "discrimination": round(s.discrimination, 4),
+            "option_distribution": {"A": s.picks_a, "B": s.picks_b, "C": s.picks_c, "D": s.picks_d},
+        } for s in rows]
+        return Response({"questions": data, "pending_submissions": pending_submissions()})
+
+
+class LeaderboardView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        scope = request.query_params.get('scope', 'global')
+        window = request.query_params.get('window') or None
+        scope_id = None
+
+        if scope == 'category':
+            scope_id = get_object_or_404(Category, name=request.query_params.get('category')).id
+        elif scope == 'quiz':
+            try:
+                quiz_id = int(request.query_params.get('quiz'))
+            except (TypeError, ValueError):
+                return Response({"error": "Invalid quiz"}, status=status.HTTP_400_BAD_REQUEST)
+            scope_id = get_object_or_404(Quiz, id=quiz_id).id
+        elif scope != 'global':
+            return Response({"error": "Unsupported scope"}, status=status.HTTP_400_BAD_REQUEST)
+        if window is not None and (window not in WINDOWS or scope == 'quiz'):
+            return Response({"error": "Unsupported window"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+        except ValueError:
+            return Response({"error": "Invalid limit"}, status=status.HTTP_400_BAD_REQUEST)
+
+        board = board_name(scope, scope_id, window)
+        entries = [{
+            "rank": position,
+            "username": entry.user.username,
+            "points": round(entry.points, 2),
+            "best_score": round(entry.best_score, 2),
+            "attempts": entry.attempts,
+        } for position, entry in enumerate(top(board, limit), start=1)]
+
+        rank, mine = rank_of(board, request.user)
+        me = {
+            "rank": rank,
+            "points": round(mine.points, 2),
+            "best_score": round(mine.best_score, 2),
+            "attempts": mine.attempts,
+        } if mine else None
+
+        return Response({"leaderboard": {"board": board, "entries": entries, "me": me}})
+
+
+class HistoryListView(ReplicaReadMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        histories = QuizHistory.objects.filter(user=request.user, completed_at__isnull=False)
+        return Response({"history": history_rows(histories)})
+
+
+class HistoryExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        export_format = request.query_params.get('type', 'ndjson')
+        try:
+            cursor = int(request.query_params.get('cursor', 0))
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if export_format == 'csv':
+            response = StreamingHttpResponse(iter_history_csv(request.user, cursor), content_type="text/csv")
+            response["Content-Disposition"] = 'attachment; filename="history.csv"'
+        elif export_format == 'ndjson':
+            response = StreamingHttpResponse(iter_history_ndjson(request.user, cursor), content_type="application/x-ndjson")
+            response["Content-Disposition"] = 'attachment; filename="history.jsonl"'
+        else:
+            return Response({"error": "Unsupported format"}, status=status.HTTP_400_BAD_REQUEST)
+        return response
 
 
 class HistoryDetailView(APIView):
@@ -204,19 +531,9 @@ class HistoryDetailView(APIView):
 
     def get(self, request, history_id):
         history = get_object_or_404(
-            QuizHistory, id=history_id, user=request.user)
-        user_answers = UserAnswer.objects.filter(
-            history=history).select_related('question')
-
-        answers = []
-        for ua in user_answers:
-            answers.append({
-                "question": ua.question.text,
-                "options": [ua.question.option_a, ua.question.option_b, ua.question.option_c, ua.question.option_d] if all(hasattr(ua.question, opt) for opt in ['option_a', 'option_b', 'option_c', 'option_d']) else [],
-                "user_answer": [ua.selected_option, getattr(ua.question, f"option_{ua.selected_option.lower()}", "")] if ua.selected_option and hasattr(ua.question, f"option_{ua.selected_option.lower()}") else [ua.selected_option, ""],
-                "correct_answer": [ua.question.correct_answer if hasattr(ua.question, 'correct_answer') else None, getattr(ua.question, f"option_{ua.question.correct_answer.lower()}", "") if hasattr(ua.question, f"option_{ua.question.correct_answer.lower()}") else ""] if hasattr(ua.question, 'correct_answer') else [None, ""],
-                "is_correct": ua.is_correct,
-            })
+            QuizHistory.objects.select_related('quiz__category', 'quiz__subcategory'),
+            id=history_id, user=request.user, completed_at__isnull=False)
+        answers = answer_rows(history)
 
         result = {
             "id": history.id,
@@ -229,14 +546,14 @@ class HistoryDetailView(APIView):
             "time_taken": (history.completed_at - history.started_at).total_seconds() if history.completed_at and history.started_at else 0,
             "date_taken": history.completed_at.isoformat() if history.completed_at else "",
 
-            "passed": history.score >= (0.5 * history.total_questions),
+            "passed": has_passed(history.score),
             "answers": answers,
         }
 
         return Response({"history": result})
 
 
-class StatisticsView(APIView):
+class StatisticsView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
@@ -262,19 +579,8 @@ class StatisticsView(APIView):
                            .order_by('-attempts'))
         favorite_category = category_counts[0]['quiz__category__name'] if category_counts else ''
 
-        date_limit = now() - timedelta(days=30)
-        trend_data = (histories
-                      .filter(completed_at__gte=date_limit)
-                      .annotate(day=TruncDate('completed_at'))
-                      .values('day')
-                      .annotate(average_score=Avg('score'), quiz_count=Count('pk'))
-                      .order_by('day'))
-
-        performance_trends = [{
-            'date': d['day'].isoformat() if d['day'] else '',
-            'average_score': round(d['average_score'] or 0, 2),
-            'quiz_count': d['quiz_count']
-        } for d in trend_data]
+        today = localdate()
+        trends = performance_trends(user, today - timedelta(days=TREND_DAYS - 1), today)
 
         category_performance_data = []
         for c in category_counts:
@@ -338,13 +644,39 @@ class StatisticsView(APIView):
 
         return Response({'statistics': {
             'overview': overview,
-            'performance_trends': performance_trends,
+            'performance_trends': trends,
             'category_performance': category_performance_data,
             'score_distribution': score_distribution,
             'recent_activity': recent_activity,
         }})
 
 
+class TrendsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        granularity = params.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return Response({"error": f"granularity must be one of {', '.join(GRANULARITIES)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            end = date.fromisoformat(params['end']) if params.get('end') else localdate()
+            start = date.fromisoformat(params['start']) if params.get('start') else end - timedelta(days=TREND_DAYS - 1)
+        except ValueError:
+            return Response({"error": "start and end must be dates (YYYY-MM-DD)"}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({"error": "start must not be after end"}, status=status.HTTP_400_BAD_REQUEST)
+
+        trends = performance_trends(request.user, start, end, granularity, params.get('category'))
+        return Response({
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "granularity": granularity,
+            "trends": trends,
+        })
+
+
 class ProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -353,24 +685,87 @@ class ProfileView(APIView):
         return Response({"user": {
             "username": user.username,
             "email": user.email,
-            "avatar_url": user.avatar.url if hasattr(user, 'avatar') and user.avatar else "/avatars/default.svg"
+            "avatar_url": avatar_url(user),
+            "avatar_thumbnails": thumbnail_urls(user),
         }})
 
     def put(self, request):
         user = request.user
         data = request.data
-        user.username = data.get("username", user.username)
-        user.email = data.get("email", user.email)
-        password = data.get("password")
-        if password:
-            user.set_password(password)
-        user.save()
+        avatar = request.FILES.get("avatar")
+        if avatar is not None:
+            try:
+                validate_upload(avatar)
+            except InvalidAvatar as exc:
+                return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        # Thumbnails for a new avatar are made by the avatars.resize task.
+        User.objects.update_user(user, username=data.get("username"), email=data.get("email"),
+                                 password=data.get("password"), avatar=avatar)
         return Response({"message": "Profile updated successfully", "user": {
-            "username": user.username, "email": user.email
+            "username": user.username, "email": user.email, "avatar_url": avatar_url(user),
         }})
 
 
-class CategoryListView(APIView):
+@require_safe
+@etag(lambda request, name: name)
+@cache_control(public=True, max_age=AVATAR_CACHE_SECONDS, immutable=True)
+def avatar_view(request, name):
+    """Serve a content-hashed avatar thumbnail; its bytes never change under the same name."""
+    path = f"{THUMBNAIL_DIR}/{name}"
+    if not THUMBNAIL_NAME_RE.match(name) or not default_storage.exists(path):
+        raise Http404("No such avatar")
+    return FileResponse(default_storage.open(path), content_type="image/webp")
+
+
+class SearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        term = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type') or None
+        if kind not in (None, search.QUIZ, search.QUESTION):
+            return Response({"error": "Unsupported type"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), 100)
+        except ValueError:
+            return Response({"error": "Invalid paging parameters"}, status=status.HTTP_400_BAD_REQUEST)
+        if not term:
+            return Response({"results": [], "page": page, "has_next": False})
+
+        hits = search.search(term, kind, limit=page_size + 1, offset=(page - 1) * page_size)
+        has_next = len(hits) > page_size
+        hits = hits[:page_size]
+
+        quizzes = Quiz.objects.select_related('category', 'subcategory').in_bulk(
+            {quiz_id for _, _, quiz_id in hits})
+        questions = Question.objects.in_bulk(
+            [object_id for hit_kind, object_id, _ in hits if hit_kind == search.QUESTION])
+
+        results = []
+        for hit_kind, object_id, quiz_id in hits:
+            quiz = quizzes.get(quiz_id)
+            if quiz is None:
+                continue
+            result = {
+                "type": hit_kind,
+                "id": object_id,
+                "quiz_id": quiz.id,
+                "quiz_title": quiz.title,
+                "category": quiz.category.name,
+                "subcategory": quiz.subcategory.name if quiz.subcategory else "",
+            }
+            if hit_kind == search.QUESTION:
+                question = questions.get(object_id)
+                if question is None:
+                    continue
+                result["question"] = question.text
+            results.append(result)
+
+        return Response({"results": results, "page": page, "has_next": has_next})
+
+
+class CategoryListView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
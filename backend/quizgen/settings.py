@@ -55,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'quizapp.replica.PrimaryAfterWriteMiddleware',
 ]
 
 ROOT_URLCONF = 'quizgen.urls'
@@ -83,10 +84,25 @@ WSGI_APPLICATION = 'quizgen.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': config('DATABASE_NAME', default=str(BASE_DIR / 'db.sqlite3')),
     }
 }
 
+# Optional read replica for the read-heavy list, history and statistics
+# views. Locally it is a second SQLite file refreshed by
+# `python manage.py sync_replica`. A user's reads stay on the primary for
+# REPLICA_STICKY_SECONDS after they write, to hide replication lag.
+REPLICA_DATABASE_NAME = config('REPLICA_DATABASE_NAME', default='')
+REPLICA_DATABASE = 'replica' if REPLICA_DATABASE_NAME else ''
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+if REPLICA_DATABASE_NAME:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': REPLICA_DATABASE_NAME,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['quizapp.replica.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -146,6 +162,82 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = "quizapp.User"
 
+# How submitted answers are stored: "rows" keeps one UserAnswer per question,
+# "packed" encodes them into QuizHistory.packed_answers. The daily
+# `archive.answers` task packs the rows of attempts older than
+# ANSWER_ARCHIVE_DAYS either way.
+ANSWER_STORAGE = config('ANSWER_STORAGE', default='rows')
+ANSWER_ARCHIVE_DAYS = config('ANSWER_ARCHIVE_DAYS', default=90, cast=int)
+
+# Locks and counters (e.g. coalesced quiz generation) only span worker
+# processes when they share a cache; point this at the database cache
+# (run createcachetable) or Redis in multi-process deployments.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Warm pool of pre-generated quizzes for popular topics. A topic is popular
+# once it has QUIZ_POOL_MIN_REQUESTS create requests and was asked for in the
+# last QUIZ_POOL_DEMAND_DAYS days; QUIZ_POOL_SIZE=0 turns the pool off.
+QUIZ_POOL_SIZE = config('QUIZ_POOL_SIZE', default=3, cast=int)
+QUIZ_POOL_MIN_REQUESTS = config('QUIZ_POOL_MIN_REQUESTS', default=3, cast=int)
+QUIZ_POOL_DEMAND_DAYS = config('QUIZ_POOL_DEMAND_DAYS', default=7, cast=int)
+QUIZ_POOL_MAX_AGE_HOURS = config('QUIZ_POOL_MAX_AGE_HOURS', default=72, cast=int)
+# Upper bound on generations per background refill of one topic, and per
+# run of the refill_quiz_pool command.
+QUIZ_POOL_REFILL_BATCH = config('QUIZ_POOL_REFILL_BATCH', default=2, cast=int)
+QUIZ_POOL_REFILL_PER_RUN = config('QUIZ_POOL_REFILL_PER_RUN', default=20, cast=int)
+
+# Admission limits for quiz generation: requests per sliding window per user
+# and for the whole site, largest allowed questionCount, and daily budgets of
+# estimated LLM tokens (prompt + reply) per user and for the whole site.
+GENERATION_WINDOW_SECONDS = config('GENERATION_WINDOW_SECONDS', default=3600, cast=int)
+GENERATION_USER_LIMIT = config('GENERATION_USER_LIMIT', default=20, cast=int)
+GENERATION_GLOBAL_LIMIT = config('GENERATION_GLOBAL_LIMIT', default=1000, cast=int)
+GENERATION_MAX_QUESTIONS = config('GENERATION_MAX_QUESTIONS', default=30, cast=int)
+GENERATION_USER_DAILY_TOKENS = config('GENERATION_USER_DAILY_TOKENS', default=50000, cast=int)
+GENERATION_GLOBAL_DAILY_TOKENS = config('GENERATION_GLOBAL_DAILY_TOKENS', default=5000000, cast=int)
+
+# Circuit breaker around the LLM provider: open once CIRCUIT_FAILURE_RATE of
+# at least CIRCUIT_MIN_CALLS calls in a CIRCUIT_WINDOW_SECONDS bucket failed
+# or took longer than CIRCUIT_SLOW_CALL_MS, probe again after the cooldown.
+CIRCUIT_WINDOW_SECONDS = config('CIRCUIT_WINDOW_SECONDS', default=60, cast=int)
+CIRCUIT_MIN_CALLS = config('CIRCUIT_MIN_CALLS', default=5, cast=int)
+CIRCUIT_FAILURE_RATE = config('CIRCUIT_FAILURE_RATE', default=0.5, cast=float)
+CIRCUIT_SLOW_CALL_MS = config('CIRCUIT_SLOW_CALL_MS', default=20000, cast=int)
+CIRCUIT_COOLDOWN_SECONDS = config('CIRCUIT_COOLDOWN_SECONDS', default=30, cast=int)
+
+# Server-side quiz attempts: autosaved answers live in the cache and are
+# written to the attempt row at most every ATTEMPT_FLUSH_SECONDS; answers are
+# accepted until the quiz duration plus ATTEMPT_GRACE_SECONDS has passed, and
+# abandoned attempts are submitted with their saved answers after that.
+ATTEMPT_FLUSH_SECONDS = config('ATTEMPT_FLUSH_SECONDS', default=10, cast=int)
+ATTEMPT_GRACE_SECONDS = config('ATTEMPT_GRACE_SECONDS', default=30, cast=int)
+
+# Avatar uploads larger than this, in bytes or in pixels, are rejected before
+# the thumbnail task ever decodes them.
+AVATAR_MAX_UPLOAD_BYTES = config('AVATAR_MAX_UPLOAD_BYTES', default=5 * 1024 * 1024, cast=int)
+AVATAR_MAX_PIXELS = config('AVATAR_MAX_PIXELS', default=40_000_000, cast=int)
+
+# Deferred work runs on the database task queue; start workers with
+# `python manage.py run_workers`. Workers also queue these recurring tasks,
+# mapping task name to the interval in seconds.
+TASK_SCHEDULE = {
+    'pool.refill': 15 * 60,
+    'leaderboard.compact': 60 * 60,
+    'analytics.rebuild': 24 * 60 * 60,
+    'archive.answers': 24 * 60 * 60,
+    'attempts.finalize_expired': 5 * 60,
+    'tasks.prune': 24 * 60 * 60,
+}
+# Finished tasks are deleted by `tasks.prune` after this many days; failed
+# ones are kept longer so their errors can still be looked at.
+TASK_DONE_RETENTION_DAYS = config('TASK_DONE_RETENTION_DAYS', default=7, cast=int)
+TASK_FAILED_RETENTION_DAYS = config('TASK_FAILED_RETENTION_DAYS', default=30, cast=int)
+
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:8080",
@@ -158,6 +250,12 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # orjson-backed JSON first; the browsable API stays available in DEBUG.
+    "DEFAULT_RENDERER_CLASSES": [
+        "quizapp.renderers.FastJSONRenderer",
+        *(["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
+    ],
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS": "quizapp.renderers.FastContentNegotiation",
 }
 
 SIMPLE_JWT = {
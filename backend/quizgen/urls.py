@@ -21,6 +21,8 @@ from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Jazzmin's language chooser posts to set_language.
+    path('i18n/', include('django.conf.urls.i18n')),
     path('', include('quizapp.urls')),
 ]
 
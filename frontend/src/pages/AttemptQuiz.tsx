@@ -26,7 +26,6 @@ interface Question {
   id: number;
   question: string;
   options: string[];
-  correct_answer?: string;
   difficulty?: string;
 }
 
@@ -54,6 +53,7 @@ export default function AttemptQuiz() {
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [quizStarted, setQuizStarted] = useState(false);
   const [startedAt, setStartedAt] = useState<Date | null>(null);
+  const [attemptKey, setAttemptKey] = useState("");
 
   useEffect(() => {
     if (id) {
@@ -88,7 +88,6 @@ export default function AttemptQuiz() {
         id: q.id,
         question: q.text,
         options: q.options,
-        correct_answer: q.correct,
         difficulty: q.difficulty,
       }));
 
@@ -114,6 +113,7 @@ export default function AttemptQuiz() {
 
   const startQuiz = () => {
     setStartedAt(new Date());
+    setAttemptKey(crypto.randomUUID());
     setQuizStarted(true);
   };
 
@@ -143,40 +143,21 @@ export default function AttemptQuiz() {
 
     setIsSubmitting(true);
     try {
-      const correctAnswers = Object.entries(answers).reduce(
-        (count, [qidStr, selectedOption]) => {
-          const qid = Number(qidStr);
-          const question = quiz.questions.find((q) => q.id === qid);
-          if (!question) return count;
-
-          if (
-            selectedOption.toString() === question.correct_answer.toString()
-          ) {
-            return count + 1;
-          }
-          return count;
-        },
-        0
-      );
-
       const payload = {
         quizId: quiz.id,
         category: quiz.category,
         subcategory: quiz.subcategory || "",
         totalQuestions: quiz.questions.length,
         answeredQuestions: Object.keys(answers).length,
-        correctAnswers,
-        incorrectAnswers: Object.keys(answers).length - correctAnswers,
         unansweredQuestions:
           quiz.questions.length - Object.keys(answers).length,
-        score: Math.round((correctAnswers / quiz.questions.length) * 100),
         timeTaken: quiz.time_duration * 60 - timeLeft,
         duration: quiz.time_duration * 60,
         userAnswers: answers,
         startedAt: startedAt
           ? startedAt.toISOString()
           : new Date().toISOString(),
-        completedAt: new Date().toISOString(),
+        idempotencyKey: attemptKey,
       };
 
       const response = await quizApi.submitQuiz(quiz.id, payload);
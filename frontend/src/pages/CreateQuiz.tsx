@@ -157,10 +157,10 @@ export default function CreateQuiz() {
     const numQuestions = parseInt(formData.numQuestions);
     const timeDuration = parseInt(formData.timeDuration);
 
-    if (numQuestions < 1 || numQuestions > 100) {
+    if (numQuestions < 1 || numQuestions > 30) {
       toast({
         title: "Invalid number of questions",
-        description: "Number of questions must be between 1 and 100.",
+        description: "Number of questions must be between 1 and 30.",
         variant: "destructive",
       });
       return;
@@ -196,6 +196,7 @@ export default function CreateQuiz() {
       toast({
         title: "Failed to create quiz",
         description:
+          error.response?.data?.error ||
           error.response?.data?.message ||
           "Something went wrong. Please try again.",
         variant: "destructive",
@@ -253,7 +254,7 @@ export default function CreateQuiz() {
                     id="numQuestions"
                     type="number"
                     min="1"
-                    max="100"
+                    max="30"
                     value={formData.numQuestions}
                     onChange={(e) =>
                       setFormData((prev) => ({